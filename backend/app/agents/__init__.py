@@ -1,6 +1,6 @@
 """Agents package."""
 
-from .base_agent import BaseAgent, AgentTask, AgentResult
+from .base_agent import BaseAgent, AgentTask, AgentResult, AgentEvent
 from .routing_agent import RoutingAgent
 from .rag_agent import RAGAgent
 from .sql_agent import SQLAgent
@@ -11,11 +11,13 @@ from .report_agent import ReportAgent
 from .prescription_agent import PrescriptionAgent
 from .guardrail_agent import GuardrailAgent
 from .audit_agent import AuditAgent
+from .chat_pipeline import ChatPipeline, PipelineResult, PipelineError, PipelineTimeoutError
 
 __all__ = [
     "BaseAgent",
     "AgentTask",
     "AgentResult",
+    "AgentEvent",
     "RoutingAgent",
     "RAGAgent",
     "SQLAgent",
@@ -26,4 +28,8 @@ __all__ = [
     "PrescriptionAgent",
     "GuardrailAgent",
     "AuditAgent",
+    "ChatPipeline",
+    "PipelineResult",
+    "PipelineError",
+    "PipelineTimeoutError",
 ]
@@ -5,7 +5,7 @@ Appointment Booking Agent for managing doctor calendars and scheduling.
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.mcp_clients import DatabaseMCPClient, PaymentMCPClient, NotificationMCPClient
+from app.mcp_clients import DatabaseMCPClient, PaymentMCPClient, NotificationMCPClient, get_mcp_registry
 
 
 class AppointmentAgent(BaseAgent):
@@ -22,9 +22,9 @@ class AppointmentAgent(BaseAgent):
     ):
         """Initialize appointment agent."""
         super().__init__("appointment_agent")
-        self.db_client = db_client or DatabaseMCPClient()
-        self.payment_client = payment_client or PaymentMCPClient()
-        self.notification_client = notification_client or NotificationMCPClient()
+        self.db_client = db_client or get_mcp_registry().database
+        self.payment_client = payment_client or get_mcp_registry().payment
+        self.notification_client = notification_client or get_mcp_registry().notification
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
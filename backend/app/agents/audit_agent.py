@@ -2,11 +2,28 @@
 Audit Agent for maintaining immutable audit trails and explainability.
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from datetime import datetime
+from pathlib import Path
+import asyncio
+import csv
+import json
 import uuid
+from sqlalchemy.orm import Session
 from .base_agent import BaseAgent, AgentTask, AgentResult
+from app.core.config import settings
 from app.core.logger import audit_logger
+from app.db import SessionLocal
+from app.db.crud import filter_audit_logs
+from app.models.audit import AuditLog
+
+EXPORT_FORMATS = ("json", "csv")
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = [
+    "event_id", "event_type", "timestamp", "user_id", "session_id", "agent_name", "action",
+    "resource_type", "resource_id", "input", "output", "metadata", "success", "error_message",
+    "provenance"
+]
 
 
 class AuditAgent(BaseAgent):
@@ -15,9 +32,15 @@ class AuditAgent(BaseAgent):
     Tracks all agent actions, LLM calls, and decision provenance.
     """
 
-    def __init__(self):
-        """Initialize audit agent."""
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        """
+        Initialize audit agent.
+
+        Args:
+            session_factory: Database session factory for reading the audit_logs table
+        """
         super().__init__("audit_agent")
+        self.session_factory = session_factory or SessionLocal
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
@@ -61,7 +84,7 @@ class AuditAgent(BaseAgent):
         event_id = f"evt_{uuid.uuid4().hex[:12]}"
 
         # Log to audit system
-        audit_logger.log_agent_action(
+        await audit_logger.log_agent_action_async(
             agent_name=event_data.get("agent_name", "system"),
             action=event_data.get("action", "unknown"),
             user_id=str(task.user_id) if task.user_id else "system",
@@ -100,28 +123,67 @@ class AuditAgent(BaseAgent):
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
 
-        # In production, query the database
-        # For now, return mock results
-        audit_entries = [
-            {
-                "event_id": "evt_001",
-                "event_type": "agent_action",
-                "agent_name": "rag_agent",
-                "timestamp": datetime.utcnow().isoformat(),
-                "user_id": filters.get("user_id", "unknown")
-            }
-        ]
+        limit = min(int(task.context.get("limit", 100)), settings.AUDIT_QUERY_MAX_LIMIT)
+        offset = int(task.context.get("offset", 0))
+
+        # Database I/O runs off the event loop
+        audit_entries, total_count = await asyncio.to_thread(self._fetch_audit_logs, filters, limit, offset)
 
         return self.create_success_result(
             task_id=task.task_id,
             response={
                 "filters": filters,
                 "entries": audit_entries,
-                "total_count": len(audit_entries)
+                "total_count": total_count
             },
             confidence=1.0
         )
 
+    def _fetch_audit_logs(
+        self,
+        filters: Dict[str, Any],
+        limit: int,
+        offset: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Fetch one page of matching audit log rows, newest first."""
+        with self.session_factory() as db:
+            query = filter_audit_logs(db.query(AuditLog), **self._parse_filters(filters))
+            total_count = query.count()
+            rows = query.order_by(AuditLog.timestamp.desc()).offset(offset).limit(limit).all()
+            return [self._serialize_audit_log(row) for row in rows], total_count
+
+    @staticmethod
+    def _parse_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert request filters to column types."""
+        parsed = dict(filters)
+        if "user_id" in parsed:
+            parsed["user_id"] = int(parsed["user_id"])
+        for key in ("start_date", "end_date"):
+            if isinstance(parsed.get(key), str):
+                parsed[key] = datetime.fromisoformat(parsed[key])
+        return parsed
+
+    @staticmethod
+    def _serialize_audit_log(row: AuditLog) -> Dict[str, Any]:
+        """Convert an audit log row to a JSON-serializable entry."""
+        return {
+            "event_id": row.event_id,
+            "event_type": row.event_type,
+            "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+            "user_id": row.user_id,
+            "session_id": row.session_id,
+            "agent_name": row.agent_name,
+            "action": row.action,
+            "resource_type": row.resource_type,
+            "resource_id": row.resource_id,
+            "input": row.input_data,
+            "output": row.output_data,
+            "metadata": row.event_metadata,
+            "success": row.success == "true",
+            "error_message": row.error_message,
+            "provenance": row.provenance
+        }
+
     async def _explain_decision(self, task: AgentTask) -> AgentResult:
         """Provide explainability for a decision."""
         decision_id = task.context.get("decision_id")
@@ -185,20 +247,28 @@ class AuditAgent(BaseAgent):
 
     async def _export_audit_trail(self, task: AgentTask) -> AgentResult:
         """Export audit trail for compliance."""
-        format_type = task.context.get("format", "json")  # json, pdf, csv
+        format_type = task.context.get("format", "json")  # json, csv
         filters = task.context.get("filters", {})
 
+        if format_type not in EXPORT_FORMATS:
+            return self.create_error_result(
+                task_id=task.task_id,
+                error=f"Unsupported export format: {format_type}"
+            )
+
         export_id = f"export_{uuid.uuid4().hex[:12]}"
+        file_path = Path(settings.AUDIT_EXPORT_DIR) / f"{export_id}.{format_type}"
+
+        entry_count = await asyncio.to_thread(self._write_export, filters, format_type, file_path)
 
-        # In production, generate actual export file
         export_result = {
             "export_id": export_id,
             "format": format_type,
             "filters": filters,
             "status": "completed",
-            "file_path": f"/exports/{export_id}.{format_type}",
+            "file_path": str(file_path),
             "generated_at": datetime.utcnow().isoformat(),
-            "entry_count": 42  # Mock count
+            "entry_count": entry_count
         }
 
         return self.create_success_result(
@@ -207,6 +277,37 @@ class AuditAgent(BaseAgent):
             confidence=1.0
         )
 
+    def _write_export(self, filters: Dict[str, Any], format_type: str, file_path: Path) -> int:
+        """Stream matching audit log rows to an export file, oldest first."""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        entry_count = 0
+
+        with self.session_factory() as db, open(file_path, "w", newline="") as export_file:
+            query = filter_audit_logs(db.query(AuditLog), **self._parse_filters(filters))
+            rows = query.order_by(AuditLog.timestamp.asc()).yield_per(EXPORT_BATCH_SIZE)
+
+            if format_type == "csv":
+                writer = csv.DictWriter(export_file, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+            else:
+                export_file.write("[")
+
+            for row in rows:
+                entry = self._serialize_audit_log(row)
+                if format_type == "csv":
+                    writer.writerow({
+                        key: json.dumps(value, default=str) if isinstance(value, (dict, list)) else value
+                        for key, value in entry.items()
+                    })
+                else:
+                    export_file.write(("," if entry_count else "") + json.dumps(entry, default=str))
+                entry_count += 1
+
+            if format_type == "json":
+                export_file.write("]")
+
+        return entry_count
+
     def create_provenance_chain(
         self,
         agent_actions: List[Dict[str, Any]]
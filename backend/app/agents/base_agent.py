@@ -3,12 +3,11 @@ Base agent class for MediSense-AI multi-agent system.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List
 from dataclasses import dataclass
 from datetime import datetime
 import uuid
 from app.core.logger import get_logger, audit_logger
-from app.core.security import redact_phi_dict
 
 logger = get_logger(__name__)
 
@@ -38,12 +37,22 @@ class AgentResult:
     execution_time_ms: Optional[float] = None
 
 
+@dataclass
+class AgentEvent:
+    """Intermediate event from a streaming agent execution."""
+    event: str  # "sources", "chunk" or "result" (always last; data is the AgentResult)
+    data: Any = None
+
+
 class BaseAgent(ABC):
     """
     Abstract base class for all agents in the system.
     Provides common functionality for logging, error handling, and result formatting.
     """
 
+    # Whether the agent only reads data, so it may be started speculatively and cancelled
+    side_effect_free: bool = False
+
     def __init__(self, agent_name: str):
         """
         Initialize the base agent.
@@ -80,15 +89,7 @@ class BaseAgent(ABC):
         Returns:
             Agent execution result
         """
-        # Convert dict to AgentTask
-        agent_task = AgentTask(
-            task_id=task.get("task_id", str(uuid.uuid4())),
-            query=task.get("query", ""),
-            context=task.get("context", {}),
-            session_id=task.get("session_id", str(uuid.uuid4())),
-            user_id=task.get("user_id"),
-            metadata=task.get("metadata", {})
-        )
+        agent_task = self._build_task(task)
 
         start_time = datetime.now()
 
@@ -103,7 +104,7 @@ class BaseAgent(ABC):
             result.execution_time_ms = execution_time
 
             # Log to audit trail
-            self._log_execution(agent_task, result)
+            await self._log_execution(agent_task, result)
 
             self.logger.info(
                 f"{self.agent_name} execution completed",
@@ -134,11 +135,89 @@ class BaseAgent(ABC):
             )
 
             # Log error to audit trail
-            self._log_execution(agent_task, error_result)
+            await self._log_execution(agent_task, error_result)
 
             return error_result
 
-    def _log_execution(self, task: AgentTask, result: AgentResult):
+    async def execute_stream(self, task: AgentTask) -> AsyncIterator[AgentEvent]:
+        """
+        Execute the task, yielding events as results become available.
+
+        Agents that can report progress (retrieved sources, partial answers) override
+        this. By default the whole response is sent as a single chunk.
+
+        Args:
+            task: Task definition
+
+        Yields:
+            Agent events, ending with a "result" event
+        """
+        result = await self.execute(task)
+        if result.success and result.response is not None:
+            yield AgentEvent("chunk", str(result.response))
+        yield AgentEvent("result", result)
+
+    async def stream(self, task: Dict[str, Any]) -> AsyncIterator[AgentEvent]:
+        """
+        Run the agent with task dictionary, streaming its events (wrapper for execute_stream).
+
+        Args:
+            task: Task dictionary with query, context, session_id, etc.
+
+        Yields:
+            Agent events, ending with a "result" event
+        """
+        agent_task = self._build_task(task)
+        start_time = datetime.now()
+        result = None
+
+        self.logger.info(f"Starting {self.agent_name} streaming execution", task_id=agent_task.task_id)
+
+        try:
+            async for event in self.execute_stream(agent_task):
+                if event.event == "result":
+                    result = event.data
+                    result.execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+                    await self._log_execution(agent_task, result)
+                yield event
+
+        except Exception as e:
+            self.logger.error(f"{self.agent_name} streaming execution failed", task_id=agent_task.task_id, error=str(e))
+            result = AgentResult(
+                agent_name=self.agent_name,
+                task_id=agent_task.task_id,
+                success=False,
+                response=None,
+                error=str(e),
+                execution_time_ms=(datetime.now() - start_time).total_seconds() * 1000
+            )
+            await self._log_execution(agent_task, result)
+            yield AgentEvent("result", result)
+
+        finally:
+            if result is None:
+                # The consumer stopped reading (client disconnect, deadline, blocked content)
+                await self._log_execution(agent_task, AgentResult(
+                    agent_name=self.agent_name,
+                    task_id=agent_task.task_id,
+                    success=False,
+                    response=None,
+                    error="Stream closed before completion",
+                    execution_time_ms=(datetime.now() - start_time).total_seconds() * 1000
+                ))
+
+    def _build_task(self, task: Dict[str, Any]) -> AgentTask:
+        """Convert a task dictionary to an AgentTask."""
+        return AgentTask(
+            task_id=task.get("task_id", str(uuid.uuid4())),
+            query=task.get("query", ""),
+            context=task.get("context", {}),
+            session_id=task.get("session_id", str(uuid.uuid4())),
+            user_id=task.get("user_id"),
+            metadata=task.get("metadata", {})
+        )
+
+    async def _log_execution(self, task: AgentTask, result: AgentResult):
         """
         Log agent execution to audit trail.
 
@@ -147,20 +226,20 @@ class BaseAgent(ABC):
             result: Execution result
         """
         try:
-            # Prepare input/output data with PHI redaction
-            input_data = redact_phi_dict({
+            # PHI is redacted by the background audit writer
+            input_data = {
                 "query": task.query,
                 "context": task.context
-            })
+            }
 
-            output_data = redact_phi_dict({
+            output_data = {
                 "response": str(result.response) if result.response else None,
                 "confidence": result.confidence,
                 "success": result.success
-            })
+            }
 
-            # Log to audit system
-            audit_logger.log_agent_action(
+            # Queue for the audit system
+            await audit_logger.log_agent_action_async(
                 agent_name=self.agent_name,
                 action="execute",
                 user_id=str(task.user_id) if task.user_id else "system",
@@ -0,0 +1,391 @@
+"""
+Chat pipeline executor that overlaps routing, input guardrails and the specialist agent.
+"""
+
+from typing import Dict, Any, AsyncIterator, List, Optional
+from dataclasses import dataclass, field
+import asyncio
+from .base_agent import BaseAgent, AgentResult
+from .routing_agent import RoutingAgent
+from .guardrail_agent import GuardrailAgent, DISCLAIMER
+from app.core.config import settings
+from app.core.security import redact_phi_dict
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline step fails."""
+
+
+class PipelineTimeoutError(PipelineError):
+    """Raised when a pipeline step misses its deadline."""
+
+    def __init__(self, step: str):
+        super().__init__(f"Pipeline step '{step}' exceeded its deadline")
+        self.step = step
+
+
+@dataclass
+class PipelineResult:
+    """Result of a full chat pipeline run."""
+    target_agent_name: str
+    routing_result: AgentResult
+    result: AgentResult
+    guardrail_result: AgentResult
+    input_violations: List[Dict[str, Any]] = field(default_factory=list)
+    speculative: bool = False
+
+
+class ChatPipeline:
+    """
+    Executes the /chat pipeline: routing, target agent and output guardrails.
+
+    Input-side guardrail checks run concurrently with routing. The routing
+    decision is predicted once, off the event loop, and shared with the routing
+    agent. When it is confident and the predicted agent is side-effect free, that
+    agent is started before routing finishes and cancelled if routing disagrees. All steps
+    share a deadline of AGENT_TIMEOUT_SECONDS.
+    """
+
+    def __init__(
+        self,
+        routing_agent: RoutingAgent,
+        guardrail_agent: GuardrailAgent,
+        agents: Dict[str, BaseAgent],
+        fallback_agent_name: str = "rag",
+        timeout_seconds: Optional[float] = None,
+        speculation_enabled: Optional[bool] = None,
+        speculation_threshold: Optional[float] = None
+    ):
+        """
+        Initialize the chat pipeline.
+
+        Args:
+            routing_agent: Agent used to pick the target agent
+            guardrail_agent: Agent enforcing input/output policies
+            agents: Registry of target agents by name
+            fallback_agent_name: Agent used when routing names an unknown agent
+            timeout_seconds: Deadline for the whole pipeline
+            speculation_enabled: Whether to start the predicted agent early
+            speculation_threshold: Minimum routing confidence for speculation
+        """
+        self.routing_agent = routing_agent
+        self.guardrail_agent = guardrail_agent
+        self.agents = agents
+        self.fallback_agent_name = fallback_agent_name
+        self.timeout_seconds = timeout_seconds or settings.AGENT_TIMEOUT_SECONDS
+        self.speculation_enabled = (
+            settings.PIPELINE_SPECULATION_ENABLED if speculation_enabled is None else speculation_enabled
+        )
+        self.speculation_threshold = (
+            settings.PIPELINE_SPECULATION_THRESHOLD if speculation_threshold is None else speculation_threshold
+        )
+
+    async def run(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        session_id: str,
+        user_id: Optional[int] = None
+    ) -> PipelineResult:
+        """
+        Run the chat pipeline for a query.
+
+        Args:
+            query: User query
+            context: Request context
+            session_id: Session identifier
+            user_id: Current user ID
+
+        Returns:
+            Pipeline result
+
+        Raises:
+            PipelineError: If routing fails
+            PipelineTimeoutError: If a step misses the deadline
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        pending: List[asyncio.Task] = []
+
+        def build_task() -> Dict[str, Any]:
+            return {
+                "query": query,
+                "context": dict(context),
+                "session_id": session_id,
+                "user_id": user_id
+            }
+
+        try:
+            input_check = asyncio.create_task(self._check_input(query))
+            pending.append(input_check)
+
+            # Predict once; speculation and the routing agent share the decision
+            prediction = await self._await_step(asyncio.create_task(self._predict(query)), deadline, "routing")
+            speculative_name, speculative = self._start_speculative(prediction, build_task())
+            if speculative is not None:
+                pending.append(speculative)
+
+            routing = asyncio.create_task(self.routing_agent.run({
+                **build_task(),
+                "metadata": {"routing_decision": prediction}
+            }))
+            pending.append(routing)
+
+            routing_result = await self._await_step(routing, deadline, "routing")
+            if not routing_result.success:
+                raise PipelineError("Routing failed")
+
+            target_agent_name = routing_result.response.get("target_agent")
+            target_agent = self.agents.get(target_agent_name)
+
+            if not target_agent:
+                # Fallback to default agent
+                target_agent_name = self.fallback_agent_name
+                target_agent = self.agents[self.fallback_agent_name]
+
+            if speculative is not None and speculative_name == target_agent_name:
+                agent_run = speculative
+            else:
+                if speculative is not None:
+                    speculative.cancel()
+                    logger.info(
+                        "Cancelled speculative agent",
+                        predicted=speculative_name,
+                        routed=target_agent_name
+                    )
+                agent_run = asyncio.create_task(target_agent.run(build_task()))
+                pending.append(agent_run)
+
+            result = await self._await_step(agent_run, deadline, target_agent_name)
+
+            guardrail_run = asyncio.create_task(self.guardrail_agent.run({
+                "query": "validate",
+                "context": {
+                    "content": str(result.response),
+                    "source_agent": target_agent_name
+                },
+                "session_id": session_id,
+                "user_id": user_id
+            }))
+            pending.append(guardrail_run)
+            guardrail_result = await self._await_step(guardrail_run, deadline, "guardrail")
+
+            input_violations = await self._await_step(input_check, deadline, "input_guardrail")
+
+            return PipelineResult(
+                target_agent_name=target_agent_name,
+                routing_result=routing_result,
+                result=result,
+                guardrail_result=guardrail_result,
+                input_violations=input_violations,
+                speculative=agent_run is speculative
+            )
+
+        finally:
+            # Cancel any work that is no longer needed
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+
+    async def stream(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        session_id: str,
+        user_id: Optional[int] = None,
+        agent_name: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the chat pipeline, yielding events as soon as each step produces output.
+
+        Events, in order: "routing" (unless agent_name is given), "sources" (agents that
+        retrieve documents), "chunk" (guarded answer text, possibly many) and finally
+        "guardrail" with the verdict on the whole response. A failure ends the stream
+        with an "error" event instead. Every chunk passes the stream guard before it is
+        sent; if unsafe content is found, no further chunks are sent and the verdict
+        reports stream_blocked.
+
+        Args:
+            query: User query
+            context: Request context
+            session_id: Session identifier
+            user_id: Current user ID
+            agent_name: Call this agent directly instead of routing
+
+        Yields:
+            Events as {"event": name, "data": payload}
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        task = {
+            "query": query,
+            "context": dict(context),
+            "session_id": session_id,
+            "user_id": user_id
+        }
+
+        input_check = asyncio.create_task(self._check_input(query))
+        events = None
+        try:
+            routing_confidence = None
+            if agent_name is None:
+                routing = asyncio.create_task(self.routing_agent.run(dict(task)))
+                try:
+                    routing_result = await self._await_step(routing, deadline, "routing")
+                finally:
+                    routing.cancel()
+                if not routing_result.success:
+                    raise PipelineError("Routing failed")
+
+                agent_name = routing_result.response.get("target_agent")
+                if agent_name not in self.agents:
+                    agent_name = self.fallback_agent_name
+                routing_confidence = routing_result.confidence
+
+                yield {"event": "routing", "data": {
+                    "target_agent": agent_name,
+                    "confidence": routing_confidence,
+                    "reasoning": routing_result.response.get("reasoning")
+                }}
+
+            guard = self.guardrail_agent.stream_guard()
+            raw_parts: List[str] = []
+            result = None
+
+            events = self.agents[agent_name].stream(task)
+            while True:
+                try:
+                    event = await self._await_step(
+                        asyncio.ensure_future(events.__anext__()), deadline, agent_name
+                    )
+                except StopAsyncIteration:
+                    break
+
+                if event.event == "sources":
+                    yield {"event": "sources", "data": redact_phi_dict({"sources": event.data})["sources"]}
+                elif event.event == "chunk":
+                    raw_parts.append(event.data)
+                    text = guard.feed(event.data)
+                    if text:
+                        yield {"event": "chunk", "data": {"text": text}}
+                    if guard.blocked:
+                        break
+                elif event.event == "result":
+                    result = event.data
+
+            if result is not None and not result.success:
+                raise PipelineError(result.error or f"Agent '{agent_name}' failed")
+
+            text = guard.finish()
+            if text:
+                yield {"event": "chunk", "data": {"text": text}}
+
+            # Whole-response verdict (also covers checks that need the full text)
+            guardrail_run = asyncio.create_task(self.guardrail_agent.run({
+                "query": "validate",
+                "context": {
+                    "content": "".join(raw_parts),
+                    "source_agent": agent_name
+                },
+                "session_id": session_id,
+                "user_id": user_id
+            }))
+            guardrail_result = await self._await_step(guardrail_run, deadline, "guardrail")
+            input_violations = await self._await_step(input_check, deadline, "input_guardrail")
+
+            verdict = guardrail_result.response if guardrail_result.success else {}
+            violations = verdict.get("violations", []) + guard.violations
+            if not guard.blocked and any(v["action"] == "append_disclaimer" for v in violations):
+                yield {"event": "chunk", "data": {"text": DISCLAIMER}}
+
+            yield {"event": "guardrail", "data": {
+                "agent_name": agent_name,
+                "passed": guardrail_result.success and not violations,
+                "should_block": guard.blocked or verdict.get("should_block", not guardrail_result.success),
+                "stream_blocked": guard.blocked,
+                "violations": violations,
+                "redactions": guard.redactions,
+                "confidence": result.confidence if result else 0.0,
+                "provenance": result.provenance if result else None,
+                "routing_confidence": routing_confidence,
+                "input_violations": len(input_violations)
+            }}
+
+        except PipelineTimeoutError as e:
+            yield {"event": "error", "data": {"status_code": 504, "detail": str(e)}}
+        except PipelineError as e:
+            logger.error("Streaming pipeline failed", error=str(e))
+            yield {"event": "error", "data": {"status_code": 500, "detail": str(e)}}
+
+        finally:
+            if not input_check.done():
+                input_check.cancel()
+            if events is not None:
+                await events.aclose()
+
+    async def _predict(self, query: str) -> Dict[str, Any]:
+        """
+        Compute the routing decision off the event loop.
+
+        Raises:
+            PipelineError: If routing fails
+        """
+        try:
+            return await self.routing_agent.predict_async(query)
+        except Exception as e:
+            logger.error("Routing prediction failed", error=str(e))
+            raise PipelineError("Routing failed") from e
+
+    def _start_speculative(self, prediction: Dict[str, Any], task: Dict[str, Any]):
+        """
+        Start the predicted agent early when the prediction is confident.
+
+        Args:
+            prediction: Routing decision from RoutingAgent.predict_async
+            task: Task dictionary for the agent
+
+        Returns:
+            Tuple of (predicted agent name, running task) or (None, None)
+        """
+        if not self.speculation_enabled:
+            return None, None
+
+        agent = self.agents.get(prediction["target_agent"])
+
+        if (
+            agent is None
+            or not agent.side_effect_free
+            or prediction["confidence"] < self.speculation_threshold
+        ):
+            return None, None
+
+        return prediction["target_agent"], asyncio.create_task(agent.run(task))
+
+    async def _check_input(self, query: str) -> List[Dict[str, Any]]:
+        """Run cheap input-side guardrail checks on the query."""
+        return self.guardrail_agent.check_input(query)
+
+    async def _await_step(self, task: asyncio.Task, deadline: float, step: str) -> Any:
+        """
+        Await a pipeline step within the remaining time budget.
+
+        Args:
+            task: Running step
+            deadline: Event loop time by which the pipeline must finish
+            step: Step name for error reporting
+
+        Returns:
+            Step result
+
+        Raises:
+            PipelineTimeoutError: If the deadline passes first
+        """
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            return await asyncio.wait_for(task, timeout=max(remaining, 0))
+        except asyncio.TimeoutError:
+            logger.error("Pipeline step timed out", step=step, timeout_seconds=self.timeout_seconds)
+            raise PipelineTimeoutError(step)
@@ -2,12 +2,23 @@
 Guardrail Agent for enforcing safety policies and PHI/PII redaction.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import json
 import re
+import sys
 from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.core.security import redact_phi, redact_phi_dict
+from app.core.security import phi_redactor, PHIMatch
+from app.core.content_cache import ContentCache, content_key
 from app.core.config import settings
 
+# Guardrail verdicts shared by all guardrail agent instances
+verdict_cache = ContentCache("guardrail_verdicts")
+
+DISCLAIMER = (
+    "\n\n[Disclaimer: This information is not a substitute for professional medical advice. "
+    "Always consult with a qualified healthcare provider for medical decisions.]"
+)
+
 
 class GuardrailAgent(BaseAgent):
     """
@@ -62,23 +73,7 @@ class GuardrailAgent(BaseAgent):
             content_type = task.context.get("content_type", "text")
             agent_name = task.context.get("source_agent", "unknown")
 
-            violations = []
-
-            # Check each policy
-            if self.policies["phi_redaction"]["enabled"]:
-                phi_violations = self._check_phi_exposure(content)
-                violations.extend(phi_violations)
-
-            if self.policies["unsafe_content"]["enabled"]:
-                unsafe_violations = self._check_unsafe_content(content)
-                violations.extend(unsafe_violations)
-
-            if self.policies["medical_advice_disclaimer"]["enabled"]:
-                disclaimer_violations = self._check_disclaimer(content)
-                violations.extend(disclaimer_violations)
-
-            # Apply redaction to content
-            redacted_content = self._apply_guardrails(content, violations)
+            violations, redacted_content = self._evaluate(content)
 
             # Determine if content should be blocked
             should_block = any(v["severity"] == "critical" for v in violations)
@@ -107,26 +102,96 @@ class GuardrailAgent(BaseAgent):
                 error=f"Guardrail enforcement failed: {str(e)}"
             )
 
+    def _policy_version(self) -> str:
+        """Fingerprint of everything a verdict depends on."""
+        return json.dumps(
+            [self.policies, self.unsafe_patterns, settings.PHI_REDACTION_ENABLED],
+            sort_keys=True
+        )
+
+    def _evaluate(self, content: str) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Check content against all policies and apply the resulting actions.
+
+        Verdicts are memoized by content hash and dropped whenever the policies change.
+
+        Args:
+            content: Content to check
+
+        Returns:
+            Violations and the guarded content
+        """
+        use_cache = settings.CONTENT_CACHE_ENABLED
+        if use_cache:
+            key = content_key(content)
+            version = self._policy_version()
+            cached = verdict_cache.get(key, version)
+            if cached is not None:
+                violations, redacted_content = cached
+                return [dict(violation) for violation in violations], redacted_content
+
+        violations = []
+
+        # Check each policy; PHI is found and redacted in the same pass
+        phi_redacted_content = content
+        if self.policies["phi_redaction"]["enabled"]:
+            phi_redacted_content, phi_matches = phi_redactor.redact(content)
+            violations.extend(self._phi_violations(phi_matches))
+
+        if self.policies["unsafe_content"]["enabled"]:
+            violations.extend(self._check_unsafe_content(content))
+
+        if self.policies["medical_advice_disclaimer"]["enabled"]:
+            violations.extend(self._check_disclaimer(content))
+
+        # Apply redaction to content
+        redacted_content = self._apply_guardrails(content, violations, phi_redacted_content)
+
+        if use_cache:
+            # The verdict holds only redacted content, never the raw input
+            size = sys.getsizeof(redacted_content) + 512 * len(violations)
+            verdict_cache.put(key, ([dict(violation) for violation in violations], redacted_content), size, version)
+
+        return violations, redacted_content
+
+    def check_input(self, content: str) -> List[Dict[str, Any]]:
+        """
+        Run the cheap input-side checks (PHI exposure and unsafe content).
+
+        Args:
+            content: User input to check
+
+        Returns:
+            List of violations found in the input
+        """
+        violations = []
+
+        if self.policies["phi_redaction"]["enabled"]:
+            violations.extend(self._check_phi_exposure(content))
+
+        if self.policies["unsafe_content"]["enabled"]:
+            violations.extend(self._check_unsafe_content(content))
+
+        return violations
+
     def _check_phi_exposure(self, content: str) -> List[Dict[str, Any]]:
         """Check for PHI/PII exposure."""
-        violations = []
+        return self._phi_violations(phi_redactor.scan(content))
 
-        # Check for common PHI patterns
-        phi_patterns = {
-            "ssn": r"\b\d{3}-\d{2}-\d{4}\b",
-            "phone": r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",
-            "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
-            "date_of_birth": r"\b\d{1,2}/\d{1,2}/\d{2,4}\b",
-        }
+    def _phi_violations(self, matches: List[PHIMatch]) -> List[Dict[str, Any]]:
+        """Build one violation per PHI type found."""
+        counts: Dict[str, int] = {}
+        for match in matches:
+            counts[match.phi_type] = counts.get(match.phi_type, 0) + 1
 
-        for phi_type, pattern in phi_patterns.items():
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            if matches:
+        violations = []
+        for phi_type in phi_redactor.phi_types:
+            if phi_type in counts:
                 violations.append({
                     "policy": "phi_redaction",
                     "violation_type": f"phi_exposure_{phi_type}",
                     "severity": "critical",
-                    "description": f"Found {len(matches)} instances of {phi_type}",
+                    "description": f"Found {counts[phi_type]} instances of {phi_type}",
                     "action": "redact"
                 })
 
@@ -178,7 +243,8 @@ class GuardrailAgent(BaseAgent):
     def _apply_guardrails(
         self,
         content: str,
-        violations: List[Dict[str, Any]]
+        violations: List[Dict[str, Any]],
+        phi_redacted_content: Optional[str] = None
     ) -> str:
         """
         Apply guardrail actions to content.
@@ -186,6 +252,7 @@ class GuardrailAgent(BaseAgent):
         Args:
             content: Original content
             violations: List of violations
+            phi_redacted_content: Content already redacted while checking for PHI
 
         Returns:
             Modified content with guardrails applied
@@ -194,7 +261,9 @@ class GuardrailAgent(BaseAgent):
 
         # Apply redaction for PHI violations
         if any(v["action"] == "redact" for v in violations):
-            modified_content = redact_phi(modified_content)
+            if phi_redacted_content is None:
+                phi_redacted_content = phi_redactor.redact(content)[0]
+            modified_content = phi_redacted_content
 
         # Block content if critical violations
         if any(v["severity"] == "critical" and v["action"] == "block" for v in violations):
@@ -202,14 +271,14 @@ class GuardrailAgent(BaseAgent):
 
         # Append disclaimer if needed
         if any(v["action"] == "append_disclaimer" for v in violations):
-            disclaimer = (
-                "\n\n[Disclaimer: This information is not a substitute for professional medical advice. "
-                "Always consult with a qualified healthcare provider for medical decisions.]"
-            )
-            modified_content += disclaimer
+            modified_content += DISCLAIMER
 
         return modified_content
 
+    def stream_guard(self) -> "StreamGuard":
+        """Create a guard applying this agent's policies to a streamed response."""
+        return StreamGuard(self)
+
     def validate_agent_output(
         self,
         agent_name: str,
@@ -245,3 +314,120 @@ class GuardrailAgent(BaseAgent):
             "passed": len(violations) == 0,
             "violations": violations
         }
+
+
+class StreamGuard:
+    """
+    Applies guardrails to a response chunk by chunk as it is streamed.
+
+    Text is released only up to a whitespace boundary at least HOLDBACK_CHARS before
+    the end of what has arrived, and never in the middle of a PHI match, so an
+    identifier split across chunks is still redacted as a whole. Unsafe content
+    patterns are checked against the current line before anything is released; a
+    match stops the stream. Whole-response checks (the medical advice disclaimer)
+    are left to the final verdict.
+    """
+
+    # Longest tail that may still complete a PHI match (cut at whitespace anyway)
+    HOLDBACK_CHARS = 32
+    # Text without whitespace is released regardless once this much is buffered
+    MAX_BUFFER_CHARS = 4096
+    # Context kept from the current line for unsafe patterns spanning chunks
+    LINE_CONTEXT_CHARS = 512
+
+    def __init__(self, agent: GuardrailAgent):
+        """
+        Initialize the stream guard.
+
+        Args:
+            agent: Guardrail agent whose policies are applied
+        """
+        self.redact = agent.policies["phi_redaction"]["enabled"]
+        self.check_unsafe = agent.policies["unsafe_content"]["enabled"]
+        self._check_unsafe_content = agent._check_unsafe_content
+        self._buffer = ""
+        self._line = ""
+        self.redactions = 0
+        self.violations: List[Dict[str, Any]] = []
+        self.blocked = False
+
+    def feed(self, text: str) -> str:
+        """
+        Add a chunk of the response.
+
+        Args:
+            text: Next raw chunk
+
+        Returns:
+            Guarded text that is safe to send now (may be empty)
+        """
+        self._buffer += text
+        return self._release(final=False)
+
+    def finish(self) -> str:
+        """
+        Release whatever is still held back at the end of the response.
+
+        Returns:
+            Remaining guarded text
+        """
+        return self._release(final=True)
+
+    def _release(self, final: bool) -> str:
+        """Check the buffer and release its guarded, complete prefix."""
+        if self.blocked:
+            return ""
+
+        buffer = self._buffer
+        if self.check_unsafe:
+            violations = self._check_unsafe_content(self._line + buffer)
+            if violations:
+                self.violations.extend(violations)
+                self.blocked = True
+                self._buffer = ""
+                return ""
+
+        cut = len(buffer) if final else self._safe_cut(buffer)
+        if cut <= 0:
+            return ""
+
+        if self.redact:
+            matches = phi_redactor.scan(buffer, cached=False)
+            for match in matches:
+                if match.start < cut < match.end:
+                    cut = match.start
+            released = self._splice(buffer, matches, cut)
+        else:
+            released = buffer[:cut]
+
+        raw = buffer[:cut]
+        newline = raw.rfind("\n")
+        line = raw[newline + 1:] if newline >= 0 else self._line + raw
+        self._line = line[-self.LINE_CONTEXT_CHARS:]
+        self._buffer = buffer[cut:]
+        return released
+
+    def _safe_cut(self, buffer: str) -> int:
+        """Last whitespace boundary at least HOLDBACK_CHARS before the end of the buffer."""
+        limit = len(buffer) - self.HOLDBACK_CHARS
+        if limit <= 0:
+            return 0
+
+        cut = max(buffer.rfind(" ", 0, limit), buffer.rfind("\n", 0, limit)) + 1
+        if cut <= 0 and len(buffer) > self.MAX_BUFFER_CHARS:
+            cut = limit
+        return cut
+
+    def _splice(self, buffer: str, matches: List[PHIMatch], cut: int) -> str:
+        """Rebuild buffer[:cut] with every match inside it replaced by its placeholder."""
+        parts = []
+        position = 0
+        for match in matches:
+            if match.end > cut:
+                break
+            parts.append(buffer[position:match.start])
+            parts.append(phi_redactor.placeholders[match.phi_type])
+            position = match.end
+            self.redactions += 1
+        parts.append(buffer[position:cut])
+        return "".join(parts)
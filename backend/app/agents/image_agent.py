@@ -4,7 +4,7 @@ Image Understanding Agent for symptom photo analysis using ONNX models.
 
 from typing import Dict, Any, Optional, List
 from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.mcp_clients import ModelMCPClient
+from app.mcp_clients import ModelMCPClient, get_mcp_registry
 
 
 class ImageAgent(BaseAgent):
@@ -13,10 +13,12 @@ class ImageAgent(BaseAgent):
     Uses ONNX models for classification and segmentation.
     """
 
+    side_effect_free = True
+
     def __init__(self, model_client: Optional[ModelMCPClient] = None):
         """Initialize image agent."""
         super().__init__("image_agent")
-        self.model_client = model_client or ModelMCPClient()
+        self.model_client = model_client or get_mcp_registry().model
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
@@ -4,7 +4,7 @@ Payment Gateway Agent for handling payments and billing.
 
 from typing import Dict, Any, Optional
 from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.mcp_clients import PaymentMCPClient
+from app.mcp_clients import PaymentMCPClient, get_mcp_registry
 
 
 class PaymentAgent(BaseAgent):
@@ -16,7 +16,7 @@ class PaymentAgent(BaseAgent):
     def __init__(self, payment_client: Optional[PaymentMCPClient] = None):
         """Initialize payment agent."""
         super().__init__("payment_agent")
-        self.payment_client = payment_client or PaymentMCPClient()
+        self.payment_client = payment_client or get_mcp_registry().payment
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
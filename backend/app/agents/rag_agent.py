@@ -2,22 +2,55 @@
 RAG (Retrieval-Augmented Generation) Agent for document retrieval and context assembly.
 """
 
-from typing import Dict, Any, List, Optional
-from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.mcp_clients import DocumentMCPClient
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+import asyncio
+import time
+from .base_agent import BaseAgent, AgentTask, AgentResult, AgentEvent
+from app.core.config import settings
+from app.mcp_clients import DocumentMCPClient, get_mcp_registry
+from app.services.answer_cache import SemanticAnswerCache, cache_scope
+from app.services.context_packer import ContextPacker, get_context_packer
+from app.services.reranker import Reranker
 
 
 class RAGAgent(BaseAgent):
     """
     RAG agent for retrieving relevant documents and assembling context.
-    Uses vector database for semantic search.
+    Uses vector database for semantic search. Final answers are cached by query
+    embedding (see SemanticAnswerCache), so repeated questions skip retrieval
+    and generation until the document set changes; only documents with a known
+    version (the local index) are cached. With RERANKER_ENABLED, extra
+    candidates are retrieved and reranked by a cross-encoder within a time budget.
     """
 
-    def __init__(self, document_client: Optional[DocumentMCPClient] = None):
-        """Initialize RAG agent."""
+    side_effect_free = True
+
+    def __init__(
+        self,
+        document_client: Optional[DocumentMCPClient] = None,
+        context_packer: Optional[ContextPacker] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        embedding_service: Optional[Any] = None,
+        reranker: Optional[Reranker] = None
+    ):
+        """
+        Initialize RAG agent.
+
+        Args:
+            document_client: Document search client (defaults to the registry's)
+            context_packer: Context packer (defaults to the global one)
+            answer_cache: Semantic answer cache (defaults to the global one when enabled)
+            embedding_service: Service embedding queries for the cache (defaults to the global one)
+            reranker: Cross-encoder reranker (defaults to the global one when enabled)
+        """
         super().__init__("rag_agent")
-        self.document_client = document_client or DocumentMCPClient()
-        self.max_context_tokens = 4000  # Maximum context size
+        self.document_client = document_client or get_mcp_registry().document
+        self.context_packer = context_packer or get_context_packer()
+        self.answer_cache = answer_cache
+        self.embedding_service = embedding_service
+        self._answer_cache_unavailable = False
+        self.reranker = reranker
+        self._reranker_unavailable = False
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
@@ -29,34 +62,72 @@ class RAGAgent(BaseAgent):
         Returns:
             RAG response with sources and provenance
         """
+        result = None
+        async for event in self.execute_stream(task):
+            if event.event == "result":
+                result = event.data
+        return result
+
+    async def execute_stream(self, task: AgentTask) -> AsyncIterator[AgentEvent]:
+        """
+        Execute RAG retrieval, streaming the sources as soon as they are retrieved
+        and then the answer as it is generated.
+
+        Args:
+            task: Agent task with query
+
+        Yields:
+            "sources", "chunk" and finally "result" events
+        """
         try:
+            start = time.perf_counter()
             query = task.query
             top_k = task.context.get("top_k", 5)
+            filters = task.context.get("filters")
+
+            # Answer repeated questions from the cache
+            lookup = await self._lookup_answer(query, filters, top_k)
+            if lookup is not None and lookup["hit"] is not None:
+                hit = lookup["hit"]
+                response, provenance, confidence = hit.value
+                self.logger.info("Answer cache hit", similarity=round(hit.similarity, 4), saved_ms=round(hit.saved_ms, 1))
+                yield AgentEvent("sources", provenance)
+                yield AgentEvent("chunk", response["answer"])
+                yield AgentEvent("result", self.create_success_result(
+                    task_id=task.task_id,
+                    response=response,
+                    confidence=confidence,
+                    provenance=provenance,
+                    metadata={"cache": {"similarity": hit.similarity, "saved_ms": hit.saved_ms}}
+                ))
+                return
 
-            # Retrieve relevant documents
-            self.logger.info("Retrieving documents", query=query, top_k=top_k)
+            # Retrieve relevant documents (extra candidates when reranking)
+            reranker = self._get_reranker()
+            candidates = max(top_k, settings.RERANKER_CANDIDATES) if reranker is not None else top_k
+            self.logger.info("Retrieving documents", query=query, top_k=top_k, candidates=candidates)
             documents = await self.document_client.search_documents(
                 query=query,
-                filters=task.context.get("filters"),
-                top_k=top_k
+                filters=filters,
+                top_k=candidates,
+                include_embeddings=True
             )
+            if reranker is not None:
+                documents = await reranker.rerank_async(query, documents, top_k)
 
             if not documents:
-                return self.create_success_result(
+                answer = "No relevant documents found for your query."
+                yield AgentEvent("chunk", answer)
+                yield AgentEvent("result", self.create_success_result(
                     task_id=task.task_id,
                     response={
-                        "answer": "No relevant documents found for your query.",
+                        "answer": answer,
                         "sources": [],
                         "confidence": 0.0
                     },
                     confidence=0.0
-                )
-
-            # Assemble context from retrieved documents
-            context = self._assemble_context(documents)
-
-            # Generate response (simplified - in production, call LLM via MCP)
-            answer = self._generate_answer(query, context, documents)
+                ))
+                return
 
             # Build provenance
             provenance = [
@@ -67,53 +138,147 @@ class RAGAgent(BaseAgent):
                 }
                 for doc in documents
             ]
+            yield AgentEvent("sources", provenance)
+
+            # Assemble context from retrieved documents (MMR over their stored vectors)
+            query_embedding = lookup["embedding"] if lookup is not None else None
+            context = await asyncio.to_thread(self._assemble_context, documents, query_embedding)
+            documents = [{key: value for key, value in doc.items() if key != "embedding"} for doc in documents]
+
+            # Generate response (simplified - in production, stream from an LLM via MCP)
+            answer_parts = []
+            for part in self._generate_answer_chunks(query, context, documents):
+                answer_parts.append(part)
+                yield AgentEvent("chunk", part)
+            answer = "".join(answer_parts)
 
-            return self.create_success_result(
+            response = {
+                "answer": answer,
+                "sources": documents,
+                "confidence": self._calculate_confidence(documents)
+            }
+            if lookup is not None:
+                lookup["cache"].put(
+                    lookup["embedding"], query, lookup["scope"],
+                    (response, provenance, response["confidence"]),
+                    cost_ms=(time.perf_counter() - start) * 1000,
+                    version=lookup["version"]
+                )
+
+            yield AgentEvent("result", self.create_success_result(
                 task_id=task.task_id,
-                response={
-                    "answer": answer,
-                    "sources": documents,
-                    "confidence": self._calculate_confidence(documents)
-                },
-                confidence=self._calculate_confidence(documents),
+                response=response,
+                confidence=response["confidence"],
                 provenance=provenance
-            )
+            ))
 
         except Exception as e:
             self.logger.error(f"RAG execution failed: {str(e)}")
-            return self.create_error_result(
+            yield AgentEvent("result", self.create_error_result(
                 task_id=task.task_id,
                 error=f"RAG agent failed: {str(e)}"
-            )
+            ))
 
-    def _assemble_context(self, documents: List[Dict[str, Any]]) -> str:
+    def _get_answer_cache(self) -> Optional[SemanticAnswerCache]:
+        """Get the answer cache, loading the global one (and the embedding service) on first use."""
+        if self._answer_cache_unavailable or not (settings.RAG_ANSWER_CACHE_ENABLED or self.answer_cache):
+            return None
+        try:
+            if self.answer_cache is None:
+                from app.services.answer_cache import get_answer_cache
+                self.answer_cache = get_answer_cache()
+            if self.embedding_service is None:
+                from app.services.embedding_service import get_embedding_service
+                self.embedding_service = get_embedding_service()
+        except Exception as e:
+            self.logger.warning(f"Answer cache unavailable: {str(e)}. Answering every query.")
+            self._answer_cache_unavailable = True
+            return None
+        return self.answer_cache
+
+    def _get_reranker(self) -> Optional[Reranker]:
+        """Get the reranker, loading the global one on first use."""
+        if self.reranker is None and settings.RERANKER_ENABLED and not self._reranker_unavailable:
+            try:
+                from app.services.reranker import get_reranker
+                self.reranker = get_reranker()
+            except Exception as e:
+                self.logger.warning(f"Reranker unavailable: {str(e)}. Using retrieval order.")
+                self._reranker_unavailable = True
+        return self.reranker
+
+    async def _lookup_answer(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]],
+        top_k: int
+    ) -> Optional[Dict[str, Any]]:
         """
-        Assemble context from retrieved documents.
+        Look up a cached answer to the query.
 
         Args:
-            documents: List of retrieved documents
+            query: User query
+            filters: Retrieval filters
+            top_k: Number of documents to retrieve
 
         Returns:
-            Assembled context string
+            Cache, query embedding, scope, document-set version and hit (None on
+            a miss), or None when the cache is not in use (including when the
+            document client reports no document-set version)
         """
-        context_parts = []
-        total_length = 0
-        max_length = self.max_context_tokens * 4  # Approximate characters
+        if self._answer_cache_unavailable or not (settings.RAG_ANSWER_CACHE_ENABLED or self.answer_cache):
+            return None
+        try:
+            # Without a document-set version, ingestion could not invalidate answers
+            # (checked first, so the cache and its embedding model are never loaded)
+            version = self.document_client.document_set_version()
+        except Exception as e:
+            self.logger.warning(f"Answer cache lookup failed: {str(e)}")
+            return None
+        cache = self._get_answer_cache() if version is not None else None
+        if cache is None:
+            return None
+        try:
+            embedding = await self.embedding_service.encode_single_async(query)
+            scope = cache_scope(filters, top_k)
+        except Exception as e:
+            self.logger.warning(f"Answer cache lookup failed: {str(e)}")
+            return None
+        return {
+            "cache": cache,
+            "embedding": embedding,
+            "scope": scope,
+            "version": version,
+            "hit": cache.get(embedding, query, scope, version)
+        }
 
-        for doc in documents:
-            content = doc.get("content", "")
-            if total_length + len(content) > max_length:
-                # Truncate if exceeds max length
-                remaining = max_length - total_length
-                content = content[:remaining] + "..."
+    def _assemble_context(
+        self,
+        documents: List[Dict[str, Any]],
+        query_embedding: Optional[Any] = None
+    ) -> str:
+        """
+        Assemble context from retrieved documents.
 
-            context_parts.append(f"[{doc.get('title', 'Untitled')}]\n{content}\n")
-            total_length += len(content)
+        Near-duplicate documents are dropped and the rest packed into the token
+        budget (see ContextPacker).
 
-            if total_length >= max_length:
-                break
+        Args:
+            documents: List of retrieved documents
+            query_embedding: Optional query embedding for MMR relevance
 
-        return "\n---\n".join(context_parts)
+        Returns:
+            Assembled context string
+        """
+        packed = self.context_packer.pack(documents, query_embedding)
+        self.logger.info(
+            "Assembled context",
+            tokens=packed.tokens,
+            documents=len(packed.documents),
+            duplicates=packed.duplicates,
+            truncated=packed.truncated
+        )
+        return packed.text
 
     def _generate_answer(
         self,
@@ -134,17 +299,39 @@ class RAGAgent(BaseAgent):
         Returns:
             Generated answer
         """
+        return "".join(self._generate_answer_chunks(query, context, documents))
+
+    def _generate_answer_chunks(
+        self,
+        query: str,
+        context: str,
+        documents: List[Dict[str, Any]]
+    ) -> Iterator[str]:
+        """
+        Generate the answer progressively (simplified implementation).
+
+        In production, this would yield tokens streamed from an LLM via MCP.
+
+        Args:
+            query: User query
+            context: Assembled context
+            documents: Retrieved documents
+
+        Yields:
+            Consecutive answer fragments
+        """
         # Simplified answer generation
-        # In production: call LLM with prompt template
+        # In production: stream LLM output for the prompt template
         if not documents:
-            return "I couldn't find relevant information to answer your question."
+            yield "I couldn't find relevant information to answer your question."
+            return
 
-        return (
-            f"Based on {len(documents)} relevant documents, I found information related to your query. "
+        yield f"Based on {len(documents)} relevant documents, I found information related to your query. "
+        yield (
             f"The most relevant document is '{documents[0].get('title', 'Untitled')}' "
             f"with a relevance score of {documents[0].get('score', 0):.2f}. "
-            f"[In production, this would be a comprehensive LLM-generated answer using the retrieved context.]"
         )
+        yield "[In production, this would be a comprehensive LLM-generated answer using the retrieved context.]"
 
     def _calculate_confidence(self, documents: List[Dict[str, Any]]) -> float:
         """
@@ -159,6 +346,6 @@ class RAGAgent(BaseAgent):
         if not documents:
             return 0.0
 
-        # Use average of top 3 document scores
-        top_scores = [doc.get("score", 0) for doc in documents[:3]]
+        # Use average of top 3 document scores (cross-encoder relevance when reranked)
+        top_scores = [doc.get("rerank_score", doc.get("score", 0)) for doc in documents[:3]]
         return sum(top_scores) / len(top_scores) if top_scores else 0.5
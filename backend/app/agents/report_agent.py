@@ -4,7 +4,7 @@ Report Understanding Agent for extracting data from PDFs and clinical reports us
 
 from typing import Dict, Any, Optional, List
 from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.mcp_clients import DocumentMCPClient
+from app.mcp_clients import DocumentMCPClient, get_mcp_registry
 
 
 class ReportAgent(BaseAgent):
@@ -13,10 +13,12 @@ class ReportAgent(BaseAgent):
     Uses OCR and LLM-assisted extraction.
     """
 
+    side_effect_free = True
+
     def __init__(self, document_client: Optional[DocumentMCPClient] = None):
         """Initialize report agent."""
         super().__init__("report_agent")
-        self.document_client = document_client or DocumentMCPClient()
+        self.document_client = document_client or get_mcp_registry().document
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
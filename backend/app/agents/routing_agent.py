@@ -2,20 +2,179 @@
 Routing Agent - Classifies user intent and dispatches to appropriate specialist agents.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import re
 from .base_agent import BaseAgent, AgentTask, AgentResult
+from app.core.config import settings
+
+# Regex metacharacters that end a pattern's leading literal
+_REGEX_META = set(".^$*+?{}[]\\|()")
+_QUANTIFIERS = set("*+?{")
+
+
+class RuleRouter:
+    """
+    Compiled rule table that finds every matching agent in a single scan.
+
+    The leading literal of each pattern is folded into one compiled alternation used
+    as a keyword prefilter; a full pattern is only evaluated, anchored, at positions
+    where its literal occurs. Scan cost depends on the query, not the number of rules.
+    """
+
+    def __init__(self, rules: Dict[str, List[str]], confidence: float = 0.9):
+        """
+        Compile the rule table.
+
+        Args:
+            rules: Mapping of agent name to regex patterns
+            confidence: Confidence assigned to rule matches
+        """
+        self.confidence = confidence
+        self.agent_order = {agent: i for i, agent in enumerate(rules)}
+
+        # literal -> [(agent, pattern, compiled)] for prefilterable rules
+        by_literal: Dict[str, List[Tuple[str, str, re.Pattern]]] = {}
+        # Rules without a usable leading literal are searched directly
+        self.unanchored: List[Tuple[str, str, re.Pattern]] = []
+
+        for agent, patterns in rules.items():
+            for pattern in patterns:
+                rule = (agent, pattern, re.compile(pattern, re.IGNORECASE))
+                literal = self._leading_literal(pattern)
+                if literal:
+                    by_literal.setdefault(literal, []).append(rule)
+                else:
+                    self.unanchored.append(rule)
+
+        # Any literal matching at a position is a prefix of the longest one that
+        # matches there, so each literal maps to the rules of all its prefixes.
+        self.candidates = {
+            literal: [
+                rule
+                for other, other_rules in by_literal.items() if literal.startswith(other)
+                for rule in other_rules
+            ]
+            for literal in by_literal
+        }
+
+        if by_literal:
+            # Case-sensitive over the lowercased query: IGNORECASE disables the
+            # first-character scan optimization of the regex engine
+            self.prefilter = re.compile(self._trie_pattern(list(by_literal)))
+        else:
+            self.prefilter = None
+
+    @staticmethod
+    def _trie_pattern(literals: List[str]) -> str:
+        """
+        Build a prefix-factored alternation of literals (longest match first).
+
+        Factoring shared prefixes keeps per-position cost flat as literals are added.
+        """
+        trie: Dict[str, Any] = {}
+        for literal in literals:
+            node = trie
+            for char in literal:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict[str, Any]) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if "" in node:
+                # Literal ends here; prefer the longer continuation
+                return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+            return body
+
+        return build(trie)
+
+    @staticmethod
+    def _leading_literal(pattern: str) -> str:
+        """Extract the literal text every match of the pattern must start with."""
+        # A top-level alternation has no common leading literal
+        depth = 0
+        escaped = False
+        for char in pattern:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char in "([":
+                depth += 1
+            elif char in ")]":
+                depth -= 1
+            elif char == "|" and depth == 0:
+                return ""
+
+        literal = []
+        for char in pattern:
+            if char in _REGEX_META:
+                # A quantifier makes the preceding character optional
+                if char in _QUANTIFIERS and literal:
+                    literal.pop()
+                break
+            literal.append(char)
+        return "".join(literal).lower()
+
+    def match(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Find every agent with a matching rule.
+
+        Args:
+            query: User query
+
+        Returns:
+            List of matching agents (in rule-table order) with confidence scores
+        """
+        found: Dict[str, str] = {}
+        query = query.lower()
+
+        if self.prefilter is not None:
+            hit = self.prefilter.search(query)
+            while hit is not None:
+                position = hit.start()
+                for agent, pattern, compiled in self.candidates[hit.group()]:
+                    if agent not in found and compiled.match(query, position):
+                        found[agent] = pattern
+                if len(found) == len(self.agent_order):
+                    break
+                # Resume one character later so overlapping keywords are still seen
+                hit = self.prefilter.search(query, position + 1)
+
+        for agent, pattern, compiled in self.unanchored:
+            if agent not in found and compiled.search(query):
+                found[agent] = pattern
+
+        return [
+            {
+                "agent": agent,
+                "pattern": found[agent],
+                "confidence": self.confidence  # High confidence for rule-based matches
+            }
+            for agent in sorted(found, key=self.agent_order.get)
+        ]
 
 
 class RoutingAgent(BaseAgent):
     """
     Routing agent that classifies user queries and routes them to specialist agents.
-    Uses rule-based classification with LLM fallback for ambiguous cases.
+    Uses rule-based classification, then an embedding-based semantic router,
+    with RAG as the fallback for ambiguous cases.
     """
 
-    def __init__(self):
-        """Initialize routing agent."""
+    def __init__(self, semantic_router: Optional[Any] = None):
+        """
+        Initialize routing agent.
+
+        Args:
+            semantic_router: Optional semantic router (defaults to the global one when enabled)
+        """
         super().__init__("routing_agent")
+        self.semantic_router = semantic_router
+        self._semantic_router_unavailable = False
 
         # Define routing rules
         self.routing_rules = {
@@ -73,46 +232,127 @@ class RoutingAgent(BaseAgent):
             ]
         }
 
+        # Compile the rule table once
+        self.rule_router = RuleRouter(self.routing_rules)
+
     async def execute(self, task: AgentTask) -> AgentResult:
         """
         Execute routing classification.
 
+        A decision already computed by the caller (task metadata
+        "routing_decision", e.g. from ChatPipeline) is used as is.
+
         Args:
             task: Agent task with query
 
         Returns:
             Routing decision with target agent and confidence
         """
-        query = task.query.lower()
-
-        # Try rule-based classification first
-        matches = self._rule_based_classification(query)
+        decision = (task.metadata or {}).get("routing_decision")
+        if decision is None:
+            decision = await self.predict_async(task.query)
 
-        if matches:
-            # Get best match
-            best_match = max(matches, key=lambda x: x["confidence"])
-
-            return self.create_success_result(
-                task_id=task.task_id,
-                response={
-                    "target_agent": best_match["agent"],
-                    "confidence": best_match["confidence"],
-                    "reasoning": f"Matched pattern: {best_match['pattern']}"
-                },
-                confidence=best_match["confidence"]
-            )
-
-        # Fallback to default RAG agent for general queries
         return self.create_success_result(
             task_id=task.task_id,
-            response={
-                "target_agent": "rag",
-                "confidence": 0.5,
-                "reasoning": "No specific pattern matched, routing to RAG agent for general query"
-            },
-            confidence=0.5
+            response=decision,
+            confidence=decision["confidence"]
         )
 
+    def predict(self, query: str) -> Dict[str, Any]:
+        """
+        Compute the routing decision for a query without audit overhead.
+
+        Semantic routing encodes the query on the calling thread; use
+        predict_async from the event loop.
+
+        Args:
+            query: User query
+
+        Returns:
+            Routing decision with target agent, confidence and reasoning
+        """
+        decision = self._rule_decision(query)
+        if decision is not None:
+            return decision
+
+        # Then the embedding-based semantic router
+        semantic_router = self._get_semantic_router()
+        if semantic_router is not None:
+            try:
+                decision = semantic_router.classify(query)
+            except Exception as e:
+                self.logger.error(f"Semantic routing failed: {str(e)}")
+
+        return decision or self._fallback_decision()
+
+    async def predict_async(self, query: str) -> Dict[str, Any]:
+        """
+        Compute the routing decision for a query without blocking the event loop.
+
+        Rules are matched inline; the semantic router is loaded and the query
+        encoded off the loop.
+
+        Args:
+            query: User query
+
+        Returns:
+            Routing decision with target agent, confidence and reasoning
+        """
+        decision = self._rule_decision(query)
+        if decision is not None:
+            return decision
+
+        semantic_router = self.semantic_router
+        if semantic_router is None:
+            semantic_router = await asyncio.to_thread(self._get_semantic_router)
+        if semantic_router is not None:
+            try:
+                decision = await semantic_router.classify_async(query)
+            except Exception as e:
+                self.logger.error(f"Semantic routing failed: {str(e)}")
+
+        return decision or self._fallback_decision()
+
+    def _rule_decision(self, query: str) -> Optional[Dict[str, Any]]:
+        """Routing decision from the best matching rule, if any."""
+        matches = self._rule_based_classification(query.lower())
+        if not matches:
+            return None
+
+        # Get best match
+        best_match = max(matches, key=lambda x: x["confidence"])
+
+        return {
+            "target_agent": best_match["agent"],
+            "confidence": best_match["confidence"],
+            "reasoning": f"Matched pattern: {best_match['pattern']}"
+        }
+
+    @staticmethod
+    def _fallback_decision() -> Dict[str, Any]:
+        """Default RAG routing for general queries."""
+        return {
+            "target_agent": "rag",
+            "confidence": 0.5,
+            "reasoning": "No specific pattern matched, routing to RAG agent for general query"
+        }
+
+    def _get_semantic_router(self) -> Optional[Any]:
+        """Get the semantic router, loading the global one on first use."""
+        if (
+            self.semantic_router is None
+            and settings.SEMANTIC_ROUTING_ENABLED
+            and not self._semantic_router_unavailable
+        ):
+            try:
+                from app.services.semantic_router import get_semantic_router
+                self.semantic_router = get_semantic_router()
+            except Exception as e:
+                self.logger.warning(f"Semantic routing unavailable: {str(e)}. Using rule-based routing only.")
+                self._semantic_router_unavailable = True
+
+        return self.semantic_router
+
     def _rule_based_classification(self, query: str) -> List[Dict[str, Any]]:
         """
         Classify query using rule-based patterns.
@@ -123,19 +363,7 @@ class RoutingAgent(BaseAgent):
         Returns:
             List of matching agents with confidence scores
         """
-        matches = []
-
-        for agent_name, patterns in self.routing_rules.items():
-            for pattern in patterns:
-                if re.search(pattern, query, re.IGNORECASE):
-                    matches.append({
-                        "agent": agent_name,
-                        "pattern": pattern,
-                        "confidence": 0.9  # High confidence for rule-based matches
-                    })
-                    break  # Only count first match per agent
-
-        return matches
+        return self.rule_router.match(query)
 
     def get_available_agents(self) -> List[str]:
         """
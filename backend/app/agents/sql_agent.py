@@ -4,7 +4,7 @@ SQL Agent for safe, parameterized database queries.
 
 from typing import Dict, Any, Optional
 from .base_agent import BaseAgent, AgentTask, AgentResult
-from app.mcp_clients import DatabaseMCPClient
+from app.mcp_clients import DatabaseMCPClient, get_mcp_registry
 
 
 class SQLAgent(BaseAgent):
@@ -13,10 +13,12 @@ class SQLAgent(BaseAgent):
     Always uses parameterized queries and read-only mode by default.
     """
 
+    side_effect_free = True
+
     def __init__(self, db_client: Optional[DatabaseMCPClient] = None):
         """Initialize SQL agent."""
         super().__init__("sql_agent")
-        self.db_client = db_client or DatabaseMCPClient()
+        self.db_client = db_client or get_mcp_registry().database
 
     async def execute(self, task: AgentTask) -> AgentResult:
         """
@@ -3,7 +3,9 @@ Agent orchestration routes.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator
+import json
 import uuid
 
 from app.db.schemas import AgentRequest, AgentResponse
@@ -18,7 +20,10 @@ from app.agents import (
     ReportAgent,
     PrescriptionAgent,
     GuardrailAgent,
-    AuditAgent
+    AuditAgent,
+    ChatPipeline,
+    PipelineError,
+    PipelineTimeoutError
 )
 from app.core.logger import get_logger
 
@@ -53,17 +58,46 @@ AGENTS = {
     "audit": audit_agent
 }
 
+# Chat pipeline executor
+chat_pipeline = ChatPipeline(
+    routing_agent=routing_agent,
+    guardrail_agent=guardrail_agent,
+    agents=AGENTS
+)
+
+
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format pipeline events as server-sent events."""
+    async for event in events:
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+
+def _streaming_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Wrap pipeline events in an SSE response that proxies do not buffer."""
+    return StreamingResponse(
+        _sse_events(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.post("/chat", response_model=AgentResponse)
 async def chat(
     request: AgentRequest,
+    stream: bool = False,
     user_id: int = Depends(get_current_user_id)
 ):
     """
     General chat endpoint with automatic agent routing.
 
+    With stream=true the response is a server-sent event stream: the routing
+    decision, retrieved sources and guarded answer chunks as they are produced,
+    then the final guardrail verdict (see ChatPipeline.stream). Clients must
+    discard the streamed answer if the verdict has should_block set.
+
     Args:
         request: Agent request with query
+        stream: Stream the response as server-sent events
         user_id: Current user ID
 
     Returns:
@@ -71,48 +105,31 @@ async def chat(
     """
     session_id = request.session_id or str(uuid.uuid4())
 
-    # First, route the query
-    routing_task = {
-        "query": request.query,
-        "context": request.context or {},
-        "session_id": session_id,
-        "user_id": user_id
-    }
-
-    routing_result = await routing_agent.run(routing_task)
-
-    if not routing_result.success:
+    if stream:
+        return _streaming_response(chat_pipeline.stream(
+            query=request.query,
+            context=request.context or {},
+            session_id=session_id,
+            user_id=user_id
+        ))
+
+    # Route, execute the target agent and apply guardrails
+    try:
+        pipeline_result = await chat_pipeline.run(
+            query=request.query,
+            context=request.context or {},
+            session_id=session_id,
+            user_id=user_id
+        )
+    except PipelineTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except PipelineError:
         raise HTTPException(status_code=500, detail="Routing failed")
 
-    # Get target agent
-    target_agent_name = routing_result.response.get("target_agent")
-    target_agent = AGENTS.get(target_agent_name)
-
-    if not target_agent:
-        # Fallback to RAG agent
-        target_agent = rag_agent
-        target_agent_name = "rag"
-
-    # Execute target agent
-    agent_task = {
-        "query": request.query,
-        "context": request.context or {},
-        "session_id": session_id,
-        "user_id": user_id
-    }
-
-    result = await target_agent.run(agent_task)
-
-    # Apply guardrails
-    guardrail_result = await guardrail_agent.run({
-        "query": "validate",
-        "context": {
-            "content": str(result.response),
-            "source_agent": target_agent_name
-        },
-        "session_id": session_id,
-        "user_id": user_id
-    })
+    target_agent_name = pipeline_result.target_agent_name
+    routing_result = pipeline_result.routing_result
+    result = pipeline_result.result
+    guardrail_result = pipeline_result.guardrail_result
 
     # Use redacted content if guardrails applied
     if guardrail_result.success and not guardrail_result.response.get("should_block"):
@@ -127,7 +144,9 @@ async def chat(
         provenance=result.provenance,
         metadata={
             "routing_confidence": routing_result.confidence,
-            "guardrails_applied": len(guardrail_result.response.get("violations", []))
+            "guardrails_applied": len(guardrail_result.response.get("violations", [])),
+            "input_violations": len(pipeline_result.input_violations),
+            "speculative_execution": pipeline_result.speculative
         }
     )
 
@@ -136,14 +155,19 @@ async def chat(
 async def call_agent(
     agent_name: str,
     request: AgentRequest,
+    stream: bool = False,
     user_id: int = Depends(get_current_user_id)
 ):
     """
     Call a specific agent directly.
 
+    With stream=true the response is a server-sent event stream of the agent's
+    sources and guarded answer chunks, ending with the guardrail verdict.
+
     Args:
         agent_name: Name of the agent to call
         request: Agent request
+        stream: Stream the response as server-sent events
         user_id: Current user ID
 
     Returns:
@@ -155,6 +179,15 @@ async def call_agent(
 
     session_id = request.session_id or str(uuid.uuid4())
 
+    if stream:
+        return _streaming_response(chat_pipeline.stream(
+            query=request.query,
+            context=request.context or {},
+            session_id=session_id,
+            user_id=user_id,
+            agent_name=agent_name
+        ))
+
     agent_task = {
         "query": request.query,
         "context": request.context or {},
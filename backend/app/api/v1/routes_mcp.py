@@ -6,24 +6,19 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any
 
 from app.api.v1.routes_auth import get_current_user_id
-from app.mcp_clients import (
-    DocumentMCPClient,
-    DatabaseMCPClient,
-    ModelMCPClient,
-    PaymentMCPClient,
-    NotificationMCPClient
-)
+from app.mcp_clients import get_connection_pool, get_mcp_registry
 from app.core.logger import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
-# Initialize MCP clients
-document_client = DocumentMCPClient()
-db_client = DatabaseMCPClient()
-model_client = ModelMCPClient()
-payment_client = PaymentMCPClient()
-notification_client = NotificationMCPClient()
+# Resolve shared MCP clients
+mcp_registry = get_mcp_registry()
+document_client = mcp_registry.document
+db_client = mcp_registry.database
+model_client = mcp_registry.model
+payment_client = mcp_registry.payment
+notification_client = mcp_registry.notification
 
 
 @router.get("/status")
@@ -41,10 +36,17 @@ async def mcp_status():
             "model",
             "payment",
             "notification"
-        ]
+        ],
+        "connection_pool": get_connection_pool().stats()
     }
 
 
+@router.get("/metrics")
+async def mcp_metrics():
+    """Get per-tool latency/error counters and concurrency limits."""
+    return mcp_registry.metrics()
+
+
 @router.post("/document/search")
 async def search_documents(
     query: str,
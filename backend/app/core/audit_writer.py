@@ -0,0 +1,519 @@
+"""
+Asynchronous, batched audit-log writer.
+
+Audit events are queued in memory by the request path and written by a background
+thread in batches. Redaction, serialization and disk I/O all happen off the request
+path, including for entries that overflow the queue. An entry is acknowledged once
+its batch has been written to every sink and synced according to the fsync policy,
+or once it has been synced to the spill file; a batch a sink rejects is spilled and
+moved into the sinks later.
+"""
+
+from typing import Any, Deque, Dict, List, Optional, Callable
+from collections import deque
+from pathlib import Path
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+import structlog
+from .config import settings
+from .security import redact_phi, redact_phi_dict
+
+# Entry fields that may carry PHI and are redacted before anything is persisted
+REDACTED_FIELDS = ("input", "output", "prompt", "response", "context")
+
+logger = structlog.get_logger(__name__)
+
+
+class OverflowPolicy:
+    """Queue overflow policy constants."""
+    BLOCK = "block"  # wait for room in the queue (submit_async waits off the event loop)
+    SPILL = "spill"  # hand overflow to the writer thread to sync to the spill file, or spill it when that backs up
+    DROP = "drop"
+
+
+class FsyncPolicy:
+    """Fsync policy constants."""
+    BATCH = "batch"  # fsync after every batch
+    INTERVAL = "interval"  # fsync at most every AUDIT_FSYNC_INTERVAL_SECONDS
+    NONE = "none"  # leave flushing to the OS
+
+
+def redact_audit_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Redact PHI from the free-text fields of an audit entry.
+
+    Args:
+        entry: Raw audit entry
+
+    Returns:
+        Entry safe to persist
+    """
+    if not any(field in entry for field in REDACTED_FIELDS):
+        return entry
+
+    redacted = dict(entry)
+    for field in REDACTED_FIELDS:
+        value = redacted.get(field)
+        if isinstance(value, dict):
+            redacted[field] = redact_phi_dict(value)
+        elif isinstance(value, str):
+            redacted[field] = redact_phi(value)
+    return redacted
+
+
+class FileAuditSink:
+    """Append-only JSON-lines audit file."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the file sink.
+
+        Args:
+            path: Audit log file path
+        """
+        self.path = Path(path)
+        self._file = None
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "ab")
+        return self._file
+
+    def write(self, entries: List[Dict[str, Any]]):
+        """Append entries as JSON lines."""
+        data = b"".join(json.dumps(entry, default=str).encode("utf-8") + b"\n" for entry in entries)
+        audit_file = self._open()
+        audit_file.write(data)
+        audit_file.flush()
+
+    def sync(self):
+        """Flush written entries to stable storage."""
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Close the audit file."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+class AuditWriter:
+    """
+    Bounded in-memory queue of audit events drained by a background writer thread.
+
+    Both the queue and the spill handoff hold at most queue_size entries. Overflow
+    is handed to the writer thread, which syncs it to the spill file before its next
+    batch; only when that handoff is full too, or under the block policy, does the
+    submitter wait or do I/O itself. submit_async does that part in an executor
+    thread, so it is what coroutines use.
+    """
+
+    def __init__(
+        self,
+        sinks: List[Any],
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        fsync_policy: Optional[str] = None,
+        fsync_interval_seconds: Optional[float] = None,
+        overflow_policy: Optional[str] = None,
+        spill_path: Optional[str] = None,
+        redact: Callable[[Dict[str, Any]], Dict[str, Any]] = redact_audit_entry
+    ):
+        """
+        Initialize the audit writer (the writer thread starts on first use).
+
+        Args:
+            sinks: Destinations receiving redacted batches (write/sync/close)
+            queue_size: Maximum number of queued entries
+            batch_size: Maximum entries written per batch
+            flush_interval_ms: Maximum time a partial batch waits before being written
+            fsync_policy: One of FsyncPolicy
+            fsync_interval_seconds: Sync interval for FsyncPolicy.INTERVAL
+            overflow_policy: One of OverflowPolicy
+            spill_path: File receiving entries that overflow the queue
+            redact: Function redacting an entry before it is persisted
+        """
+        self.sinks = sinks
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.AUDIT_FLUSH_INTERVAL_MS) / 1000
+        self.fsync_policy = fsync_policy or settings.AUDIT_FSYNC_POLICY
+        self.fsync_interval = fsync_interval_seconds or settings.AUDIT_FSYNC_INTERVAL_SECONDS
+        self.overflow_policy = overflow_policy or settings.AUDIT_OVERFLOW_POLICY
+        self.spill_sink = FileAuditSink(spill_path or settings.AUDIT_SPILL_PATH)
+        self.redact = redact
+
+        self.queue_size = queue_size or settings.AUDIT_QUEUE_SIZE
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=self.queue_size)
+        self._overflow: Deque[Dict[str, Any]] = deque()  # entries to spill, handed to the writer thread
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._failed: Deque[Dict[str, Any]] = deque()  # redacted records no destination accepted yet
+        self._last_sync = time.monotonic()
+        self._unsynced: List[Dict[str, Any]] = []  # written records awaiting a sync
+        self._spill_pending = False
+
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.acknowledged = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the writer thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Recover spilled entries and start the writer thread."""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            try:
+                self._recover_spill()
+            except Exception as e:
+                # The writer thread retries while the spill file is pending
+                self._spill_pending = True
+                logger.error(f"Audit writer failed to recover spilled entries: {str(e)}")
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def add_sink(self, sink: Any):
+        """
+        Register an additional sink for subsequent batches.
+
+        Args:
+            sink: Destination implementing write/sync/close
+        """
+        with self._io_lock:
+            self.sinks = self.sinks + [sink]
+
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """
+        Queue an audit entry, waiting for room (block) or spilling it (spill) when full.
+
+        Coroutines use submit_async, which never waits on the event loop.
+
+        Args:
+            entry: Raw (unredacted) audit entry
+
+        Returns:
+            False if the entry was dropped
+        """
+        accepted = self._offer(entry)
+        if accepted is None:
+            return self._submit_overflow(entry)
+        return accepted
+
+    async def submit_async(self, entry: Dict[str, Any]) -> bool:
+        """
+        Queue an audit entry, waiting for room or spilling it in an executor thread.
+
+        Args:
+            entry: Raw (unredacted) audit entry
+
+        Returns:
+            False if the entry was dropped
+        """
+        accepted = self._offer(entry)
+        if accepted is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self._submit_overflow, entry)
+        return accepted
+
+    def _offer(self, entry: Dict[str, Any]) -> Optional[bool]:
+        """
+        Queue or hand off an entry without blocking.
+
+        Returns:
+            Whether the entry was accepted, or None if the overflow policy has to wait or do I/O
+        """
+        if not self.running:
+            self.start()
+
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            if self.overflow_policy == OverflowPolicy.SPILL:
+                if len(self._overflow) < self.queue_size:
+                    self._overflow.append(entry)
+                    return True
+                return None
+            if self.overflow_policy == OverflowPolicy.BLOCK:
+                return None
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    def _submit_overflow(self, entry: Dict[str, Any]) -> bool:
+        """Spill an entry the queue and handoff have no room for, or wait for room in the queue."""
+        if self.overflow_policy == OverflowPolicy.SPILL and self._spill(self._redact_batch([entry])):
+            return True
+        return self._put_blocking(entry)
+
+    def _put_blocking(self, entry: Dict[str, Any]) -> bool:
+        """Wait for room in the queue; spill the entry instead if the writer thread stops."""
+        while True:
+            try:
+                self._queue.put(entry, timeout=self.flush_interval)
+            except queue.Full:
+                if self.running:
+                    continue
+                if self._spill(self._redact_batch([entry])):
+                    return True
+                self.dropped += 1
+                return False
+            self.enqueued += 1
+            return True
+
+    def _spill_overflow(self):
+        """Durably write the entries that overflowed the queue to the spill file (writer thread)."""
+        entries = []
+        while self._overflow:
+            entries.append(self._overflow.popleft())
+        if entries:
+            self._store(self._redact_batch(entries))
+
+    def _retry_failed(self):
+        """Persist records that could not be spilled earlier: spill file first, then the sinks (writer thread)."""
+        records = []
+        while self._failed:
+            records.append(self._failed.popleft())
+        if not records or self._spill(records):
+            return
+        if self._write_sinks(records):
+            self._sync_per_policy()
+        else:
+            self._failed.extend(records)
+
+    def _spill(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        Write and sync redacted records to the spill file.
+
+        Returns:
+            True if the records are durable (and acknowledged)
+        """
+        try:
+            with self._spill_lock:
+                self.spill_sink.write(records)
+                self.spill_sink.sync()
+                self._spill_pending = True
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Audit writer failed to spill {len(records)} entries: {str(e)}")
+            return False
+        with self._io_lock:
+            self.spilled += len(records)
+            self.acknowledged += len(records)
+        return True
+
+    def _store(self, records: List[Dict[str, Any]]):
+        """Spill records the sinks did not take, keeping them for a retry if that fails too."""
+        if not self._spill(records):
+            self._failed.extend(records)
+
+    def _recover_spill(self):
+        """Move spilled entries (including ones left by a crash) into the sinks."""
+        path = self.spill_sink.path
+        if not path.exists() or path.stat().st_size == 0:
+            return
+
+        with self._spill_lock:
+            self.spill_sink.close()
+            with open(path, "rb") as spill_file:
+                entries = [json.loads(line) for line in spill_file if line.strip()]
+            if entries:
+                with self._io_lock:
+                    for sink in self.sinks:
+                        sink.write(entries)
+                        sink.sync()
+            # Only now are the entries safe in every sink; until then the file is kept for a retry
+            path.unlink()
+            self._spill_pending = False
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for the next entry, then take up to batch_size queued entries."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Writer thread loop."""
+        while not (self._stop.is_set() and self._queue.empty() and not self._overflow and not self._failed):
+            if self._overflow:
+                self._spill_overflow()
+            if self._failed:
+                self._retry_failed()
+
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+                continue
+
+            # Idle: catch up on deferred work
+            if self._unsynced and self.fsync_policy == FsyncPolicy.INTERVAL:
+                self._sync()
+            if self._spill_pending:
+                try:
+                    self._recover_spill()
+                except Exception as e:
+                    logger.error(f"Audit writer failed to recover spilled entries: {str(e)}")
+
+        self._sync()
+
+    def _redact_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Redact each entry; an entry that fails keeps its event without the free-text fields."""
+        records = []
+        for entry in batch:
+            try:
+                records.append(self.redact(entry))
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Audit writer failed to redact an entry: {str(e)}")
+                record = {key: value for key, value in entry.items() if key not in REDACTED_FIELDS}
+                record["redaction_failed"] = True
+                records.append(record)
+        return records
+
+    def _write_sinks(self, records: List[Dict[str, Any]]) -> bool:
+        """
+        Write redacted records to every sink.
+
+        Returns:
+            True if every sink took the records (they are then counted as written, not yet synced)
+        """
+        with self._io_lock:
+            failed = False
+            for sink in self.sinks:
+                # A failing sink must not keep the batch from the others
+                try:
+                    sink.write(records)
+                except Exception as e:
+                    failed = True
+                    self.errors += 1
+                    logger.error(f"Audit sink {type(sink).__name__} failed to write {len(records)} entries: {str(e)}")
+            if failed:
+                return False
+            self.written += len(records)
+            self.batches += 1
+            self._unsynced.extend(records)
+            return True
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        """Redact, write and (per policy) sync one batch; a batch some sink rejected is spilled instead."""
+        try:
+            records = self._redact_batch(batch)
+            if self._write_sinks(records):
+                self._sync_per_policy()
+            else:
+                self._store(records)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _sync_per_policy(self):
+        """Sync (or, without fsync, acknowledge) written records as the fsync policy requires."""
+        if self.fsync_policy == FsyncPolicy.BATCH:
+            self._sync()
+        elif self.fsync_policy == FsyncPolicy.INTERVAL:
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+        else:
+            with self._io_lock:
+                self.acknowledged += len(self._unsynced)
+                self._unsynced = []
+
+    def _sync(self):
+        """Sync all sinks and acknowledge the records written so far; spill them if a sync fails."""
+        failed = False
+        with self._io_lock:
+            records, self._unsynced = self._unsynced, []
+            for sink in self.sinks:
+                try:
+                    sink.sync()
+                except Exception as e:
+                    failed = True
+                    self.errors += 1
+                    logger.error(f"Audit sink {type(sink).__name__} failed to sync: {str(e)}")
+            self._last_sync = time.monotonic()
+            if not failed:
+                self.acknowledged += len(records)
+        if failed and records:
+            self._store(records)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every entry queued so far is written and synced.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks or self._overflow or self._failed:
+            if not self.running or (deadline is not None and time.monotonic() > deadline):
+                return False
+            time.sleep(0.001)
+
+        self._sync()
+        return True
+
+    def shutdown(self, timeout: Optional[float] = 10.0):
+        """Drain the queue, sync and stop the writer thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._io_lock:
+            for sink in self.sinks:
+                sink.close()
+        self.spill_sink.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Queue depth and counters
+        """
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "spill_backlog": len(self._overflow),
+            "retry_backlog": len(self._failed),
+            "overflow_policy": self.overflow_policy,
+            "fsync_policy": self.fsync_policy,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "acknowledged": self.acknowledged,
+            "spilled": self.spilled,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "errors": self.errors
+        }
@@ -3,7 +3,7 @@ Configuration management for MediSense-AI.
 Loads settings from environment variables with validation.
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator
 
@@ -38,13 +38,77 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: Optional[str] = Field(default=None, description="Anthropic API key")
     MCP_HOST: str = Field(default="http://mcp:8001")
     MCP_TIMEOUT: int = Field(default=30, description="MCP request timeout in seconds")
+    MCP_MAX_CONNECTIONS: int = Field(default=100, description="Max pooled HTTP connections to the MCP host")
+    MCP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, description="Max idle keep-alive connections kept in the pool")
+    MCP_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Seconds an idle pooled connection is kept open")
+    MCP_HTTP2: bool = Field(default=False, description="Use HTTP/2 for MCP calls (requires the h2 package)")
+    MCP_MAX_CONCURRENT_CALLS: int = Field(default=64, description="Global limit on concurrent MCP tool calls")
+    MCP_PER_TOOL_CONCURRENCY: int = Field(default=16, description="Default concurrent call limit per MCP tool")
+    MCP_TOOL_CONCURRENCY_LIMITS: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-tool concurrency overrides, e.g. {\"process_payment\": 4}"
+    )
 
     # Vector Database (Chroma)
     CHROMA_PERSIST_DIR: str = Field(default="/data/chroma")
     CHROMA_HOST: str = Field(default="localhost")
     CHROMA_PORT: int = Field(default=8001)
+    VECTOR_DB_ADD_BATCH_SIZE: int = Field(default=1024, description="Documents per Chroma upsert call")
+    VECTOR_DB_CACHE_COLLECTIONS: bool = Field(default=True, description="Reuse collection handles across calls")
+    VECTOR_DB_WARMUP_COLLECTIONS: List[str] = Field(
+        default_factory=list,
+        description="Collections loaded at startup, e.g. [\"clinical_docs\"]"
+    )
+    VECTOR_DB_BACKEND: str = Field(default="chroma", description="chroma, exact (in-process brute force) or ivf (in-process ANN)")
+    VECTOR_INDEX_DIR: str = Field(default="/data/vector_index", description="Storage for the exact/ivf backends")
+    VECTOR_INDEX_IVF_NLIST: int = Field(default=0, description="IVF cells (0 = about sqrt(rows))")
+    VECTOR_INDEX_IVF_NPROBE: int = Field(default=16, description="IVF cells searched per query (recall vs latency)")
+    VECTOR_INDEX_IVF_MIN_ROWS: int = Field(default=4096, description="Rows before the IVF index is trained (exact below)")
+    LEXICAL_INDEX_ENABLED: bool = Field(default=True, description="Maintain a BM25 index alongside each collection")
+    LEXICAL_INDEX_DIR: str = Field(default="/data/lexical_index")
+    HYBRID_VECTOR_WEIGHT: float = Field(default=1.0, description="Vector ranking weight in reciprocal rank fusion")
+    HYBRID_LEXICAL_WEIGHT: float = Field(default=1.0, description="BM25 ranking weight in reciprocal rank fusion")
+    HYBRID_RRF_K: int = Field(default=60, description="Reciprocal rank fusion constant")
+    HYBRID_CANDIDATES: int = Field(default=50, description="Results taken from each retriever before fusion")
+    DOCUMENT_SEARCH_LOCAL: bool = Field(default=False, description="Serve search_documents from the in-process hybrid index")
+    DOCUMENT_SEARCH_COLLECTION: str = Field(default="clinical_docs", description="Collection searched when DOCUMENT_SEARCH_LOCAL")
+    INGEST_PAGE_SIZE: int = Field(default=256, description="Chunks per ingestion encode/upsert page")
+    CHUNKING_LOCAL: bool = Field(default=True, description="Chunk documents in-process instead of via MCP")
+    CHUNK_SIZE_TOKENS: int = Field(default=200, description="Max tokens per chunk")
+    CHUNK_OVERLAP_TOKENS: int = Field(default=32, description="Tokens shared by consecutive chunks")
+    CHUNK_TOKENIZER: str = Field(default="", description="Tokenizer for chunk sizes (defaults to EMBEDDING_MODEL)")
     EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2")
     EMBEDDING_DIMENSION: int = Field(default=384)
+    EMBEDDING_BATCHING_ENABLED: bool = Field(default=True, description="Micro-batch concurrent single-text encodes")
+    EMBEDDING_BATCH_MAX_SIZE: int = Field(default=64, description="Max texts per batched forward pass")
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = Field(default=2.0, description="Max wait for a batch to fill")
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True, description="Cache embeddings by content hash")
+    EMBEDDING_CACHE_MEMORY_BYTES: int = Field(default=64 * 1024 * 1024, description="In-memory embedding cache cap")
+    EMBEDDING_CACHE_DISK_ENABLED: bool = Field(default=True, description="Back the embedding cache with a memory-mapped store")
+    EMBEDDING_CACHE_DIR: str = Field(default="/data/embedding_cache")
+
+    # RAG context assembly
+    RAG_CONTEXT_MAX_TOKENS: int = Field(default=4000, description="Token budget for retrieved context")
+    RAG_CONTEXT_MMR_LAMBDA: float = Field(default=0.7, description="MMR relevance weight (1.0 ignores redundancy)")
+    RAG_CONTEXT_DUPLICATE_THRESHOLD: float = Field(default=0.95, description="Cosine similarity treated as a duplicate chunk")
+    RAG_CONTEXT_MIN_CUT_TOKENS: int = Field(default=32, description="Smallest sentence-boundary cut worth including")
+    RAG_ANSWER_CACHE_ENABLED: bool = Field(default=True, description="Answer repeated questions from a semantic cache (local document search only)")
+    RAG_ANSWER_CACHE_THRESHOLD: float = Field(default=0.95, description="Min query cosine similarity for a cache hit")
+    RAG_ANSWER_CACHE_TTL_SECONDS: float = Field(default=600, description="Lifetime of a cached answer")
+    RAG_ANSWER_CACHE_MAX_ENTRIES: int = Field(default=1024, description="Max cached answers (LRU)")
+    RERANKER_ENABLED: bool = Field(default=False, description="Rerank retrieved documents with a cross-encoder")
+    RERANKER_MODEL: str = Field(default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANKER_ONNX_PATH: str = Field(default="", description="Exported ONNX reranker (empty runs the PyTorch model)")
+    RERANKER_QUANTIZE: bool = Field(default=True, description="Run the PyTorch reranker with int8 linear layers")
+    RERANKER_CANDIDATES: int = Field(default=20, description="Documents retrieved for reranking")
+    RERANKER_BATCH_SIZE: int = Field(default=16, description="Pairs per reranker forward pass")
+    RERANKER_MAX_LENGTH: int = Field(default=256, description="Max tokens per query-document pair")
+    RERANKER_BUDGET_MS: float = Field(default=150, description="Reranking budget before falling back to retrieval order")
+
+    # Semantic routing
+    SEMANTIC_ROUTING_ENABLED: bool = Field(default=True, description="Route unmatched queries by intent embeddings")
+    SEMANTIC_ROUTER_THRESHOLD: float = Field(default=0.45, description="Min cosine similarity to accept an intent")
+    SEMANTIC_ROUTER_CENTROIDS_PATH: str = Field(default="/data/router/intent_centroids.npz")
 
     # Payment Gateway
     PAYMENT_SDK_KEY: str = Field(default="test_payment_key_sandbox")
@@ -84,11 +148,20 @@ class Settings(BaseSettings):
     GUARDRAILS_ENABLED: bool = Field(default=True)
     GUARDRAILS_POLICY_FILE: str = Field(default="/app/config/guardrail_policies.yaml")
     PHI_REDACTION_ENABLED: bool = Field(default=True)
+    CONTENT_CACHE_ENABLED: bool = Field(default=True, description="Memoize redaction results and guardrail verdicts")
+    CONTENT_CACHE_MAX_BYTES: int = Field(default=32 * 1024 * 1024, description="Approximate memory cap per content cache")
+    CONTENT_CACHE_MAX_ENTRIES: int = Field(default=50000)
+    CONTENT_CACHE_MIN_LENGTH: int = Field(default=32, description="Shorter strings are redacted without caching")
 
     # ONNX Model
     ONNX_MODEL_PATH: str = Field(default="/app/models/symptom_classifier.onnx")
     ONNX_THREADS: int = Field(default=4)
     ONNX_DEVICE: str = Field(default="cpu")
+    ONNX_BATCHING_ENABLED: bool = Field(default=True, description="Coalesce concurrent requests into batched runs")
+    ONNX_BATCH_MAX_SIZE: int = Field(default=8, description="Max inputs per run (models with a fixed batch size use it)")
+    ONNX_BATCH_MAX_WAIT_MS: float = Field(default=5.0, description="Max wait for a batch to fill")
+    ONNX_WORKERS: int = Field(default=2, description="Runs in flight at once")
+    ONNX_MAX_QUEUE: int = Field(default=256, description="Max queued inputs before requests are rejected")
 
     # OCR
     TESSERACT_CMD: str = Field(default="/usr/bin/tesseract")
@@ -98,6 +171,17 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = Field(default="INFO")
     AUDIT_ENABLED: bool = Field(default=True)
     AUDIT_LOG_PATH: str = Field(default="/var/log/medisense/audit.log")
+    AUDIT_QUEUE_SIZE: int = Field(default=10000, description="Max audit events buffered in memory (and awaiting a spill)")
+    AUDIT_BATCH_SIZE: int = Field(default=256, description="Max audit events written per batch")
+    AUDIT_FLUSH_INTERVAL_MS: int = Field(default=200, description="Max wait before writing a partial batch")
+    AUDIT_FSYNC_POLICY: str = Field(default="batch", description="Audit fsync policy: batch, interval or none")
+    AUDIT_FSYNC_INTERVAL_SECONDS: float = Field(default=1.0, description="Fsync interval for the interval policy")
+    AUDIT_OVERFLOW_POLICY: str = Field(default="spill", description="Full audit queue policy: block, spill or drop")
+    AUDIT_SPILL_PATH: str = Field(default="/var/log/medisense/audit.spill.log")
+    AUDIT_DB_ENABLED: bool = Field(default=True, description="Also persist audit events to the audit_logs table")
+    AUDIT_DB_USE_COPY: bool = Field(default=True, description="Bulk-load audit batches with COPY on Postgres")
+    AUDIT_EXPORT_DIR: str = Field(default="/var/lib/medisense/exports")
+    AUDIT_QUERY_MAX_LIMIT: int = Field(default=1000, description="Max audit entries returned per query")
 
     # RAGAS Evaluation
     RAGAS_EVAL_DATASET: str = Field(default="/app/ragas/testset.jsonl")
@@ -113,6 +197,8 @@ class Settings(BaseSettings):
     RATE_LIMIT_PER_MINUTE: int = Field(default=60)
     AGENT_TIMEOUT_SECONDS: int = Field(default=120)
     MAX_CONCURRENT_AGENTS: int = Field(default=10)
+    PIPELINE_SPECULATION_ENABLED: bool = Field(default=True, description="Start the predicted agent while routing runs")
+    PIPELINE_SPECULATION_THRESHOLD: float = Field(default=0.85, description="Min routing confidence to start an agent early")
 
     # Feature Flags
     FEATURE_IMAGE_ANALYSIS: bool = Field(default=True)
@@ -0,0 +1,163 @@
+"""
+Bounded, content-hash-keyed LRU cache for redaction results and guardrail verdicts.
+
+Keys are keyed BLAKE2b digests of the content, so no raw text (and no PHI) is ever
+held as a key. The hash key is random per process, which keeps digests of short,
+low-entropy values such as SSNs from being reversed by brute force.
+"""
+
+from typing import Any, Dict, Hashable, Optional
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+from .config import settings
+
+# Per-process hash key; never persisted
+_HASH_KEY = os.urandom(32)
+
+# Approximate per-entry bookkeeping overhead (digest, OrderedDict node, tuple)
+ENTRY_OVERHEAD_BYTES = 200
+
+# All caches by name, for metrics
+_caches: Dict[str, "ContentCache"] = {}
+
+
+def content_key(content: str) -> bytes:
+    """
+    Hash content into a cache key.
+
+    Args:
+        content: Text to hash
+
+    Returns:
+        16-byte keyed digest
+    """
+    return hashlib.blake2b(
+        content.encode("utf-8", "surrogatepass"), digest_size=16, key=_HASH_KEY
+    ).digest()
+
+
+class ContentCache:
+    """
+    Thread-safe LRU cache keyed by content hash, bounded by entry count and bytes.
+
+    Every lookup carries a version (e.g. the active policy set). When the version
+    changes, all cached entries are dropped, since they were computed under the old one.
+    """
+
+    def __init__(self, name: str, max_bytes: Optional[int] = None, max_entries: Optional[int] = None):
+        """
+        Initialize the cache and register it for metrics.
+
+        Args:
+            name: Cache name reported in metrics
+            max_bytes: Approximate memory cap for cached values
+            max_entries: Maximum number of entries
+        """
+        self.name = name
+        self.max_bytes = max_bytes or settings.CONTENT_CACHE_MAX_BYTES
+        self.max_entries = max_entries or settings.CONTENT_CACHE_MAX_ENTRIES
+
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Hashable = None
+        self.bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        _caches[name] = self
+
+    def _check_version(self, version: Hashable):
+        """Drop all entries if the version changed (caller holds the lock)."""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.bytes = 0
+            self._version = version
+
+    def get(self, key: bytes, version: Hashable = None) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Content key from content_key()
+            version: Version the value must have been computed under
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, value: Any, size: int, version: Hashable = None):
+        """
+        Cache a value, evicting least recently used entries to stay within bounds.
+
+        Args:
+            key: Content key from content_key()
+            value: Value to cache (must not contain raw PHI)
+            size: Approximate size of the value in bytes
+            version: Version the value was computed under
+        """
+        size += ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_version(version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self.bytes += size
+
+            while self.bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Size, bounds, counters and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+def content_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Get statistics for every content cache."""
+    return {name: cache.stats() for name, cache in _caches.items()}
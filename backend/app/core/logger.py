@@ -3,14 +3,16 @@ Structured logging configuration for MediSense-AI.
 Provides audit logging and application logging with PHI redaction.
 """
 
+import atexit
 import logging
 import sys
+import uuid
 from typing import Any, Dict
 from datetime import datetime
 from pathlib import Path
 import structlog
 from .config import settings
-from .security import redact_phi_dict
+from .audit_writer import AuditWriter, FileAuditSink
 
 
 def setup_logging():
@@ -46,6 +48,11 @@ def setup_logging():
     )
 
 
+def new_event_id() -> str:
+    """Generate a unique audit event identifier."""
+    return f"evt_{uuid.uuid4().hex}"
+
+
 def get_logger(name: str) -> structlog.BoundLogger:
     """
     Get a configured logger instance.
@@ -63,20 +70,42 @@ class AuditLogger:
     """
     Audit logger for clinical decision tracking and compliance.
     Maintains immutable audit trails.
+
+    Entries are handed to a background AuditWriter, which redacts PHI and appends
+    them to the audit file (and, once attached, the audit_logs table) in batches, so
+    callers never wait on disk or database I/O.
     """
 
-    def __init__(self):
-        """Initialize audit logger."""
+    def __init__(self, writer: AuditWriter = None):
+        """
+        Initialize audit logger.
+
+        Args:
+            writer: Optional audit writer (defaults to one writing AUDIT_LOG_PATH)
+        """
         self.logger = get_logger("audit")
         self.audit_file = settings.AUDIT_LOG_PATH
+        self.writer = writer or AuditWriter(sinks=[FileAuditSink(self.audit_file)])
+
+    def add_sink(self, sink: Any):
+        """Persist subsequent audit batches to an additional sink."""
+        self.writer.add_sink(sink)
+
+    def start(self):
+        """Start the background audit writer."""
+        self.writer.start()
 
-        # Setup file handler for audit logs
-        file_handler = logging.FileHandler(self.audit_file)
-        file_handler.setLevel(logging.INFO)
+    def shutdown(self, timeout: float = 10.0):
+        """Write all queued entries and stop the background audit writer."""
+        self.writer.shutdown(timeout)
 
-        # Get root logger and add handler
-        root_logger = logging.getLogger()
-        root_logger.addHandler(file_handler)
+    def flush(self, timeout: float = None) -> bool:
+        """Block until all queued entries are written and synced."""
+        return self.writer.flush(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get audit writer statistics."""
+        return self.writer.stats()
 
     def log_agent_action(
         self,
@@ -91,6 +120,8 @@ class AuditLogger:
         """
         Log an agent action with full context.
 
+        Coroutines use log_agent_action_async, which never waits on the event loop.
+
         Args:
             agent_name: Name of the agent
             action: Action performed
@@ -103,24 +134,68 @@ class AuditLogger:
         if not settings.AUDIT_ENABLED:
             return
 
-        # Redact PHI from input and output
-        safe_input = redact_phi_dict(input_data) if input_data else {}
-        safe_output = redact_phi_dict(output_data) if output_data else {}
+        self.writer.submit(self._agent_action_entry(
+            agent_name, action, user_id, session_id, input_data, output_data, metadata
+        ))
 
-        audit_entry = {
+    async def log_agent_action_async(
+        self,
+        agent_name: str,
+        action: str,
+        user_id: str,
+        session_id: str,
+        input_data: Dict[str, Any],
+        output_data: Dict[str, Any],
+        metadata: Dict[str, Any] = None
+    ):
+        """
+        Log an agent action from the event loop.
+
+        When the audit queue is full, waiting for room (or spilling) happens in an
+        executor thread, so the overflow policy applies back-pressure to the caller
+        without blocking other requests.
+
+        Args:
+            agent_name: Name of the agent
+            action: Action performed
+            user_id: User ID who initiated the action
+            session_id: Session identifier
+            input_data: Input data to the agent
+            output_data: Output data from the agent
+            metadata: Additional metadata
+        """
+        if not settings.AUDIT_ENABLED:
+            return
+
+        await self.writer.submit_async(self._agent_action_entry(
+            agent_name, action, user_id, session_id, input_data, output_data, metadata
+        ))
+
+    @staticmethod
+    def _agent_action_entry(
+        agent_name: str,
+        action: str,
+        user_id: str,
+        session_id: str,
+        input_data: Dict[str, Any],
+        output_data: Dict[str, Any],
+        metadata: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """Build an agent action audit entry."""
+        # PHI in input and output is redacted by the writer
+        return {
             "timestamp": datetime.utcnow().isoformat(),
             "event_type": "agent_action",
+            "event_id": (metadata or {}).get("event_id") or new_event_id(),
             "agent_name": agent_name,
             "action": action,
             "user_id": user_id,
             "session_id": session_id,
-            "input": safe_input,
-            "output": safe_output,
+            "input": input_data or {},
+            "output": output_data or {},
             "metadata": metadata or {}
         }
 
-        self.logger.info("agent_action", **audit_entry)
-
     def log_llm_call(
         self,
         model: str,
@@ -146,23 +221,21 @@ class AuditLogger:
         if not settings.AUDIT_ENABLED:
             return
 
-        # Redact PHI from prompt and response
-        safe_prompt = redact_phi_dict({"prompt": prompt})["prompt"]
-        safe_response = redact_phi_dict({"response": response})["response"]
-
+        # PHI in prompt and response is redacted by the writer
         audit_entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "event_type": "llm_call",
+            "event_id": new_event_id(),
             "model": model,
-            "prompt": safe_prompt,
-            "response": safe_response,
+            "prompt": prompt,
+            "response": response,
             "user_id": user_id,
             "session_id": session_id,
             "tokens_used": tokens_used,
             "metadata": metadata or {}
         }
 
-        self.logger.info("llm_call", **audit_entry)
+        self.writer.submit(audit_entry)
 
     def log_data_access(
         self,
@@ -190,6 +263,7 @@ class AuditLogger:
         audit_entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "event_type": "data_access",
+            "event_id": new_event_id(),
             "resource_type": resource_type,
             "resource_id": resource_id,
             "action": action,
@@ -198,7 +272,7 @@ class AuditLogger:
             "metadata": metadata or {}
         }
 
-        self.logger.info("data_access", **audit_entry)
+        self.writer.submit(audit_entry)
 
     def log_guardrail_violation(
         self,
@@ -226,20 +300,25 @@ class AuditLogger:
         audit_entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "event_type": "guardrail_violation",
+            "event_id": new_event_id(),
             "policy": policy,
             "violation_type": violation_type,
             "user_id": user_id,
             "session_id": session_id,
-            "context": redact_phi_dict(context),
+            "context": context,
             "action_taken": action_taken
         }
 
-        self.logger.warning("guardrail_violation", **audit_entry)
+        self.logger.warning("guardrail_violation", policy=policy, violation_type=violation_type)
+        self.writer.submit(audit_entry)
 
 
 # Global audit logger instance
 audit_logger = AuditLogger()
 
+# Write queued audit entries on interpreter exit
+atexit.register(audit_logger.shutdown)
+
 
 # Initialize logging on module import
 setup_logging()
@@ -3,12 +3,14 @@ Security utilities for authentication, authorization, and PHI/PII protection.
 """
 
 import re
+import sys
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from .config import settings
+from .content_cache import ContentCache, content_key
 
 
 # Password hashing context
@@ -26,6 +28,113 @@ PHI_PATTERNS = {
 }
 
 
+class PHIMatch(NamedTuple):
+    """A PHI/PII match: pattern name and span in the original text."""
+    phi_type: str
+    start: int
+    end: int
+
+
+class PHIRedactor:
+    """
+    Single-pass PHI/PII redaction engine.
+
+    All patterns are combined into one alternation of named groups, so a text is
+    scanned once and rebuilt once by a single sub() callback, no matter how many
+    patterns or matches there are. Where patterns overlap, the leftmost match wins,
+    then the first pattern in table order.
+
+    A leading word boundary shared by every pattern is hoisted out of the alternation,
+    so positions inside words are rejected by one check instead of one per pattern.
+
+    Results for longer strings are memoized by content hash, since the same query and
+    context are redacted several times per request (agent audit, writer, guardrail).
+    """
+
+    def __init__(self, patterns: Dict[str, re.Pattern], cache: Optional[ContentCache] = None):
+        """
+        Compile the combined pattern.
+
+        Args:
+            patterns: Pattern per PHI type, in priority order
+            cache: Optional cache of redaction results
+        """
+        self.phi_types = list(patterns)
+        self.cache = cache
+        self.fingerprint = tuple((name, pattern.pattern) for name, pattern in patterns.items())
+
+        sources = {name: pattern.pattern for name, pattern in patterns.items()}
+        prefix = ""
+        if all(source.startswith("\\b") for source in sources.values()):
+            prefix = "\\b"
+            sources = {name: source[2:] for name, source in sources.items()}
+
+        alternation = "|".join(f"(?P<{name}>{source})" for name, source in sources.items())
+        self.pattern = re.compile(f"{prefix}(?:{alternation})" if prefix else alternation)
+        self.placeholders = {name: f"[REDACTED_{name.upper()}]" for name in patterns}
+
+    def redact(self, text: str, cached: bool = True) -> Tuple[str, List[PHIMatch]]:
+        """
+        Redact PHI/PII in one pass.
+
+        Args:
+            text: Input text
+            cached: Whether to use the result cache (skip for one-off fragments)
+
+        Returns:
+            Redacted text and the matches (spans refer to the input text)
+        """
+        use_cache = (
+            cached
+            and self.cache is not None
+            and settings.CONTENT_CACHE_ENABLED
+            and len(text) >= settings.CONTENT_CACHE_MIN_LENGTH
+        )
+        if use_cache:
+            key = content_key(text)
+            version = (settings.PHI_REDACTION_ENABLED, self.fingerprint)
+            cached = self.cache.get(key, version)
+            if cached is not None:
+                return cached[0], list(cached[1])
+
+        matches: List[PHIMatch] = []
+        placeholders = self.placeholders
+
+        def replace(match: re.Match) -> str:
+            phi_type = match.lastgroup
+            matches.append(PHIMatch(phi_type, match.start(), match.end()))
+            return placeholders[phi_type]
+
+        redacted = self.pattern.sub(replace, text)
+
+        if use_cache:
+            # Only the redacted text and spans are cached, never the input
+            size = sys.getsizeof(redacted) + 72 * len(matches)
+            self.cache.put(key, (redacted, tuple(matches)), size, version)
+
+        return redacted, matches
+
+    def scan(self, text: str, cached: bool = True) -> List[PHIMatch]:
+        """
+        Find PHI/PII without building a redacted copy.
+
+        Args:
+            text: Input text
+            cached: Whether to use the result cache (skip for one-off fragments)
+
+        Returns:
+            Matches in text order
+        """
+        if cached and self.cache is not None and settings.CONTENT_CACHE_ENABLED and len(text) >= settings.CONTENT_CACHE_MIN_LENGTH:
+            return self.redact(text)[1]
+
+        return [PHIMatch(match.lastgroup, match.start(), match.end()) for match in self.pattern.finditer(text)]
+
+
+# Shared redaction engine used by redact_phi and the guardrail agent
+phi_redactor = PHIRedactor(PHI_PATTERNS, cache=ContentCache("phi_redaction"))
+
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     return pwd_context.hash(password)
@@ -98,16 +207,7 @@ def redact_phi(text: str, redaction_char: str = "*") -> str:
     if not settings.PHI_REDACTION_ENABLED:
         return text
 
-    redacted_text = text
-
-    for pattern_name, pattern in PHI_PATTERNS.items():
-        matches = pattern.findall(redacted_text)
-        for match in matches:
-            # Replace with redacted placeholder
-            placeholder = f"[REDACTED_{pattern_name.upper()}]"
-            redacted_text = redacted_text.replace(match, placeholder)
-
-    return redacted_text
+    return phi_redactor.redact(text)[0]
 
 
 def redact_phi_dict(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -120,25 +220,21 @@ def redact_phi_dict(data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionary with PHI/PII redacted
     """
-    if not isinstance(data, dict):
+    if not isinstance(data, dict) or not settings.PHI_REDACTION_ENABLED:
         return data
 
-    redacted_data = {}
-    for key, value in data.items():
-        if isinstance(value, str):
-            redacted_data[key] = redact_phi(value)
-        elif isinstance(value, dict):
-            redacted_data[key] = redact_phi_dict(value)
-        elif isinstance(value, list):
-            redacted_data[key] = [
-                redact_phi(item) if isinstance(item, str) else
-                redact_phi_dict(item) if isinstance(item, dict) else item
-                for item in value
-            ]
-        else:
-            redacted_data[key] = value
-
-    return redacted_data
+    return _redact_value(data)
+
+
+def _redact_value(value: Any) -> Any:
+    """Redact strings nested in dicts and lists (other values are returned as-is)."""
+    if isinstance(value, str):
+        return phi_redactor.redact(value)[0]
+    if isinstance(value, dict):
+        return {key: _redact_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_redact_value(item) for item in value]
+    return value
 
 
 def sanitize_sql_input(input_str: str) -> str:
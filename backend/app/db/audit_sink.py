@@ -0,0 +1,193 @@
+"""
+Audit writer sink persisting audit events to the audit_logs table.
+"""
+
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+import csv
+import io
+import json
+import uuid
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.models.audit import AuditLog
+
+logger = get_logger(__name__)
+
+# Entry keys stored in dedicated columns; everything else is kept in the metadata column
+_COLUMN_KEYS = {
+    "timestamp", "event_type", "event_id", "user_id", "session_id", "agent_name", "action",
+    "resource_type", "resource_id", "input", "output", "prompt", "response", "context",
+    "success", "metadata"
+}
+
+# Column order used for COPY
+_COPY_COLUMNS = (
+    "event_type", "event_id", "user_id", "session_id", "agent_name", "action",
+    "resource_type", "resource_id", "input_data", "output_data", "metadata",
+    "success", "error_message", "provenance", "timestamp"
+)
+_JSON_COLUMNS = {"input_data", "output_data", "metadata", "provenance"}
+
+
+def _parse_user_id(value: Any) -> Optional[int]:
+    """Audit entries carry user ids as strings ("42", "system")."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    """Parse an entry timestamp (naive ISO strings are UTC)."""
+    try:
+        timestamp = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+def audit_entry_to_row(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map a (redacted) audit entry onto audit_logs columns.
+
+    Args:
+        entry: Audit entry as produced by AuditLogger
+
+    Returns:
+        Row keyed by column name
+    """
+    metadata = dict(entry.get("metadata") or {})
+    metadata.update({key: value for key, value in entry.items() if key not in _COLUMN_KEYS})
+
+    input_data = entry.get("input")
+    if input_data is None and "prompt" in entry:
+        input_data = {"prompt": entry["prompt"]}
+    if input_data is None:
+        input_data = entry.get("context")
+
+    output_data = entry.get("output")
+    if output_data is None and "response" in entry:
+        output_data = {"response": entry["response"]}
+
+    output = output_data if isinstance(output_data, dict) else {}
+    success = entry.get("success", output.get("success", True))
+
+    return {
+        "event_type": entry.get("event_type") or metadata.get("event_type") or "generic",
+        "event_id": entry.get("event_id") or metadata.get("event_id") or f"evt_{uuid.uuid4().hex}",
+        "user_id": _parse_user_id(entry.get("user_id")),
+        "session_id": entry.get("session_id"),
+        "agent_name": entry.get("agent_name"),
+        "action": entry.get("action") or entry.get("action_taken"),
+        "resource_type": entry.get("resource_type"),
+        "resource_id": None if entry.get("resource_id") is None else str(entry["resource_id"]),
+        "input_data": input_data,
+        "output_data": output_data,
+        "metadata": metadata or None,
+        "success": "false" if success is False else "true",
+        "error_message": output.get("error"),
+        "provenance": output.get("provenance"),
+        "timestamp": _parse_timestamp(entry.get("timestamp"))
+    }
+
+
+class DatabaseAuditSink:
+    """
+    Bulk-inserts audit batches into audit_logs.
+
+    Each batch is one transaction: a Postgres COPY when available, otherwise a single
+    multi-row INSERT (executemany). Events already present (e.g. replayed from the
+    spill file) are skipped rather than failing the batch.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None, use_copy: Optional[bool] = None):
+        """
+        Initialize the database sink.
+
+        Args:
+            engine: SQLAlchemy engine (defaults to the application engine)
+            use_copy: Use COPY on Postgres (defaults to AUDIT_DB_USE_COPY)
+        """
+        if engine is None:
+            from .base import engine
+        self.engine = engine
+        self.table = AuditLog.__table__
+        self.use_copy = (
+            (settings.AUDIT_DB_USE_COPY if use_copy is None else use_copy)
+            and engine.dialect.name == "postgresql"
+            and engine.dialect.driver == "psycopg2"
+        )
+
+    def write(self, entries: List[Dict[str, Any]]):
+        """Insert a batch of audit entries in one transaction."""
+        rows = [audit_entry_to_row(entry) for entry in entries]
+        if not rows:
+            return
+
+        if self.use_copy:
+            try:
+                self._copy(rows)
+                return
+            except Exception as e:
+                # COPY aborts on any duplicate event_id; fall back to a skipping insert
+                logger.warning(f"Audit COPY failed, falling back to INSERT: {str(e)}")
+
+        self._insert(rows)
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        """Multi-row INSERT that ignores already persisted event ids."""
+        dialect = self.engine.dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(self.table).on_conflict_do_nothing(index_elements=["event_id"])
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            statement = dialect_insert(self.table).on_conflict_do_nothing(index_elements=["event_id"])
+        else:
+            statement = insert(self.table)
+
+        with self.engine.begin() as connection:
+            connection.execute(statement, rows)
+
+    def _copy(self, rows: List[Dict[str, Any]]):
+        """Stream the batch through COPY ... FROM STDIN as CSV."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self._copy_value(column, row[column]) for column in _COPY_COLUMNS])
+        buffer.seek(0)
+
+        connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {self.table.name} ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _copy_value(column: str, value: Any) -> Any:
+        """Encode a value for CSV COPY (unquoted empty fields are NULL)."""
+        if value is None:
+            return None
+        if column in _JSON_COLUMNS:
+            return json.dumps(value, default=str)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def sync(self):
+        """Batches are committed on write; nothing is left to sync."""
+
+    def close(self):
+        """The engine's connection pool is owned by the application."""
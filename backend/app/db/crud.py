@@ -177,8 +177,8 @@ def create_audit_log(
         action=action,
         input_data=input_data,
         output_data=output_data,
-        metadata=metadata,
-        success=str(success),
+        event_metadata=metadata,
+        success=str(success).lower(),
         provenance=provenance
     )
     db.add(audit_log)
@@ -193,19 +193,49 @@ def get_audit_logs(
     session_id: Optional[str] = None,
     event_type: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    agent_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
 ) -> List[AuditLog]:
     """Get audit logs with optional filters."""
-    query = db.query(AuditLog)
+    query = filter_audit_logs(
+        db.query(AuditLog),
+        user_id=user_id,
+        session_id=session_id,
+        event_type=event_type,
+        agent_name=agent_name,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    return query.order_by(AuditLog.timestamp.desc()).offset(skip).limit(limit).all()
 
+
+def filter_audit_logs(
+    query,
+    user_id: Optional[int] = None,
+    session_id: Optional[str] = None,
+    event_type: Optional[str] = None,
+    agent_name: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """Apply audit trail filters (each backed by an index on audit_logs)."""
     if user_id:
         query = query.filter(AuditLog.user_id == user_id)
     if session_id:
         query = query.filter(AuditLog.session_id == session_id)
     if event_type:
         query = query.filter(AuditLog.event_type == event_type)
-
-    return query.order_by(AuditLog.timestamp.desc()).offset(skip).limit(limit).all()
+    if agent_name:
+        query = query.filter(AuditLog.agent_name == agent_name)
+    if start_date:
+        query = query.filter(AuditLog.timestamp >= start_date)
+    if end_date:
+        query = query.filter(AuditLog.timestamp <= end_date)
+
+    return query
 
 
 def create_guardrail_violation(
@@ -9,8 +9,11 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.core.config import settings
-from app.core.logger import get_logger, setup_logging
+from app.core.logger import get_logger, setup_logging, audit_logger
+from app.core.content_cache import content_cache_stats
+from app.services.answer_cache import get_answer_cache
 from app.db import init_db
+from app.mcp_clients import get_connection_pool
 from app.api.v1 import routes_auth, routes_agents, routes_mcp
 
 # Initialize logging
@@ -25,17 +28,55 @@ async def lifespan(app: FastAPI):
     logger.info("Starting MediSense-AI application", version="1.0.0", env=settings.ENV)
 
     # Initialize database
+    db_ready = False
     try:
         init_db()
+        db_ready = True
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {str(e)}")
 
+    # Persist audit events to the audit_logs table alongside the audit file
+    if settings.AUDIT_DB_ENABLED and db_ready:
+        try:
+            from app.db.audit_sink import DatabaseAuditSink
+            audit_logger.add_sink(DatabaseAuditSink())
+        except Exception as e:
+            logger.warning(f"Audit database sink not attached: {str(e)}")
+
+    # Start background audit writer
+    audit_logger.start()
+
+    # Load semantic routing centroids
+    if settings.SEMANTIC_ROUTING_ENABLED:
+        try:
+            from app.services.semantic_router import get_semantic_router
+            get_semantic_router()
+        except Exception as e:
+            logger.warning(f"Semantic router not loaded: {str(e)}")
+
+    # Load vector DB collection handles
+    if settings.VECTOR_DB_WARMUP_COLLECTIONS:
+        try:
+            from app.services.vector_db import get_vector_db_service
+            get_vector_db_service().warm_up()
+        except Exception as e:
+            logger.warning(f"Vector DB warm-up failed: {str(e)}")
+
+    # Open pooled MCP transport
+    await get_connection_pool().open()
+
     yield
 
     # Shutdown
     logger.info("Shutting down MediSense-AI application")
 
+    # Release pooled MCP connections
+    await get_connection_pool().close()
+
+    # Write out queued audit entries
+    audit_logger.shutdown()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -85,7 +126,10 @@ async def health_check():
             "database": "connected",  # Would check actual DB connection
             "redis": "connected",  # Would check actual Redis connection
             "mcp": settings.MCP_MODE
-        }
+        },
+        "audit": audit_logger.stats(),
+        "caches": content_cache_stats(),
+        "answer_cache": get_answer_cache().stats()
     }
 
 
@@ -1,19 +1,34 @@
 """MCP clients package."""
 
-from .mcp_base import ToolClient, MCPMode, get_mcp_client
+from .mcp_base import (
+    ToolClient,
+    MCPMode,
+    MCPConnectionPool,
+    SharedToolClient,
+    get_mcp_client,
+    create_mcp_client,
+    get_connection_pool,
+)
 from .mcp_document import DocumentMCPClient
 from .mcp_db import DatabaseMCPClient
 from .mcp_model import ModelMCPClient
 from .mcp_payment import PaymentMCPClient
 from .mcp_notification import NotificationMCPClient
+from .mcp_registry import MCPClientRegistry, get_mcp_registry
 
 __all__ = [
     "ToolClient",
     "MCPMode",
     "get_mcp_client",
+    "MCPConnectionPool",
+    "get_connection_pool",
+    "SharedToolClient",
+    "create_mcp_client",
     "DocumentMCPClient",
     "DatabaseMCPClient",
     "ModelMCPClient",
     "PaymentMCPClient",
     "NotificationMCPClient",
+    "MCPClientRegistry",
+    "get_mcp_registry",
 ]
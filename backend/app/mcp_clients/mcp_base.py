@@ -5,7 +5,11 @@ Provides interface for both mock and Anthropic implementations.
 
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
+from collections import deque
 from enum import Enum
+import asyncio
+import importlib.util
+import time
 import httpx
 from app.core.config import settings
 from app.core.logger import get_logger
@@ -68,14 +72,177 @@ class ToolClient(ABC):
             raise ValueError(f"Missing required payload keys: {missing_keys}")
 
 
+class MCPConnectionPool:
+    """
+    Process-wide pooled HTTP transport for remote MCP tool calls.
+    Keeps TCP/TLS connections alive between tool calls and tracks pool usage.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize the connection pool (the HTTP client is created on open).
+
+        Args:
+            max_connections: Maximum number of concurrent connections
+            max_keepalive_connections: Maximum number of idle keep-alive connections
+            keepalive_expiry: Seconds an idle connection is kept alive
+            http2: Whether to negotiate HTTP/2
+            timeout: Request timeout in seconds
+        """
+        self.max_connections = max_connections or settings.MCP_MAX_CONNECTIONS
+        self.max_keepalive_connections = max_keepalive_connections or settings.MCP_MAX_KEEPALIVE_CONNECTIONS
+        self.keepalive_expiry = keepalive_expiry if keepalive_expiry is not None else settings.MCP_KEEPALIVE_EXPIRY
+        self.http2 = settings.MCP_HTTP2 if http2 is None else http2
+        self.timeout = timeout or settings.MCP_TIMEOUT
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+
+        # Usage counters
+        self.requests_total = 0
+        self.connections_opened = 0
+        self.in_flight = 0
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the underlying HTTP client is open."""
+        return self._client is not None and not self._client.is_closed
+
+    async def open(self) -> httpx.AsyncClient:
+        """
+        Open the pooled HTTP client if it is not already open.
+
+        Returns:
+            Shared AsyncClient instance
+        """
+        if self.is_open:
+            return self._client
+
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("MCP_HTTP2 is enabled but the h2 package is not installed. Falling back to HTTP/1.1.")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        self._transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        self._client = httpx.AsyncClient(transport=self._transport, timeout=self.timeout)
+
+        logger.info(
+            "MCP connection pool opened",
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=http2
+        )
+        return self._client
+
+    async def close(self):
+        """Close the pooled HTTP client and release all connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            logger.info("MCP connection pool closed", **self.stats())
+        self._client = None
+        self._transport = None
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a POST request over a pooled connection.
+
+        Args:
+            url: Request URL
+            **kwargs: Extra arguments passed to httpx.AsyncClient.post
+
+        Returns:
+            HTTP response
+        """
+        client = await self.open()
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions["trace"] = self._trace
+
+        self.requests_total += 1
+        self.in_flight += 1
+        try:
+            return await client.post(url, extensions=extensions, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        """httpcore trace hook used to count newly established connections."""
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics.
+
+        Returns:
+            Pool usage statistics including in-use connections, waiters and reuse ratio
+        """
+        connections = []
+        waiters = 0
+
+        # httpx does not expose the httpcore pool publicly
+        core_pool = getattr(self._transport, "_pool", None)
+        if core_pool is not None:
+            connections = core_pool.connections
+            waiters = sum(1 for request in getattr(core_pool, "_requests", []) if request.is_queued())
+
+        in_use = sum(1 for connection in connections if not connection.is_idle())
+        reused = max(self.requests_total - self.connections_opened, 0)
+
+        return {
+            "open": self.is_open,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            "connections": len(connections),
+            "in_use_connections": in_use,
+            "idle_connections": len(connections) - in_use,
+            "waiters": waiters,
+            "in_flight_requests": self.in_flight,
+            "requests_total": self.requests_total,
+            "connections_opened": self.connections_opened,
+            "reuse_ratio": reused / self.requests_total if self.requests_total else 0.0
+        }
+
+
+# Global MCP connection pool instance
+_connection_pool = None
+
+
+def get_connection_pool() -> MCPConnectionPool:
+    """Get global MCP connection pool instance."""
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = MCPConnectionPool()
+    return _connection_pool
+
+
 class AnthropicMCPClient(ToolClient):
     """
     Anthropic MCP client for production use.
     Communicates with Anthropic API via MCP protocol.
     """
 
-    def __init__(self):
-        """Initialize Anthropic MCP client."""
+    def __init__(self, pool: Optional[MCPConnectionPool] = None):
+        """
+        Initialize Anthropic MCP client.
+
+        Args:
+            pool: Optional connection pool (defaults to the process-wide pool)
+        """
         super().__init__(mode=MCPMode.ANTHROPIC)
 
         if not settings.ANTHROPIC_API_KEY:
@@ -87,6 +254,7 @@ class AnthropicMCPClient(ToolClient):
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        self.pool = pool or get_connection_pool()
 
     async def call_tool(self, name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -101,21 +269,20 @@ class AnthropicMCPClient(ToolClient):
         """
         logger.info(f"Calling Anthropic MCP tool: {name}", payload=payload)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.post(
-                    f"{self.host}/v1/tools/{name}",
-                    json=payload,
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                logger.info(f"Anthropic MCP tool {name} succeeded", result=result)
-                return result
+        try:
+            response = await self.pool.post(
+                f"{self.host}/v1/tools/{name}",
+                json=payload,
+                headers=self.headers
+            )
+            response.raise_for_status()
+            result = response.json()
+            logger.info(f"Anthropic MCP tool {name} succeeded", result=result)
+            return result
 
-            except httpx.HTTPError as e:
-                logger.error(f"Anthropic MCP tool {name} failed", error=str(e))
-                raise Exception(f"MCP tool call failed: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error(f"Anthropic MCP tool {name} failed", error=str(e))
+            raise Exception(f"MCP tool call failed: {str(e)}")
 
 
 class MockMCPClient(ToolClient):
@@ -180,9 +347,134 @@ class MockMCPClient(ToolClient):
         return result
 
 
-def get_mcp_client() -> ToolClient:
+class ToolMetrics:
+    """Latency and error counters for a single MCP tool."""
+
+    def __init__(self, window: int = 1024):
+        """
+        Initialize tool metrics.
+
+        Args:
+            window: Number of recent latencies kept for percentiles
+        """
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms = deque(maxlen=window)
+
+    def record(self, latency_ms: float, success: bool):
+        """Record a completed tool call."""
+        self.calls += 1
+        if not success:
+            self.errors += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.recent_ms.append(latency_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a serializable view of the counters."""
+        recent = sorted(self.recent_ms)
+
+        def percentile(q: float) -> float:
+            return recent[min(int(q * len(recent)), len(recent) - 1)] if recent else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": self.errors / self.calls if self.calls else 0.0,
+            "in_flight": self.in_flight,
+            "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max_ms
+        }
+
+
+class SharedToolClient(ToolClient):
+    """
+    Process-wide MCP tool client shared by all domain clients.
+    Applies a global and per-tool concurrency limit and records per-tool metrics.
+    """
+
+    def __init__(
+        self,
+        client: ToolClient,
+        max_concurrent_calls: Optional[int] = None,
+        per_tool_limit: Optional[int] = None,
+        tool_limits: Optional[Dict[str, int]] = None
+    ):
+        """
+        Initialize the shared tool client.
+
+        Args:
+            client: Underlying MCP client (Mock or Anthropic)
+            max_concurrent_calls: Global limit on concurrent tool calls
+            per_tool_limit: Default concurrent call limit for each tool
+            tool_limits: Per-tool overrides of the default limit
+        """
+        super().__init__(mode=client.mode)
+        self.client = client
+        self.max_concurrent_calls = max_concurrent_calls or settings.MCP_MAX_CONCURRENT_CALLS
+        self.per_tool_limit = per_tool_limit or settings.MCP_PER_TOOL_CONCURRENCY
+        self.tool_limits = dict(settings.MCP_TOOL_CONCURRENCY_LIMITS if tool_limits is None else tool_limits)
+
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrent_calls)
+        self._tool_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.metrics: Dict[str, ToolMetrics] = {}
+
+    def _tool_semaphore(self, name: str) -> asyncio.Semaphore:
+        """Get (or create) the semaphore limiting a single tool."""
+        if name not in self._tool_semaphores:
+            self._tool_semaphores[name] = asyncio.Semaphore(self.tool_limits.get(name, self.per_tool_limit))
+        return self._tool_semaphores[name]
+
+    async def call_tool(self, name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call a tool through the underlying client within the concurrency limits.
+
+        Args:
+            name: Tool name
+            payload: Tool payload
+
+        Returns:
+            Tool execution result
+        """
+        metrics = self.metrics.setdefault(name, ToolMetrics())
+
+        async with self._tool_semaphore(name), self._global_semaphore:
+            metrics.in_flight += 1
+            start_time = time.perf_counter()
+            success = False
+            try:
+                result = await self.client.call_tool(name, payload)
+                success = True
+                return result
+            finally:
+                metrics.in_flight -= 1
+                metrics.record((time.perf_counter() - start_time) * 1000, success)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get concurrency limits and per-tool counters.
+
+        Returns:
+            Shared client statistics
+        """
+        return {
+            "mode": self.mode.value,
+            "max_concurrent_calls": self.max_concurrent_calls,
+            "per_tool_limit": self.per_tool_limit,
+            "tool_limits": self.tool_limits,
+            "in_flight": sum(m.in_flight for m in self.metrics.values()),
+            "tools": {name: m.snapshot() for name, m in self.metrics.items()}
+        }
+
+
+def create_mcp_client() -> ToolClient:
     """
-    Get the appropriate MCP client based on configuration.
+    Create a new, unshared MCP client based on configuration.
 
     Returns:
         MCP client instance (Mock or Anthropic)
@@ -191,3 +483,20 @@ def get_mcp_client() -> ToolClient:
         return AnthropicMCPClient()
     else:
         return MockMCPClient()
+
+
+# Global shared MCP client instance
+_shared_mcp_client = None
+
+
+def get_mcp_client() -> SharedToolClient:
+    """
+    Get the process-wide MCP client based on configuration.
+
+    Returns:
+        Shared MCP client wrapping the Mock or Anthropic client
+    """
+    global _shared_mcp_client
+    if _shared_mcp_client is None:
+        _shared_mcp_client = SharedToolClient(create_mcp_client())
+    return _shared_mcp_client
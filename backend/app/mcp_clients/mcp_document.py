@@ -3,8 +3,11 @@ MCP Document client for document search, retrieval, and OCR operations.
 """
 
 from typing import Any, Dict, List, Optional
+import asyncio
 from .mcp_base import ToolClient, get_mcp_client
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.chunker import DocumentChunker, get_document_chunker
 
 logger = get_logger(__name__)
 
@@ -30,19 +33,45 @@ class DocumentMCPClient:
         self,
         query: str,
         filters: Optional[Dict[str, Any]] = None,
-        top_k: int = 5
+        top_k: int = 5,
+        include_embeddings: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Search documents by query string.
 
+        With DOCUMENT_SEARCH_LOCAL, the in-process hybrid (vector + BM25) index
+        of DOCUMENT_SEARCH_COLLECTION is searched instead of the MCP tool.
+
         Args:
             query: Search query
             filters: Optional filters (e.g., document type, date range)
             top_k: Number of results to return
+            include_embeddings: Add each document's stored vector as "embedding"
+                (local index only; the MCP tool returns none)
 
         Returns:
             List of matching documents with metadata
         """
+        if settings.DOCUMENT_SEARCH_LOCAL:
+            from app.services.vector_db import get_vector_db_service
+            found = await get_vector_db_service().hybrid_search_async(
+                settings.DOCUMENT_SEARCH_COLLECTION, query, n_results=top_k, where=filters or None,
+                include_embeddings=include_embeddings
+            )
+            documents = []
+            for result in found["results"]:
+                metadata = result.get("metadata") or {}
+                documents.append({
+                    "id": result["id"],
+                    "title": metadata.get("title") or metadata.get("source", "Untitled"),
+                    "content": result["document"],
+                    "score": result["score"],
+                    "metadata": metadata
+                })
+                if result.get("embedding") is not None:
+                    documents[-1]["embedding"] = result["embedding"]
+            return documents
+
         payload = {
             "query": query,
             "filters": filters or {},
@@ -53,6 +82,22 @@ class DocumentMCPClient:
         result = await self.client.call_tool("search_documents", payload)
         return result.get("results", [])
 
+    def document_set_version(self) -> Optional[int]:
+        """
+        Version of the searched document set, for invalidating derived results.
+
+        Only known for the local index (DOCUMENT_SEARCH_LOCAL); documents behind
+        the MCP tool can change without notice, so nothing derived from them
+        should be cached.
+
+        Returns:
+            Collection version, or None when unknown
+        """
+        if settings.DOCUMENT_SEARCH_LOCAL:
+            from app.services.vector_db import get_vector_db_service
+            return get_vector_db_service().collection_version(settings.DOCUMENT_SEARCH_COLLECTION)
+        return None
+
     async def fetch_document(self, document_id: str) -> Dict[str, Any]:
         """
         Fetch a specific document by ID.
@@ -144,26 +189,39 @@ class DocumentMCPClient:
     async def chunk_document(
         self,
         document_content: str,
-        chunk_size: int = 500,
-        overlap: int = 50
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Split document into chunks for RAG indexing.
 
+        Chunking runs in-process (see DocumentChunker) unless CHUNKING_LOCAL is
+        disabled, in which case the document is sent to the MCP tool.
+
         Args:
             document_content: Document text
-            chunk_size: Size of each chunk (in tokens/characters)
-            overlap: Overlap between chunks
+            chunk_size: Maximum tokens per chunk
+            overlap: Tokens shared by consecutive chunks
 
         Returns:
             List of document chunks with metadata
         """
+        if settings.CHUNKING_LOCAL:
+            chunker = get_document_chunker()
+            if chunk_size is not None or overlap is not None:
+                chunker = DocumentChunker(chunk_size or chunker.chunk_size, overlap, chunker.tokenizer)
+            chunks = await asyncio.to_thread(list, chunker.chunks(document_content))
+            return [
+                {"chunk_index": index, "content": chunk.text, "section": chunk.section, "tokens": chunk.tokens}
+                for index, chunk in enumerate(chunks)
+            ]
+
         payload = {
             "content": document_content,
-            "chunk_size": chunk_size,
-            "overlap": overlap
+            "chunk_size": chunk_size or settings.CHUNK_SIZE_TOKENS,
+            "overlap": settings.CHUNK_OVERLAP_TOKENS if overlap is None else overlap
         }
 
-        logger.info("Chunking document", chunk_size=chunk_size, overlap=overlap)
+        logger.info("Chunking document", chunk_size=payload["chunk_size"], overlap=payload["overlap"])
         result = await self.client.call_tool("chunk_document", payload)
         return result.get("chunks", [])
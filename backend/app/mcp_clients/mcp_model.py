@@ -4,6 +4,7 @@ MCP Model client for ONNX inference and image analysis.
 
 from typing import Any, Dict, List, Optional
 import base64
+import numpy as np
 from .mcp_base import ToolClient, get_mcp_client
 from app.core.logger import get_logger
 
@@ -134,7 +135,7 @@ class ModelMCPClient:
         self,
         text: str,
         model_name: str = "clinical_bert"
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         Generate text embedding using specified model.
 
@@ -143,7 +144,7 @@ class ModelMCPClient:
             model_name: Name of the embedding model
 
         Returns:
-            Embedding vector
+            float32 embedding vector
         """
         payload = {
             "text": text,
@@ -152,7 +153,7 @@ class ModelMCPClient:
 
         logger.info("Generating embedding", text_length=len(text))
         result = await self.client.call_tool("generate_embedding", payload)
-        return result.get("embedding", [])
+        return np.asarray(result.get("embedding", []), dtype=np.float32)
 
     async def batch_classify_images(
         self,
@@ -0,0 +1,91 @@
+"""
+Process-wide registry of MCP domain clients.
+All agents and routes resolve their MCP clients here so they share one tool client.
+"""
+
+from typing import Any, Dict, Optional
+from .mcp_base import SharedToolClient, get_mcp_client, get_connection_pool
+from .mcp_document import DocumentMCPClient
+from .mcp_db import DatabaseMCPClient
+from .mcp_model import ModelMCPClient
+from .mcp_payment import PaymentMCPClient
+from .mcp_notification import NotificationMCPClient
+
+
+class MCPClientRegistry:
+    """
+    Registry handing out shared domain clients backed by a single ToolClient.
+    """
+
+    def __init__(self, client: Optional[SharedToolClient] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            client: Optional shared tool client (defaults to the process-wide client)
+        """
+        self.client = client or get_mcp_client()
+        self._document: Optional[DocumentMCPClient] = None
+        self._database: Optional[DatabaseMCPClient] = None
+        self._model: Optional[ModelMCPClient] = None
+        self._payment: Optional[PaymentMCPClient] = None
+        self._notification: Optional[NotificationMCPClient] = None
+
+    @property
+    def document(self) -> DocumentMCPClient:
+        """Shared document client."""
+        if self._document is None:
+            self._document = DocumentMCPClient(client=self.client)
+        return self._document
+
+    @property
+    def database(self) -> DatabaseMCPClient:
+        """Shared database client."""
+        if self._database is None:
+            self._database = DatabaseMCPClient(client=self.client)
+        return self._database
+
+    @property
+    def model(self) -> ModelMCPClient:
+        """Shared model inference client."""
+        if self._model is None:
+            self._model = ModelMCPClient(client=self.client)
+        return self._model
+
+    @property
+    def payment(self) -> PaymentMCPClient:
+        """Shared payment client."""
+        if self._payment is None:
+            self._payment = PaymentMCPClient(client=self.client)
+        return self._payment
+
+    @property
+    def notification(self) -> NotificationMCPClient:
+        """Shared notification client."""
+        if self._notification is None:
+            self._notification = NotificationMCPClient(client=self.client)
+        return self._notification
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get per-tool latency/error counters and transport statistics.
+
+        Returns:
+            Combined MCP metrics
+        """
+        return {
+            **self.client.stats(),
+            "connection_pool": get_connection_pool().stats()
+        }
+
+
+# Global MCP client registry instance
+_mcp_registry = None
+
+
+def get_mcp_registry() -> MCPClientRegistry:
+    """Get global MCP client registry instance."""
+    global _mcp_registry
+    if _mcp_registry is None:
+        _mcp_registry = MCPClientRegistry()
+    return _mcp_registry
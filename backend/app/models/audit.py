@@ -2,7 +2,7 @@
 Audit log model for immutable tracking of clinical decisions and data access.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
 from sqlalchemy.sql import func
 from app.db.base import Base
 
@@ -11,6 +11,13 @@ class AuditLog(Base):
     """Audit log model for compliance and traceability."""
 
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Audit trail queries filter by one of these and sort by time
+        Index("ix_audit_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_audit_logs_session_id_timestamp", "session_id", "timestamp"),
+        Index("ix_audit_logs_event_type_timestamp", "event_type", "timestamp"),
+        Index("ix_audit_logs_agent_name_timestamp", "agent_name", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -33,7 +40,8 @@ class AuditLog(Base):
     # Event data (stored as JSON)
     input_data = Column(JSON, nullable=True)
     output_data = Column(JSON, nullable=True)
-    metadata = Column(JSON, nullable=True)
+    # "metadata" is reserved by the declarative API, so the attribute is renamed
+    event_metadata = Column("metadata", JSON, nullable=True)
 
     # Status
     success = Column(String, default="true")
@@ -43,7 +51,7 @@ class AuditLog(Base):
     provenance = Column(JSON, nullable=True)  # Links to source documents, previous decisions, etc.
 
     # Timestamps (immutable - never updated)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
 
     def __repr__(self):
         return (
@@ -0,0 +1,232 @@
+"""
+Semantic cache of final RAG answers, keyed by query embedding.
+
+A repeated or reworded question (cosine similarity at least the threshold) with
+the same filters and top-k, asked while the document set is unchanged, is
+answered from the cache instead of retrieving and generating again.
+"""
+
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+from collections import OrderedDict
+import json
+import re
+import threading
+import time
+import numpy as np
+from app.core.config import settings
+
+# Identifiers that make two similar questions different: numbers, codes, dates, names
+_SPECIFIC = re.compile(r"\w*\d[\w.\-/]*|(?<=[\w,;:] )[A-Z][a-z]+")
+
+
+def specific_terms(query: str) -> frozenset:
+    """
+    Terms of a query that must match exactly for a cached answer to apply.
+
+    Embeddings of "HbA1c for patient 1042" and "HbA1c for patient 1043" (or of
+    two patient names) are nearly identical, so tokens with digits and
+    capitalized words after the first are compared as a set on top of the
+    similarity threshold.
+
+    Args:
+        query: Query text
+
+    Returns:
+        Lowercased specific terms
+    """
+    return frozenset(term.lower() for term in _SPECIFIC.findall(query))
+
+
+def cache_scope(filters: Optional[Dict[str, Any]], top_k: int) -> str:
+    """Canonical form of the retrieval parameters an answer depends on."""
+    return json.dumps({"filters": filters or {}, "top_k": top_k}, sort_keys=True, default=str)
+
+
+class CachedAnswer(NamedTuple):
+    """A cache hit."""
+
+    value: Any
+    similarity: float
+    saved_ms: float
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe semantic cache with TTL and LRU eviction.
+
+    Query embeddings live in a preallocated float32 matrix, one row per slot, so
+    a lookup is one matrix-vector product over the live slots. Every lookup
+    carries the document-set version; when it changes, all entries are dropped,
+    since they were answered from the old documents. An answer computed under
+    an older version than the latest lookup's is not cached.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Min cosine similarity between queries for a hit
+            ttl_seconds: Lifetime of an entry
+            max_entries: Maximum number of entries
+        """
+        self.threshold = settings.RAG_ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl_seconds = ttl_seconds or settings.RAG_ANSWER_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.RAG_ANSWER_CACHE_MAX_ENTRIES
+
+        self._lock = threading.Lock()
+        self._version: Hashable = None
+        self._vectors: Optional[np.ndarray] = None  # allocated on first put
+        self._expires = np.zeros(self.max_entries, dtype=np.float64)  # 0 marks a free slot
+        self._scopes = np.zeros(self.max_entries, dtype=np.int64)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # slot -> (scope, terms, value, cost_ms), LRU order
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.saved_ms = 0.0
+
+    def _check_version(self, version: Hashable):
+        """Drop all entries if the version changed (caller holds the lock)."""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._expires[:] = 0
+            self._version = version
+
+    def _release(self, slot: int):
+        """Free a slot (caller holds the lock)."""
+        del self._entries[slot]
+        self._expires[slot] = 0
+
+    def get(self, embedding: np.ndarray, query: str, scope: str, version: Hashable = None) -> Optional[CachedAnswer]:
+        """
+        Look up the answer to a similar query.
+
+        Args:
+            embedding: Query embedding
+            query: Query text (for specific_terms)
+            scope: Retrieval parameters from cache_scope()
+            version: Document-set version the answer must have been computed under
+
+        Returns:
+            Cached answer, or None on a miss
+        """
+        scope_key = hash(scope)
+        terms = specific_terms(query)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            for slot in np.flatnonzero((self._expires > 0) & (self._expires <= now)):
+                self._release(int(slot))
+                self.expirations += 1
+
+            candidates = np.flatnonzero((self._expires > 0) & (self._scopes == scope_key))
+            if len(candidates):
+                query_vector = np.asarray(embedding, dtype=np.float32)
+                query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+                similarities = self._vectors[candidates] @ query_vector
+                for i in np.argsort(-similarities):
+                    if similarities[i] < self.threshold:
+                        break
+                    slot = int(candidates[i])
+                    entry_scope, entry_terms, value, cost_ms = self._entries[slot]
+                    if entry_scope == scope and entry_terms == terms:
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        self.saved_ms += cost_ms
+                        return CachedAnswer(value, float(similarities[i]), cost_ms)
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        embedding: np.ndarray,
+        query: str,
+        scope: str,
+        value: Any,
+        cost_ms: float,
+        version: Hashable = None
+    ):
+        """
+        Cache an answer, evicting the least recently used entry when full.
+
+        Args:
+            embedding: Query embedding
+            query: Query text (for specific_terms)
+            scope: Retrieval parameters from cache_scope()
+            value: Answer to cache
+            cost_ms: Time it took to compute the answer (reported as saved on hits)
+            version: Document-set version the answer was computed under
+        """
+        query_vector = np.asarray(embedding, dtype=np.float32)
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1.0)
+        with self._lock:
+            if version != self._version:
+                return  # the documents changed while it was being answered
+            if self._vectors is None or self._vectors.shape[1] != len(query_vector):
+                self._vectors = np.zeros((self.max_entries, len(query_vector)), dtype=np.float32)
+                self._entries.clear()
+                self._expires[:] = 0
+
+            free = np.flatnonzero(self._expires == 0)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot = next(iter(self._entries))
+                self._release(slot)
+                self.evictions += 1
+
+            self._vectors[slot] = query_vector
+            self._scopes[slot] = hash(scope)
+            self._expires[slot] = time.monotonic() + self.ttl_seconds
+            self._entries[slot] = (scope, specific_terms(query), value, cost_ms)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._expires[:] = 0
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Size, counters, hit rate and time saved
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 1),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+
+# Global answer cache instance
+_answer_cache = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """Get global answer cache instance."""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache()
+    return _answer_cache
@@ -0,0 +1,293 @@
+"""
+In-process document chunker for RAG indexing.
+
+Splits documents into token-bounded chunks along section headings, table rows,
+list items and sentences, measuring size with the embedding model's tokenizer.
+"""
+
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+import re
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+Span = Tuple[int, int]
+
+_RULE = re.compile(r"^\s*([-=_*~#])\1{3,}\s*$")
+_STRUCTURED = re.compile(
+    r"\S {2,}\S"                    # table row with aligned columns
+    r"|^\s*(?:\d+[.)]|[-*•])\s"     # numbered or bulleted item
+    r"|^\s{4,}\S"                   # indented continuation
+    r"|^[^\s:][^:]{0,40}:\s*\S"     # "Key: value" field
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_ABBREVIATION = re.compile(r"\b(?:Dr|Mr|Mrs|Ms|vs|No|St|approx|e\.g|i\.e)\.$", re.IGNORECASE)
+_WORD = re.compile(r"\w+|[^\w\s]")
+_LETTERS = re.compile(r"[^\W\d_]")
+
+
+class Chunk(NamedTuple):
+    """A chunk of document text."""
+
+    text: str
+    section: str
+    tokens: int
+
+
+class WordTokenizer:
+    """Approximate tokenizer (words and punctuation), used when the model tokenizer is unavailable."""
+
+    def spans(self, texts: List[str]) -> List[List[Span]]:
+        """Character spans of the tokens in each text."""
+        return [[match.span() for match in _WORD.finditer(text)] for text in texts]
+
+
+class ModelTokenizer:
+    """Adapter over a Hugging Face fast tokenizer."""
+
+    def __init__(self, tokenizer: Any):
+        """
+        Wrap a tokenizer.
+
+        Args:
+            tokenizer: transformers fast tokenizer (offset mapping support is required)
+        """
+        self.tokenizer = tokenizer
+        # Call the Rust tokenizer directly: no truncation, padding or Python-side tensors
+        self.backend = tokenizer.backend_tokenizer
+        self.backend.no_truncation()
+        self.backend.no_padding()
+
+    def spans(self, texts: List[str]) -> List[List[Span]]:
+        """Character spans of the tokens in each text (one batched call)."""
+        return [encoding.offsets for encoding in self.backend.encode_batch(texts, add_special_tokens=False)]
+
+
+def load_tokenizer(name: Optional[str] = None) -> Union[ModelTokenizer, WordTokenizer]:
+    """
+    Load the tokenizer used to measure chunks.
+
+    Args:
+        name: Tokenizer name or path (defaults to CHUNK_TOKENIZER, then the embedding model)
+
+    Returns:
+        Model tokenizer, or the approximate word tokenizer if it cannot be loaded
+    """
+    name = name or settings.CHUNK_TOKENIZER or settings.EMBEDDING_MODEL
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name, use_fast=True)
+        if not tokenizer.is_fast:
+            raise ValueError("a fast tokenizer is required for offset mapping")
+        return ModelTokenizer(tokenizer)
+    except Exception as e:
+        logger.warning(f"Tokenizer {name} unavailable: {str(e)}. Using approximate word counts.")
+        return WordTokenizer()
+
+
+def _is_heading(line: str) -> bool:
+    """Whether a line is a section heading (short, all caps, not a field or table row)."""
+    return (
+        len(line) <= 80
+        and line == line.upper()
+        and ":" not in line
+        and len(_LETTERS.findall(line)) >= 3
+        and not _STRUCTURED.search(line)
+    )
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Split prose into sentences, keeping common abbreviations intact."""
+    sentences: List[str] = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        if _ABBREVIATION.search(text, start, match.start()):
+            continue
+        sentences.append(text[start:match.start()])
+        start = match.end()
+    sentences.append(text[start:])
+    return [sentence for sentence in sentences if sentence]
+
+
+class DocumentChunker:
+    """
+    Token-aware, section- and sentence-aware chunker.
+
+    Headings (short all-caps lines) start a new section and are repeated at the
+    top of each of its chunks. Within a section, table rows, list items and
+    "Key: value" lines are kept whole, prose is split into sentences, and these
+    units are packed into chunks of at most chunk_size tokens. Consecutive chunks
+    of a section share up to `overlap` tokens of trailing units; a unit longer
+    than a chunk is cut into overlapping token windows.
+    """
+
+    TOKENIZE_BATCH = 256
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        overlap: Optional[int] = None,
+        tokenizer: Optional[Union[ModelTokenizer, WordTokenizer]] = None
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size: Maximum tokens per chunk
+            overlap: Tokens shared by consecutive chunks of a section
+            tokenizer: Tokenizer adapter (defaults to the embedding model's)
+        """
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE_TOKENS
+        self.overlap = settings.CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+        if self.overlap >= self.chunk_size:
+            raise ValueError("overlap must be smaller than chunk_size")
+        self.tokenizer = tokenizer or load_tokenizer()
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """Token count of each text."""
+        return [len(spans) for spans in self.tokenizer.spans(texts)]
+
+    def chunks(self, document: Union[str, Iterable[str]]) -> Iterator[Chunk]:
+        """
+        Chunk a document.
+
+        Args:
+            document: Document text, or an iterable of pages (e.g. from a PDF reader)
+                so the whole document never has to be in memory
+
+        Yields:
+            Chunks in document order
+        """
+        section = ""
+        section_tokens = 0
+        budget = self.chunk_size
+        current: List[Tuple[str, int]] = []
+        used = 0
+
+        for text, is_heading, tokens in self._measured(self._units(document)):
+            if is_heading:
+                # New section: flush without carrying overlap across the heading
+                if current:
+                    yield self._chunk(section, section_tokens, current)
+                    current, used = [], 0
+                section, section_tokens = text, tokens + 1
+                budget = max(self.chunk_size - section_tokens, self.overlap + 1)
+                continue
+
+            if tokens > budget:
+                if current:
+                    yield self._chunk(section, section_tokens, current)
+                    current, used = [], 0
+                for piece, piece_tokens in self._windows(text, budget):
+                    yield self._chunk(section, section_tokens, [(piece, piece_tokens)])
+                continue
+
+            if current and used + tokens > budget:
+                yield self._chunk(section, section_tokens, current)
+                current = self._tail(current, budget - tokens)
+                used = sum(n for _, n in current)
+            current.append((text, tokens))
+            used += tokens
+
+        if current:
+            yield self._chunk(section, section_tokens, current)
+
+    def _measured(self, units: Iterator[Tuple[str, bool]]) -> Iterator[Tuple[str, bool, int]]:
+        """Attach token counts, tokenizing TOKENIZE_BATCH units per call."""
+        batch: List[Tuple[str, bool]] = []
+        for unit in units:
+            batch.append(unit)
+            if len(batch) == self.TOKENIZE_BATCH:
+                yield from self._count_batch(batch)
+                batch = []
+        if batch:
+            yield from self._count_batch(batch)
+
+    def _count_batch(self, batch: List[Tuple[str, bool]]) -> Iterator[Tuple[str, bool, int]]:
+        """Token counts for one batch of units."""
+        counts = self.count_tokens([text for text, _ in batch])
+        for (text, is_heading), tokens in zip(batch, counts):
+            yield text, is_heading, tokens
+
+    def _units(self, document: Union[str, Iterable[str]]) -> Iterator[Tuple[str, bool]]:
+        """
+        Split lines into (text, is_heading) units.
+
+        Headings, table rows, list items and fields are units of their own;
+        consecutive prose lines are joined and split into sentences. Rule lines
+        and blank lines only end a run of prose.
+        """
+        prose: List[str] = []
+
+        for line in self._lines(document):
+            stripped = line.strip()
+            if not stripped or _RULE.match(stripped):
+                heading = False
+            elif _is_heading(stripped):
+                heading = True
+            elif _STRUCTURED.search(line):
+                heading = False
+            else:
+                prose.append(stripped)
+                continue
+
+            if prose:
+                for sentence in _split_sentences(" ".join(prose)):
+                    yield sentence, False
+                prose.clear()
+            if heading:
+                yield " ".join(stripped.split()), True
+            elif stripped and not _RULE.match(stripped):
+                yield stripped, False
+
+        if prose:
+            for sentence in _split_sentences(" ".join(prose)):
+                yield sentence, False
+
+    @staticmethod
+    def _lines(document: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Lines of a document or of each page in turn."""
+        pages = [document] if isinstance(document, str) else document
+        for page in pages:
+            yield from page.splitlines()
+            yield ""
+
+    def _windows(self, text: str, budget: int) -> Iterator[Tuple[str, int]]:
+        """Cut a long unit into overlapping windows of at most `budget` tokens."""
+        spans = self.tokenizer.spans([text])[0]
+        step = budget - self.overlap
+        for start in range(0, max(len(spans) - self.overlap, 1), step):
+            window = spans[start:start + budget]
+            yield text[window[0][0]:window[-1][1]], len(window)
+
+    def _tail(self, units: List[Tuple[str, int]], room: int) -> List[Tuple[str, int]]:
+        """Trailing units to repeat in the next chunk (at most `overlap` tokens that still fit)."""
+        limit = min(self.overlap, room)
+        tail: List[Tuple[str, int]] = []
+        used = 0
+        for unit, tokens in reversed(units):
+            if used + tokens > limit:
+                break
+            tail.insert(0, (unit, tokens))
+            used += tokens
+        return tail
+
+    @staticmethod
+    def _chunk(section: str, section_tokens: int, units: List[Tuple[str, int]]) -> Chunk:
+        """Build a chunk, prefixed with its section heading."""
+        body = "\n".join(unit for unit, _ in units)
+        tokens = section_tokens + sum(n for _, n in units)
+        return Chunk(f"{section}\n{body}" if section else body, section, tokens)
+
+
+# Global chunker instance
+_document_chunker = None
+
+
+def get_document_chunker() -> DocumentChunker:
+    """Get global document chunker instance."""
+    global _document_chunker
+    if _document_chunker is None:
+        _document_chunker = DocumentChunker()
+    return _document_chunker
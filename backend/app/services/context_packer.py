@@ -0,0 +1,246 @@
+"""
+Token-budgeted context assembly for RAG prompts.
+
+Retrieved documents are ordered by maximal marginal relevance (MMR) so
+near-duplicate chunks are dropped, then packed into the token budget whole where
+they fit, with at most one document cut at a sentence boundary to use the rest.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from bisect import bisect_right
+from collections import OrderedDict
+import re
+import threading
+import numpy as np
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+Embed = Callable[[List[str]], np.ndarray]
+
+SEPARATOR = "\n---\n"
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+class PackedContext(NamedTuple):
+    """Context assembled for a prompt."""
+
+    text: str
+    tokens: int
+    documents: List[Dict[str, Any]]
+    duplicates: int
+    truncated: int
+
+
+def _default_embed(texts: List[str]) -> np.ndarray:
+    """Embed with the shared embedding service (cached texts cost no forward pass)."""
+    from app.services.embedding_service import get_embedding_service
+    return get_embedding_service().encode(texts)
+
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class ContextPacker:
+    """
+    Packs retrieved documents into a token budget.
+
+    Token counts come from the embedding model's tokenizer (the chunker's). The
+    MMR order trades relevance (to the query embedding, or the retrieval score)
+    against similarity to documents already chosen; a document at least
+    `duplicate_threshold` similar to a chosen one is dropped. Similarities use
+    the vectors retrieval returned with the documents ("embedding"), so only
+    documents without one are encoded. Documents are then taken whole in that order,
+    skipping any that do not fit so smaller ones can still use the budget, and
+    the first skipped document is cut at the last sentence or line boundary
+    that fits, if at least `min_cut_tokens` remain.
+
+    Token offsets are cached per text (LRU), since the same chunks and titles
+    are retrieved again and again.
+    """
+
+    TOKEN_CACHE_SIZE = 4096
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+        duplicate_threshold: Optional[float] = None,
+        min_cut_tokens: Optional[int] = None,
+        tokenizer: Optional[Any] = None,
+        embed: Optional[Embed] = None
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            max_tokens: Token budget for the whole context
+            mmr_lambda: Relevance weight in MMR (1.0 ignores redundancy)
+            duplicate_threshold: Cosine similarity at which a document counts as a duplicate
+            min_cut_tokens: Smallest useful cut of a document that does not fit
+            tokenizer: Tokenizer adapter with spans() (defaults to the chunker's)
+            embed: Function embedding a list of texts (defaults to the embedding service)
+        """
+        self.max_tokens = max_tokens or settings.RAG_CONTEXT_MAX_TOKENS
+        self.mmr_lambda = settings.RAG_CONTEXT_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        self.duplicate_threshold = (
+            settings.RAG_CONTEXT_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold
+        )
+        self.min_cut_tokens = settings.RAG_CONTEXT_MIN_CUT_TOKENS if min_cut_tokens is None else min_cut_tokens
+        self._tokenizer = tokenizer
+        self.embed = embed or _default_embed
+        self._token_ends: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._token_lock = threading.Lock()
+
+    @property
+    def tokenizer(self) -> Any:
+        """Tokenizer adapter, loaded on first use."""
+        if self._tokenizer is None:
+            from app.services.chunker import get_document_chunker
+            self._tokenizer = get_document_chunker().tokenizer
+        return self._tokenizer
+
+    def token_ends(self, texts: List[str]) -> List[List[int]]:
+        """
+        End offsets of the tokens of each text.
+
+        Args:
+            texts: Texts to tokenize
+
+        Returns:
+            Character offset where each token ends, per text
+        """
+        with self._token_lock:
+            found = [self._token_ends.get(text) for text in texts]
+            for text, ends in zip(texts, found):
+                if ends is not None:
+                    self._token_ends.move_to_end(text)
+        missing = list(dict.fromkeys(text for text, ends in zip(texts, found) if ends is None))
+        if missing:
+            computed = {
+                text: [end for _, end in spans] for text, spans in zip(missing, self.tokenizer.spans(missing))
+            }
+            with self._token_lock:
+                self._token_ends.update(computed)
+                while len(self._token_ends) > self.TOKEN_CACHE_SIZE:
+                    self._token_ends.popitem(last=False)
+            found = [computed[text] if ends is None else ends for text, ends in zip(texts, found)]
+        return found
+
+    def pack(self, documents: List[Dict[str, Any]], query_embedding: Optional[np.ndarray] = None) -> PackedContext:
+        """
+        Assemble context from retrieved documents.
+
+        Args:
+            documents: Retrieved documents ({"content", "title", "score", optional "embedding"}), best first
+            query_embedding: Optional query embedding used as MMR relevance instead of the scores
+
+        Returns:
+            Packed context and the documents it contains, in context order
+        """
+        documents = [doc for doc in documents if doc.get("content")]
+        if not documents:
+            return PackedContext("", 0, [], 0, 0)
+
+        order, duplicates = self._mmr_order(documents, query_embedding)
+        contents = [documents[i]["content"] for i in order]
+        headers = [f"[{documents[i].get('title', 'Untitled')}]\n" for i in order]
+        all_ends = self.token_ends(contents + [header + "\n" + SEPARATOR for header in headers])
+        ends, overheads = all_ends[:len(order)], [len(e) for e in all_ends[len(order):]]
+
+        # Whole documents first, in MMR order, skipping those that do not fit
+        remaining = self.max_tokens
+        chosen: Dict[int, str] = {}
+        skipped: List[int] = []
+        for position, doc_ends in enumerate(ends):
+            cost = len(doc_ends) + overheads[position]
+            if cost <= remaining:
+                chosen[position] = contents[position]
+                remaining -= cost
+            else:
+                skipped.append(position)
+
+        # Then one cut at a sentence boundary
+        truncated = 0
+        if skipped:
+            position = skipped[0]
+            room = remaining - overheads[position]
+            if room >= self.min_cut_tokens:
+                cut, tokens = self._cut(contents[position], ends[position], room)
+                if cut:
+                    chosen[position] = cut
+                    remaining -= tokens + overheads[position]
+                    truncated = 1
+
+        packed = []
+        parts = []
+        for position in sorted(chosen):
+            packed.append({**documents[order[position]], "content": chosen[position]})
+            parts.append(f"{headers[position]}{chosen[position]}\n")
+        return PackedContext(SEPARATOR.join(parts), self.max_tokens - remaining, packed, duplicates, truncated)
+
+    def _mmr_order(self, documents: List[Dict[str, Any]], query_embedding: Optional[np.ndarray]) -> Tuple[List[int], int]:
+        """Document indices in MMR order, and how many were dropped as duplicates."""
+        if len(documents) == 1:
+            return [0], 0
+        try:
+            # Stored vectors from retrieval where present; only the rest are encoded
+            missing = [doc["content"] for doc in documents if doc.get("embedding") is None]
+            encoded = iter(np.asarray(self.embed(missing), dtype=np.float32) if missing else ())
+            vectors = np.stack([
+                np.asarray(doc["embedding"], dtype=np.float32) if doc.get("embedding") is not None else next(encoded)
+                for doc in documents
+            ])
+        except Exception as e:
+            logger.warning(f"Context packing without de-duplication: {str(e)}")
+            return list(range(len(documents))), 0
+
+        vectors = _unit_rows(vectors)
+        if query_embedding is not None:
+            relevance = vectors @ _unit_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        else:
+            scores = np.array([float(doc.get("score") or 0.0) for doc in documents], dtype=np.float32)
+            top = scores.max()
+            # Rank-based relevance when scores are missing or not comparable
+            relevance = scores / top if top > 0 else np.linspace(1.0, 0.5, len(documents), dtype=np.float32)
+        similarity = vectors @ vectors.T
+
+        order: List[int] = []
+        candidates = list(range(len(documents)))
+        redundancy = np.zeros(len(documents), dtype=np.float32)
+        duplicates = 0
+        while candidates:
+            values = self.mmr_lambda * relevance[candidates] - (1 - self.mmr_lambda) * redundancy[candidates]
+            best = candidates[int(np.argmax(values))]
+            order.append(best)
+            redundancy = np.maximum(redundancy, similarity[best])
+            kept = [i for i in candidates if i != best and similarity[best, i] < self.duplicate_threshold]
+            duplicates += len(candidates) - 1 - len(kept)
+            candidates = kept
+        return order, duplicates
+
+    @staticmethod
+    def _cut(content: str, ends: List[int], room: int) -> Tuple[str, int]:
+        """Longest prefix ending at a sentence or line boundary with at most `room` tokens, and its token count."""
+        best, best_tokens = "", 0
+        for match in _BOUNDARY.finditer(content):
+            tokens = bisect_right(ends, match.start())
+            if tokens > room:
+                break
+            best, best_tokens = content[:match.start()], tokens
+        return best.strip(), best_tokens
+
+
+# Global context packer instance
+_context_packer = None
+
+
+def get_context_packer() -> ContextPacker:
+    """Get global context packer instance."""
+    global _context_packer
+    if _context_packer is None:
+        _context_packer = ContextPacker()
+    return _context_packer
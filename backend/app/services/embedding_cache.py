@@ -0,0 +1,298 @@
+"""
+Two-tier embedding cache: in-memory LRU over a memory-mapped on-disk store.
+"""
+
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+KEY_BYTES = 16
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache lookups.
+
+    Only differences the tokenizer ignores are removed (Unicode composition and
+    runs of whitespace); case is kept, since cased models embed it.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only on-disk embedding store.
+
+    Vectors live in a float32 memory-mapped matrix (vectors.f32) that grows by
+    doubling; the key of row i is record i of keys.bin. A vector is flushed before its
+    key is appended, so a crash never leaves a key pointing at an unwritten row. The
+    secret used to hash keys is kept next to the store (mode 0600), so the cache never
+    holds text or digests that can be brute-forced back to short inputs.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, directory: str, model_name: str, dimension: int):
+        """
+        Open (or create) the store.
+
+        Args:
+            directory: Store directory
+            model_name: Embedding model name (a different model resets the store)
+            dimension: Embedding dimension
+        """
+        self.directory = Path(directory)
+        self.dimension = dimension
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._meta_path = self.directory / "meta.json"
+        self._keys_path = self.directory / "keys.bin"
+        self._vectors_path = self.directory / "vectors.f32"
+        self.secret = self._load_secret()
+
+        meta = {"model": model_name, "dimension": dimension}
+        if not self._meta_path.exists() or json.loads(self._meta_path.read_text()) != meta:
+            for path in (self._keys_path, self._vectors_path):
+                if path.exists():
+                    path.unlink()
+            self._meta_path.write_text(json.dumps(meta))
+
+        self.index: Dict[bytes, int] = {}
+        self.rows = 0
+        if self._keys_path.exists():
+            data = self._keys_path.read_bytes()
+            self.rows = len(data) // KEY_BYTES
+            for row in range(self.rows):
+                self.index[data[row * KEY_BYTES:(row + 1) * KEY_BYTES]] = row
+            if len(data) % KEY_BYTES:
+                # Drop a key record torn by a crash
+                with open(self._keys_path, "r+b") as keys_file:
+                    keys_file.truncate(self.rows * KEY_BYTES)
+
+        self._keys_file = open(self._keys_path, "ab")
+        self._vectors: Optional[np.memmap] = None
+        self._open_vectors(max(self.INITIAL_CAPACITY, self.rows))
+
+    def _load_secret(self) -> bytes:
+        """Load or create the per-store hashing secret."""
+        path = self.directory / "key"
+        if path.exists():
+            return path.read_bytes()
+        secret = os.urandom(32)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as key_file:
+            key_file.write(secret)
+        return secret
+
+    def _open_vectors(self, capacity: int):
+        """Map the vector file with room for at least `capacity` rows."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+
+        size = capacity * self.dimension * 4
+        with open(self._vectors_path, "ab") as vectors_file:
+            if vectors_file.tell() < size:
+                vectors_file.truncate(size)
+
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        """Copy a stored vector out of the map, or None."""
+        row = self.index.get(key)
+        if row is None:
+            return None
+        return np.array(self._vectors[row])
+
+    def put_many(self, keys: List[bytes], vectors: List[np.ndarray]):
+        """Append vectors for keys not stored yet (one flush per call)."""
+        new = {}
+        for key, vector in zip(keys, vectors):
+            if key not in self.index and key not in new:
+                new[key] = vector
+        if not new:
+            return
+
+        needed = self.rows + len(new)
+        if needed > self._vectors.shape[0]:
+            capacity = self._vectors.shape[0]
+            while capacity < needed:
+                capacity *= 2
+            self._open_vectors(capacity)
+
+        self._vectors[self.rows:needed] = np.stack(list(new.values()))
+        self._vectors.flush()
+        self._keys_file.write(b"".join(new))
+        self._keys_file.flush()
+        for row, key in enumerate(new, start=self.rows):
+            self.index[key] = row
+        self.rows = needed
+
+    @property
+    def bytes(self) -> int:
+        """Bytes used by stored vectors."""
+        return self.rows * self.dimension * 4
+
+    def close(self):
+        """Flush and close the store."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        self._keys_file.close()
+
+
+class EmbeddingCache:
+    """
+    Embedding cache with an in-memory LRU tier (bounded by bytes) in front of an
+    optional DiskEmbeddingStore. Vectors are stored and returned as float32 arrays.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dimension: int,
+        memory_bytes: Optional[int] = None,
+        directory: Optional[str] = None,
+        disk_enabled: Optional[bool] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            model_name: Embedding model name
+            dimension: Embedding dimension
+            memory_bytes: Memory tier cap in bytes
+            directory: Disk tier directory
+            disk_enabled: Whether to use the disk tier
+        """
+        self.model_name = model_name
+        self.dimension = dimension
+        self.memory_bytes = memory_bytes or settings.EMBEDDING_CACHE_MEMORY_BYTES
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+
+        if disk_enabled is None:
+            disk_enabled = settings.EMBEDDING_CACHE_DISK_ENABLED
+        self.disk: Optional[DiskEmbeddingStore] = None
+        if disk_enabled:
+            try:
+                self.disk = DiskEmbeddingStore(directory or settings.EMBEDDING_CACHE_DIR, model_name, dimension)
+            except OSError as e:
+                logger.warning(f"Embedding disk cache unavailable: {str(e)}. Using memory only.")
+
+        self._secret = self.disk.secret if self.disk is not None else os.urandom(32)
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> bytes:
+        """Cache key for a text under this cache's model."""
+        data = f"{self.model_name}\0{normalize_text(text)}".encode("utf-8", "surrogatepass")
+        return hashlib.blake2b(data, digest_size=KEY_BYTES, key=self._secret).digest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Embedding per text (the caller's own copy), None for misses
+        """
+        keys = [self.key(text) for text in texts]
+        found: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                elif self.disk is not None and (vector := self.disk.get(key)) is not None:
+                    self.disk_hits += 1
+                    self._remember(key, vector)
+                else:
+                    self.misses += 1
+                # Copies, so a caller modifying its vector cannot corrupt the cache
+                found.append(None if vector is None else vector.copy())
+        return found
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """
+        Cache embeddings.
+
+        Args:
+            texts: Texts that were encoded
+            vectors: Their embeddings, one row per text
+        """
+        keys = [self.key(text) for text in texts]
+        # Own copies, so a cached row does not pin the whole batch in memory
+        copies = [np.array(vector, dtype=np.float32) for vector in vectors]
+
+        with self._lock:
+            for key, vector in zip(keys, copies):
+                self._remember(key, vector)
+            if self.disk is not None:
+                try:
+                    self.disk.put_many(keys, copies)
+                except OSError as e:
+                    logger.warning(f"Embedding disk cache write failed: {str(e)}. Disabling disk tier.")
+                    self.disk = None
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        """Insert into the memory tier, evicting least recently used vectors (caller holds the lock)."""
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= previous.nbytes
+        self._memory[key] = vector
+        self._memory_used += vector.nbytes
+
+        while self._memory_used > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= evicted.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Hit ratios and bytes used per tier
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_used,
+            "memory_max_bytes": self.memory_bytes,
+            "disk_entries": self.disk.rows if self.disk is not None else 0,
+            "disk_bytes": self.disk.bytes if self.disk is not None else 0,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        """Close the disk tier."""
+        if self.disk is not None:
+            self.disk.close()
@@ -2,54 +2,320 @@
 Embedding service for generating text embeddings.
 """
 
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future
+import asyncio
+import queue
+import threading
+import time
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.embedding_cache import EmbeddingCache
 
 logger = get_logger(__name__)
 
 
+class EmbeddingBatcher:
+    """
+    Dynamic micro-batcher in front of an embedding model.
+
+    Concurrent single-text requests are queued and gathered by a worker thread for up
+    to max_wait_ms or max_batch_size texts, then encoded in one forward pass. Each
+    caller's future resolves to its own row of the batch. Duplicate texts within a
+    batch are encoded once.
+    """
+
+    def __init__(
+        self,
+        encode_batch: Callable[[List[str]], np.ndarray],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """
+        Initialize the batcher (the worker thread starts on first use).
+
+        Args:
+            encode_batch: Function encoding a list of texts into a 2-D array
+            max_batch_size: Maximum texts per forward pass
+            max_wait_ms: Maximum time the first queued text waits for others
+        """
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_BATCH_MAX_SIZE
+        self.max_wait = (settings.EMBEDDING_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Counters
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the worker thread."""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue a text for encoding.
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            Future resolving to the text's embedding
+        """
+        if not self.running:
+            self.start()
+
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    async def encode(self, text: str) -> np.ndarray:
+        """
+        Encode a text without blocking the event loop.
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            Embedding vector
+        """
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        """Wait for a request, then gather more until the batch is full or the wait expires."""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Worker thread loop."""
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._encode(batch)
+
+    def _encode(self, batch: List[Tuple[str, Future]]):
+        """Run one forward pass and resolve every future in the batch."""
+        # Skip callers that gave up (e.g. cancelled by a deadline)
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        rows: Dict[str, int] = {}
+        for text, _ in batch:
+            rows.setdefault(text, len(rows))
+
+        try:
+            embeddings = self.encode_batch(list(rows))
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Embedding batch of {len(rows)} texts failed: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_size_histogram[len(rows)] = self.batch_size_histogram.get(len(rows), 0) + 1
+
+        for text, future in batch:
+            future.set_result(embeddings[rows[text]])
+
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """Stop the worker thread after the current batch."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batcher statistics.
+
+        Returns:
+            Queue depth, counters and the batch size distribution
+        """
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items()))
+        }
+
+
 class EmbeddingService:
     """Service for generating embeddings from text."""
 
-    def __init__(self, model_name: str = None):
+    def __init__(
+        self,
+        model_name: str = None,
+        batching_enabled: Optional[bool] = None,
+        cache_enabled: Optional[bool] = None
+    ):
         """
         Initialize embedding service.
 
         Args:
             model_name: Name of the embedding model
+            batching_enabled: Route single-text requests through the micro-batcher
+            cache_enabled: Cache embeddings by content hash (memory and disk)
         """
         self.model_name = model_name or settings.EMBEDDING_MODEL
         logger.info(f"Loading embedding model: {self.model_name}")
         self.model = SentenceTransformer(self.model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
         logger.info("Embedding model loaded successfully")
 
-    def encode(self, texts: List[str]) -> List[List[float]]:
+        if cache_enabled is None:
+            cache_enabled = settings.EMBEDDING_CACHE_ENABLED
+        self.cache = EmbeddingCache(self.model_name, self.dimension) if cache_enabled else None
+
+        if batching_enabled is None:
+            batching_enabled = settings.EMBEDDING_BATCHING_ENABLED
+        self.batcher = EmbeddingBatcher(self._encode_batch) if batching_enabled else None
+
+    def _model_encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Run the model over texts.
+
+        The model stacks its batches into one tensor and `.numpy()` shares that
+        buffer, so no per-row arrays or Python floats are created.
+
+        Returns:
+            Contiguous float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        tensor = self.model.encode(texts, batch_size=batch_size, convert_to_tensor=True)
+        return np.ascontiguousarray(tensor.detach().cpu().numpy(), dtype=np.float32)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode texts in a single forward pass and cache the results."""
+        embeddings = self._model_encode(texts, batch_size=len(texts))
+        if self.cache is not None:
+            self.cache.put_many(texts, embeddings)
+        return embeddings
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
         """
         Generate embeddings for a list of texts.
 
+        Only texts missing from the cache are sent to the model.
+
         Args:
             texts: List of text strings
+            batch_size: Texts per forward pass
 
         Returns:
-            List of embedding vectors
+            Contiguous float32 array with one embedding per row
         """
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        if self.cache is None:
+            return self._model_encode(texts, batch_size)
+
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing: Dict[str, List[int]] = {}
+        for i, (text, vector) in enumerate(zip(texts, self.cache.get_many(texts))):
+            if vector is None:
+                missing.setdefault(text, []).append(i)
+            else:
+                embeddings[i] = vector
+
+        if missing:
+            encoded = self._model_encode(list(missing), batch_size)
+            self.cache.put_many(list(missing), encoded)
+            for vector, rows in zip(encoded, missing.values()):
+                embeddings[rows] = vector
 
-    def encode_single(self, text: str) -> List[float]:
+        return embeddings
+
+    def encode_single(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
 
+        Concurrent calls (e.g. from request threads) are batched together.
+
         Args:
             text: Text string
 
         Returns:
-            Embedding vector
+            float32 embedding vector
+        """
+        cached = self._cached(text)
+        if cached is not None:
+            return cached
+
+        if self.batcher is not None:
+            return self.batcher.submit(text).result()
+
+        return self._encode_batch([text])[0]
+
+    async def encode_single_async(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text without blocking the event loop.
+
+        Concurrent calls are batched into one forward pass.
+
+        Args:
+            text: Text string
+
+        Returns:
+            float32 embedding vector
         """
-        embedding = self.model.encode([text], convert_to_numpy=True)[0]
-        return embedding.tolist()
+        cached = self._cached(text)
+        if cached is not None:
+            return cached
+
+        if self.batcher is not None:
+            return await self.batcher.encode(text)
+
+        return (await asyncio.to_thread(self._encode_batch, [text]))[0]
+
+    def _cached(self, text: str) -> Optional[np.ndarray]:
+        """Cached embedding for a text, if any."""
+        if self.cache is None:
+            return None
+        return self.cache.get_many([text])[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get embedding service statistics."""
+        return {
+            "model": self.model_name,
+            "batcher": self.batcher.stats() if self.batcher is not None else None,
+            "cache": self.cache.stats() if self.cache is not None else None
+        }
 
 
 # Global embedding service instance
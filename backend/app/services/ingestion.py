@@ -0,0 +1,170 @@
+"""
+Streaming document ingestion: chunk, encode and upsert in bounded pages.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import hashlib
+import time
+import numpy as np
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.chunker import Chunk, get_document_chunker
+
+logger = get_logger(__name__)
+
+# A document is plain text or {"content": str, "id": Optional[str], "metadata": Optional[dict]}
+Document = Union[str, Dict[str, Any]]
+Chunker = Callable[[str], Iterable[Union[str, Chunk]]]
+Upsert = Callable[[List[str], List[str], List[Dict[str, Any]], np.ndarray], None]
+
+
+def chunk_id(source: str, text: str) -> str:
+    """
+    Stable ID for a chunk, derived from its source document and its text.
+
+    Re-ingesting the same document produces the same IDs, so upserts are idempotent.
+
+    Args:
+        source: Source document ID ("" when unknown)
+        text: Chunk text
+
+    Returns:
+        32-character hex ID
+    """
+    data = f"{source}\0{text}".encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@dataclass
+class IngestStats:
+    """Progress of an ingestion run."""
+
+    documents: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    pages: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def seconds(self) -> float:
+        """Elapsed time since the run started."""
+        return time.perf_counter() - self.started
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Upserted chunks per second."""
+        return self.chunks / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for logs and API responses."""
+        return {
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "duplicates": self.duplicates,
+            "pages": self.pages,
+            "seconds": round(self.seconds, 3),
+            "chunks_per_second": round(self.chunks_per_second, 1)
+        }
+
+
+def _iter_chunks(
+    documents: Iterable[Document],
+    chunker: Chunker,
+    stats: IngestStats
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Lazily chunk documents into (id, text, metadata) triples."""
+    for document in documents:
+        if isinstance(document, str):
+            document = {"content": document}
+        stats.documents += 1
+
+        metadata = dict(document.get("metadata") or {})
+        source = str(document.get("id") or metadata.get("source") or "")
+        if source:
+            metadata["document_id"] = source
+
+        for index, chunk in enumerate(chunker(document["content"])):
+            if isinstance(chunk, Chunk):
+                text, extra = chunk.text, {"section": chunk.section}
+            else:
+                text, extra = chunk, {}
+            yield chunk_id(source, text), text, {**metadata, **extra, "chunk_index": index}
+
+
+def _iter_pages(
+    chunks: Iterator[Tuple[str, str, Dict[str, Any]]],
+    page_size: int,
+    stats: IngestStats
+) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]]]]:
+    """Group chunks into pages of unique IDs."""
+    page: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    for cid, text, metadata in chunks:
+        if cid in page:
+            stats.duplicates += 1
+            continue
+        page[cid] = (text, metadata)
+        if len(page) == page_size:
+            yield list(page), [text for text, _ in page.values()], [meta for _, meta in page.values()]
+            page = {}
+    if page:
+        yield list(page), [text for text, _ in page.values()], [meta for _, meta in page.values()]
+
+
+def ingest_documents(
+    documents: Iterable[Document],
+    encode: Callable[[List[str]], np.ndarray],
+    upsert: Upsert,
+    page_size: Optional[int] = None,
+    chunker: Optional[Chunker] = None,
+    progress: Optional[Callable[[IngestStats], None]] = None
+) -> IngestStats:
+    """
+    Ingest a stream of documents.
+
+    Documents are pulled from the iterator only as pages fill. A page is encoded
+    while the previous one is upserted on a background thread, so at most two
+    pages are held at once and memory does not grow with corpus size.
+
+    Args:
+        documents: Iterable of documents (may be a generator)
+        encode: Function encoding a list of texts into a float32 matrix
+        upsert: Function storing (ids, texts, metadatas, embeddings)
+        page_size: Chunks per encode/upsert page
+        chunker: Function splitting document text into chunks (defaults to the
+            shared DocumentChunker)
+        progress: Optional callback invoked with the stats after each page
+
+    Returns:
+        Final ingestion stats
+    """
+    page_size = page_size or settings.INGEST_PAGE_SIZE
+    chunker = chunker or get_document_chunker().chunks
+    stats = IngestStats()
+
+    def complete(future: Future):
+        stats.chunks += future.result()
+        stats.pages += 1
+        logger.info(
+            f"Ingested {stats.chunks} chunks from {stats.documents} documents "
+            f"({stats.chunks_per_second:.1f} chunks/s)"
+        )
+        if progress is not None:
+            progress(stats)
+
+    def store(ids, texts, metadatas, embeddings) -> int:
+        upsert(ids, texts, metadatas, embeddings)
+        return len(ids)
+
+    pending: Optional[Future] = None
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-upsert") as executor:
+        for ids, texts, metadatas in _iter_pages(_iter_chunks(documents, chunker, stats), page_size, stats):
+            embeddings = encode(texts)
+            if pending is not None:
+                complete(pending)
+            pending = executor.submit(store, ids, texts, metadatas, embeddings)
+        if pending is not None:
+            complete(pending)
+
+    return stats
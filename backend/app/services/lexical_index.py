@@ -0,0 +1,225 @@
+"""
+In-process BM25 index for keyword retrieval alongside the vector index.
+
+Exact terms such as drug names, lab codes and ICD-10 codes ("E11.9") are kept
+as single tokens, so they match even when dense similarity ranks them poorly.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+import json
+import math
+import re
+import threading
+import numpy as np
+from app.core.logger import get_logger
+from app.services.vector_index import MetadataIndex, _top_k
+
+logger = get_logger(__name__)
+
+# Words and codes: "hba1c", "e11.9", "125-mg", "i10"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it my of on or should the this to was what "
+    "when which who why with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase terms of a text, without stopwords.
+
+    Compound codes are indexed whole and by their first part, so "E11.9" also
+    matches a search for "E11".
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        terms.append(token)
+        head = re.split(r"[.\-/]", token, maxsplit=1)[0]
+        if head != token and head not in _STOPWORDS:
+            terms.append(head)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental BM25 (Okapi) index.
+
+    Each term has a posting list of (row, term frequency). Adding documents only
+    appends rows; replacing or deleting one retires its row and updates the
+    document frequencies and average length, so scores stay exact without
+    rebuilding. With a path, records are appended to a JSON-lines log and
+    replayed on load.
+    """
+
+    def __init__(self, path: Optional[Path] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize the index.
+
+        Args:
+            path: Optional records.jsonl log for persistence
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        self.ids: List[Optional[str]] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict[str, Any]]] = []
+        self.rows: Dict[str, int] = {}
+        self._lengths = np.zeros(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_freq: Dict[str, int] = {}
+        self._total_length = 0
+        self._metadata_index = MetadataIndex()
+
+        if path is not None and path.exists():
+            with open(path, encoding="utf-8") as records:
+                for line in records:
+                    if not line.endswith("\n"):
+                        break  # torn final record
+                    record = json.loads(line)
+                    self._remove(record["id"])
+                    if not record.get("deleted"):
+                        self._add(record["id"], record["document"], record["metadata"])
+            logger.info(f"Loaded BM25 index {path.parent.name}: {self.count()} documents")
+
+    def count(self) -> int:
+        """Number of indexed documents."""
+        return len(self.rows)
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        """
+        Add or replace documents.
+
+        Args:
+            ids: Document IDs
+            documents: Document texts
+            metadatas: Optional metadata dicts (used by filters)
+        """
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            records = []
+            for record_id, document, metadata in zip(ids, documents, metadatas):
+                row = self.rows.get(record_id)
+                if row is not None and self.documents[row] == document and self.metadatas[row] == (metadata or {}):
+                    continue  # unchanged (e.g. re-ingested)
+                self._remove(record_id)
+                self._add(record_id, document, metadata)
+                records.append({"id": record_id, "document": document, "metadata": metadata})
+            self._append(records)
+
+    def delete(self, ids: Sequence[str]):
+        """Delete documents by ID."""
+        with self._lock:
+            removed = [record_id for record_id in ids if self._remove(record_id)]
+            self._append([{"id": record_id, "deleted": True} for record_id in removed])
+
+    def _append(self, records: List[Dict[str, Any]]):
+        if self.path is None or not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as log:
+            log.writelines(json.dumps(record) + "\n" for record in records)
+
+    def _add(self, record_id: str, document: str, metadata: Optional[Dict[str, Any]]):
+        row = len(self.ids)
+        terms = tokenize(document)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            rows, tfs = self._postings.setdefault(term, ([], []))
+            rows.append(row)
+            tfs.append(frequency)
+            self._doc_freq[term] = self._doc_freq.get(term, 0) + 1
+
+        if row == len(self._alive):
+            self._lengths = np.concatenate([self._lengths, np.zeros_like(self._lengths)])
+            self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+        self.ids.append(record_id)
+        self.documents.append(document)
+        self.metadatas.append(metadata or {})
+        self.rows[record_id] = row
+        self._lengths[row] = len(terms)
+        self._alive[row] = True
+        self._total_length += len(terms)
+        self._metadata_index.add(row, metadata or {})
+
+    def _remove(self, record_id: str) -> bool:
+        row = self.rows.pop(record_id, None)
+        if row is None:
+            return False
+        for term in set(tokenize(self.documents[row])):
+            self._doc_freq[term] -= 1
+        self._total_length -= self._lengths[row]
+        self._alive[row] = False
+        self.documents[row] = self.metadatas[row] = None
+        return True
+
+    def _posting(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows and term frequencies of a term as arrays, extended as rows are appended."""
+        rows, tfs = self._postings[term]
+        cached = self._posting_arrays.get(term)
+        if cached is None or len(cached[0]) != len(rows):
+            done = 0 if cached is None else len(cached[0])
+            tail = (np.asarray(rows[done:], dtype=np.int64), np.asarray(tfs[done:], dtype=np.float32))
+            cached = tail if cached is None else (np.concatenate([cached[0], tail[0]]), np.concatenate([cached[1], tail[1]]))
+            self._posting_arrays[term] = cached
+        return cached
+
+    def search(self, query: str, n_results: int = 10, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Rank documents against a query.
+
+        Args:
+            query: Query text
+            n_results: Number of results to return
+            where: Optional Chroma-style metadata filter
+
+        Returns:
+            Matches as {"id", "document", "metadata", "score"}, best first
+        """
+        with self._lock:
+            count = len(self.rows)
+            if not count:
+                return []
+            size = len(self.ids)
+            alive = self._alive[:size]
+            average = self._total_length / count
+            scores = np.zeros(size, dtype=np.float32)
+
+            for term in set(tokenize(query)):
+                doc_freq = self._doc_freq.get(term, 0)
+                if doc_freq == 0:
+                    continue
+                rows, tfs = self._posting(term)
+                idf = math.log(1 + (count - doc_freq + 0.5) / (doc_freq + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[rows] / average)
+                scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+            scores[~alive] = 0
+            if where:
+                allowed = np.zeros(len(scores), dtype=bool)
+                allowed[self._metadata_index.rows(where, alive, self.metadatas)] = True
+                scores[~allowed] = 0
+
+            matched = np.flatnonzero(scores)
+            top = matched[_top_k(scores[matched], min(n_results, len(matched)))]
+            return [
+                {
+                    "id": self.ids[row],
+                    "document": self.documents[row],
+                    "metadata": self.metadatas[row],
+                    "score": float(scores[row])
+                }
+                for row in top
+            ]
+
@@ -2,7 +2,12 @@
 ONNX inference service for image classification and segmentation.
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import Future
+import asyncio
+import queue
+import threading
+import time
 import numpy as np
 import onnxruntime as ort
 from PIL import Image
@@ -13,19 +18,303 @@ from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+ImageData = Union[str, bytes]
+
+_SCALE = np.float32(1 / 255)
+
+
+def decode_image_into(image_data: ImageData, out: np.ndarray):
+    """
+    Decode an image and write it, resized and scaled to [0, 1], into a CHW buffer.
+
+    JPEGs are decoded with PIL draft mode, which lets the decoder downscale by
+    1/2 to 1/8 (never below the target size) instead of decoding every pixel.
+    Normalization and the HWC to CHW transpose happen in one pass into `out`.
+
+    Args:
+        image_data: Raw image bytes, or a base64-encoded string
+        out: float32 array of shape (3, height, width) to fill
+    """
+    image_bytes = base64.b64decode(image_data) if isinstance(image_data, str) else image_data
+    image = Image.open(io.BytesIO(image_bytes))
+    height, width = out.shape[1:]
+
+    image.draft("RGB", (width, height))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.BICUBIC, reducing_gap=3.0)
+
+    pixels = np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(height, width, 3)
+    np.multiply(pixels.transpose(2, 0, 1), _SCALE, out=out)
+
+
+class InferenceQueueFull(RuntimeError):
+    """The inference queue is at capacity."""
+
+
+def _bucket(value: float) -> int:
+    """Power-of-two histogram bucket (upper bound) of a value."""
+    bucket = 1
+    while bucket < value:
+        bucket *= 2
+    return bucket
+
+
+class InferenceBatcher:
+    """
+    Micro-batcher in front of an ONNX session.
+
+    Concurrent single-input requests are queued and stacked along the batch
+    axis into one session.run of up to max_batch_size inputs; each caller's
+    future resolves to its own output row. A worker only waits (up to
+    max_wait_ms) for a batch to fill while another run is in flight, so a lone
+    request runs at once and batches form from what queued during earlier runs.
+    A fixed number of worker threads (the bounded executor) take batches off the
+    queue, so at most `workers` runs are in flight and the event loop never
+    blocks on inference. Models with a fixed batch dimension get their batches
+    padded to that size.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        pad_to: Optional[int] = None
+    ):
+        """
+        Initialize the batcher (the worker threads start on first use).
+
+        Args:
+            run_batch: Function running the model on a batch, returning one output row per input
+            max_batch_size: Maximum inputs per run
+            max_wait_ms: Maximum time the first queued input waits for others
+            workers: Number of worker threads running batches
+            max_queue: Maximum queued inputs before submit() rejects
+            pad_to: Fixed batch size the model requires (batches are zero-padded)
+        """
+        self.run_batch = run_batch
+        self.pad_to = pad_to
+        self.max_batch_size = pad_to or max_batch_size or settings.ONNX_BATCH_MAX_SIZE
+        self.max_wait = (settings.ONNX_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.workers = workers or settings.ONNX_WORKERS
+
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future, float]]" = queue.Queue(
+            maxsize=max_queue or settings.ONNX_MAX_QUEUE
+        )
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._in_flight = 0
+        self._buffers = threading.local()  # per-worker input batch buffer
+
+        # Counters and histograms (power-of-two buckets for queue depth and latency)
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.rejected = 0
+        self.batch_size_histogram: Dict[int, int] = {}
+        self.queue_depth_histogram: Dict[int, int] = {}
+        self.latency_ms_histogram: Dict[int, int] = {}
+        self.wait_ms_histogram: Dict[int, int] = {}
+
+    @property
+    def running(self) -> bool:
+        """Whether the worker threads are alive."""
+        return bool(self._threads) and all(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start the worker threads."""
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"onnx-batcher-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, array: np.ndarray) -> Future:
+        """
+        Queue one input (without batch axis) for inference.
+
+        Args:
+            array: Model input for a single item
+
+        Returns:
+            Future resolving to the item's output row
+
+        Raises:
+            InferenceQueueFull: If max_queue inputs are already waiting
+        """
+        if not self.running:
+            self.start()
+
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((array, future, time.perf_counter()))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise InferenceQueueFull(f"ONNX inference queue full ({self._queue.maxsize} waiting)")
+        return future
+
+    async def infer(self, array: np.ndarray) -> np.ndarray:
+        """
+        Run inference on one input without blocking the event loop.
+
+        Args:
+            array: Model input for a single item
+
+        Returns:
+            Output row for the item
+        """
+        return await asyncio.wrap_future(self.submit(array))
+
+    def _next_batch(self) -> Tuple[List[Tuple[np.ndarray, Future, float]], int]:
+        """Wait for a request, then gather more until the batch is full or the wait expires."""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return [], 0
+        depth = self._queue.qsize() + 1
+
+        with self._stats_lock:
+            busy = self._in_flight > 0
+        deadline = time.monotonic() + (self.max_wait if busy else 0)
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch, depth
+
+    def _run(self):
+        """Worker thread loop."""
+        while not self._stop.is_set():
+            batch, depth = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._infer(batch, depth)
+            except Exception as e:
+                # Neither leave callers waiting nor lose the worker
+                logger.error(f"ONNX batcher failed to resolve a batch of {len(batch)} inputs: {str(e)}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _infer(self, batch: List[Tuple[np.ndarray, Future, float]], depth: int):
+        """Run one batch and resolve every future in it."""
+        # Skip callers that gave up (e.g. cancelled by a deadline)
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        # An input shaped unlike the rest of the batch fails alone
+        shape = np.shape(batch[0][0])
+        for array, future, _ in batch:
+            if np.shape(array) != shape:
+                future.set_exception(ValueError(f"Expected an input of shape {shape}, got {np.shape(array)}"))
+        batch = [item for item in batch if not item[1].done()]
+
+        with self._stats_lock:
+            self._in_flight += 1
+        try:
+            inputs = self._batch_buffer(np.asarray(batch[0][0]), self.pad_to or len(batch))
+            for row, (array, _, _) in enumerate(batch):
+                inputs[row] = array
+            inputs[len(batch):] = 0
+            start = time.perf_counter()
+            outputs = self.run_batch(inputs)
+        except Exception as e:
+            with self._stats_lock:
+                self.errors += 1
+                self._in_flight -= 1
+            logger.error(f"ONNX batch of {len(batch)} inputs failed: {str(e)}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._stats_lock:
+            self._in_flight -= 1
+            self.batches += 1
+            self.items += len(batch)
+            for histogram, key in (
+                (self.batch_size_histogram, len(batch)),
+                (self.queue_depth_histogram, _bucket(depth)),
+                (self.latency_ms_histogram, _bucket(elapsed_ms)),
+            ):
+                histogram[key] = histogram.get(key, 0) + 1
+            for _, _, queued in batch:
+                key = _bucket((start - queued) * 1000)
+                self.wait_ms_histogram[key] = self.wait_ms_histogram.get(key, 0) + 1
+
+        for row, (_, future, _) in enumerate(batch):
+            future.set_result(outputs[row])
+
+    def _batch_buffer(self, example: np.ndarray, size: int) -> np.ndarray:
+        """This worker's preallocated input batch of `size` rows shaped like `example`."""
+        buffer = getattr(self._buffers, "buffer", None)
+        if buffer is None or buffer.shape[1:] != example.shape or buffer.dtype != example.dtype or len(buffer) < size:
+            buffer = np.zeros((max(size, self.max_batch_size),) + example.shape, dtype=example.dtype)
+            self._buffers.buffer = buffer
+        return buffer[:size]
+
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """Stop the worker threads after their current batches."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batcher statistics.
+
+        Returns:
+            Queue depth, counters and histograms (keys are bucket upper bounds)
+        """
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "queue_depth_histogram": dict(sorted(self.queue_depth_histogram.items())),
+            "inference_ms_histogram": dict(sorted(self.latency_ms_histogram.items())),
+            "queue_wait_ms_histogram": dict(sorted(self.wait_ms_histogram.items()))
+        }
+
 
 class ONNXInferenceService:
     """Service for ONNX model inference."""
 
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, batching_enabled: Optional[bool] = None):
         """
         Initialize ONNX inference service.
 
         Args:
             model_path: Path to ONNX model file
+            batching_enabled: Coalesce concurrent requests into batched runs
         """
         self.model_path = model_path or settings.ONNX_MODEL_PATH
         self.session = None
+        self.batcher: Optional[InferenceBatcher] = None
 
         try:
             # Initialize ONNX runtime session
@@ -48,53 +337,86 @@ class ONNXInferenceService:
             logger.warning(f"Failed to load ONNX model: {str(e)}. Using mock inference.")
             self.session = None
 
+        if batching_enabled is None:
+            batching_enabled = settings.ONNX_BATCHING_ENABLED
+        if self.session is not None and batching_enabled:
+            # A fixed batch dimension caps (and pads) batches; a symbolic one allows any size
+            batch_dim = self.session.get_inputs()[0].shape[0]
+            fixed = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+            self.batcher = InferenceBatcher(
+                self._run_batch,
+                max_batch_size=1 if fixed == 1 else None,
+                pad_to=fixed if fixed and fixed > 1 else None
+            )
+
+    def _run_batch(self, inputs: np.ndarray) -> np.ndarray:
+        """Run the model on a batch of inputs."""
+        return self.session.run([self.output_name], {self.input_name: inputs})[0]
+
+    def _infer(self, input_data: np.ndarray) -> np.ndarray:
+        """Run the model on one preprocessed input (with batch axis), through the batcher if enabled."""
+        if self.batcher is None:
+            return self._run_batch(input_data)[:1]
+        return self.batcher.submit(input_data[0]).result()[np.newaxis]
+
+    async def _infer_async(self, input_data: np.ndarray) -> np.ndarray:
+        """Run the model on one preprocessed input without blocking the event loop."""
+        if self.batcher is None:
+            return await asyncio.to_thread(self._infer, input_data)
+        return (await self.batcher.infer(input_data[0]))[np.newaxis]
+
     def preprocess_image(
         self,
-        image_data: str,
-        target_size: Tuple[int, int] = (224, 224)
+        image_data: ImageData,
+        target_size: Tuple[int, int] = (224, 224),
+        out: Optional[np.ndarray] = None
     ) -> np.ndarray:
         """
         Preprocess image for inference.
 
         Args:
-            image_data: Base64-encoded image string
+            image_data: Raw image bytes, or a base64-encoded string
             target_size: Target image size (height, width)
+            out: Optional float32 buffer of shape (1, 3, height, width) to write into
 
         Returns:
-            Preprocessed image array
+            Preprocessed image array (NCHW, batch of one)
         """
-        # Decode base64
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-
-        # Convert to RGB
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        # Resize
-        image = image.resize(target_size)
+        if out is None:
+            out = np.empty((1, 3) + tuple(target_size), dtype=np.float32)
+        decode_image_into(image_data, out[0])
+        return out
 
-        # Convert to numpy array and normalize
-        image_array = np.array(image).astype(np.float32) / 255.0
-
-        # Transpose to CHW format (channels, height, width)
-        image_array = image_array.transpose(2, 0, 1)
+    def preprocess_batch(
+        self,
+        images: Sequence[ImageData],
+        target_size: Tuple[int, int] = (224, 224)
+    ) -> np.ndarray:
+        """
+        Preprocess images straight into one NCHW batch.
 
-        # Add batch dimension
-        image_array = np.expand_dims(image_array, axis=0)
+        Args:
+            images: Raw image bytes or base64-encoded strings
+            target_size: Target image size (height, width)
 
-        return image_array
+        Returns:
+            Preprocessed batch of shape (len(images), 3, height, width)
+        """
+        out = np.empty((len(images), 3) + tuple(target_size), dtype=np.float32)
+        for row, image_data in enumerate(images):
+            decode_image_into(image_data, out[row])
+        return out
 
     def classify(
         self,
-        image_data: str,
+        image_data: ImageData,
         top_k: int = 3
     ) -> List[Dict[str, Any]]:
         """
         Classify an image.
 
         Args:
-            image_data: Base64-encoded image
+            image_data: Raw image bytes, or a base64-encoded string
             top_k: Number of top predictions to return
 
         Returns:
@@ -113,40 +435,73 @@ class ONNXInferenceService:
             input_data = self.preprocess_image(image_data)
 
             # Run inference
-            outputs = self.session.run([self.output_name], {self.input_name: input_data})
-            predictions = outputs[0][0]
+            predictions = self._infer(input_data)[0]
+            return self._format_predictions(predictions, top_k)
 
-            # Get top-k predictions
-            top_indices = np.argsort(predictions)[-top_k:][::-1]
+        except Exception as e:
+            logger.error(f"Classification failed: {str(e)}")
+            # Return mock results on error
+            return [
+                {"label": "unknown", "confidence": 0.5}
+            ]
 
-            # Format results (would use actual class labels in production)
-            results = []
-            class_labels = self._get_class_labels()
+    async def classify_async(
+        self,
+        image_data: ImageData,
+        top_k: int = 3
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify an image without blocking the event loop.
+
+        Preprocessing runs in a worker thread and inference is batched with
+        concurrent requests.
 
-            for idx in top_indices:
-                results.append({
-                    "label": class_labels.get(idx, f"class_{idx}"),
-                    "confidence": float(predictions[idx])
-                })
+        Args:
+            image_data: Raw image bytes, or a base64-encoded string
+            top_k: Number of top predictions to return
+
+        Returns:
+            List of predictions with labels and confidence scores
+        """
+        if self.session is None:
+            return self.classify(image_data, top_k)
 
-            return results
+        try:
+            input_data = await asyncio.to_thread(self.preprocess_image, image_data)
+            predictions = (await self._infer_async(input_data))[0]
+            return self._format_predictions(predictions, top_k)
 
         except Exception as e:
             logger.error(f"Classification failed: {str(e)}")
-            # Return mock results on error
             return [
                 {"label": "unknown", "confidence": 0.5}
             ]
 
+    def _format_predictions(self, predictions: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Top-k labels and confidences of a prediction vector."""
+        top_indices = np.argsort(predictions)[-top_k:][::-1]
+
+        # Format results (would use actual class labels in production)
+        results = []
+        class_labels = self._get_class_labels()
+
+        for idx in top_indices:
+            results.append({
+                "label": class_labels.get(idx, f"class_{idx}"),
+                "confidence": float(predictions[idx])
+            })
+
+        return results
+
     def segment(
         self,
-        image_data: str
+        image_data: ImageData
     ) -> Dict[str, Any]:
         """
         Perform image segmentation.
 
         Args:
-            image_data: Base64-encoded image
+            image_data: Raw image bytes, or a base64-encoded string
 
         Returns:
             Segmentation mask and metadata
@@ -167,17 +522,35 @@ class ONNXInferenceService:
             input_data = self.preprocess_image(image_data)
 
             # Run inference
-            outputs = self.session.run([self.output_name], {self.input_name: input_data})
-            mask = outputs[0]
+            return self._format_mask(self._infer(input_data))
 
-            # Process mask (simplified)
+        except Exception as e:
+            logger.error(f"Segmentation failed: {str(e)}")
             return {
-                "mask": self._encode_mask(mask),
-                "bounding_boxes": self._extract_bounding_boxes(mask),
-                "area_pixels": int(np.sum(mask > 0.5)),
-                "confidence": 0.80
+                "mask": None,
+                "error": str(e)
             }
 
+    async def segment_async(
+        self,
+        image_data: ImageData
+    ) -> Dict[str, Any]:
+        """
+        Segment an image without blocking the event loop.
+
+        Args:
+            image_data: Raw image bytes, or a base64-encoded string
+
+        Returns:
+            Segmentation mask and metadata
+        """
+        if self.session is None:
+            return self.segment(image_data)
+
+        try:
+            input_data = await asyncio.to_thread(self.preprocess_image, image_data)
+            return self._format_mask(await self._infer_async(input_data))
+
         except Exception as e:
             logger.error(f"Segmentation failed: {str(e)}")
             return {
@@ -185,6 +558,27 @@ class ONNXInferenceService:
                 "error": str(e)
             }
 
+    def _format_mask(self, mask: np.ndarray) -> Dict[str, Any]:
+        """Segmentation result of a mask (simplified)."""
+        return {
+            "mask": self._encode_mask(mask),
+            "bounding_boxes": self._extract_bounding_boxes(mask),
+            "area_pixels": int(np.sum(mask > 0.5)),
+            "confidence": 0.80
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get inference statistics.
+
+        Returns:
+            Whether a model is loaded, and the batcher's counters and histograms
+        """
+        return {
+            "model_loaded": self.session is not None,
+            "batching": self.batcher.stats() if self.batcher is not None else None
+        }
+
     def _get_class_labels(self) -> Dict[int, str]:
         """Get class labels for classification."""
         # Mock class labels - in production, load from model metadata
@@ -0,0 +1,241 @@
+"""
+Semantic intent router using precomputed embedding centroids.
+"""
+
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+import numpy as np
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.embedding_service import EmbeddingService, get_embedding_service
+
+logger = get_logger(__name__)
+
+
+# Labelled examples used to build one centroid per intent
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "appointment": [
+        "I need to see a doctor next week",
+        "Can I move my visit to Friday afternoon?",
+        "When is Dr. Patel free?",
+        "I want to change the time of my checkup",
+        "Do you have any openings tomorrow morning?",
+        "I can't make it to my visit on Monday",
+        "Set up a follow-up consultation",
+        "How do I reschedule my visit?",
+    ],
+    "payment": [
+        "How much will this visit be?",
+        "I was charged twice for my last visit",
+        "Does my plan cover physical therapy?",
+        "Can I pay my bill online?",
+        "What is my outstanding balance?",
+        "I need a receipt for my copay",
+        "Is there a payment plan available?",
+        "Why did I get a bill from the clinic?",
+    ],
+    "prescription": [
+        "Can I take ibuprofen with my blood pressure pills?",
+        "I am running out of my metformin",
+        "What dose of amoxicillin should I take?",
+        "Is it safe to combine these two pills?",
+        "My inhaler needs renewing",
+        "Which antibiotic is usually given for strep throat?",
+        "Side effects of lisinopril",
+        "Send my meds to the pharmacy on Main Street",
+    ],
+    "image_analysis": [
+        "There is a red spot on my arm, can you check this photo?",
+        "What is this mole on my back?",
+        "Here is a picture of my swollen ankle",
+        "My skin has itchy bumps, see attached",
+        "Please review this x-ray image",
+        "Can you tell what this spot is from the photo?",
+    ],
+    "report_understanding": [
+        "What does my glucose of 126 mean?",
+        "Explain my blood work",
+        "Is my cholesterol panel normal?",
+        "Help me understand my discharge summary",
+        "My HbA1c came back at 6.8, is that bad?",
+        "Summarize the attached pathology findings",
+    ],
+    "sql": [
+        "How many visits did we have last month?",
+        "Show the number of diabetic patients in the clinic",
+        "Which clinicians had the most appointments this week?",
+        "Average wait time per department",
+        "Give me a breakdown of visits by age group",
+        "Total number of no-shows this quarter",
+    ],
+    "rag": [
+        "What are the symptoms of diabetes?",
+        "What are the guidelines for treating hypertension?",
+        "Tell me about asthma management",
+        "What is the recommended screening age for colon cancer?",
+        "How is pneumonia diagnosed?",
+        "What causes migraines?",
+    ],
+}
+
+
+class SemanticRouter:
+    """
+    Second-tier intent router for queries no routing rule matches.
+
+    One centroid per intent is precomputed from labelled examples and held as a single
+    normalized float32 matrix, so routing a query is one encode plus one matrix-vector
+    product. Centroids are persisted to disk and reused while the model and examples
+    are unchanged.
+    """
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        examples: Optional[Dict[str, List[str]]] = None,
+        centroids_path: Optional[str] = None,
+        threshold: Optional[float] = None
+    ):
+        """
+        Initialize the semantic router and load or build its centroids.
+
+        Args:
+            embedding_service: Embedding service used to encode text
+            examples: Labelled examples per intent
+            centroids_path: Path of the persisted centroid file
+            threshold: Minimum cosine similarity to accept an intent
+        """
+        self.embedding_service = embedding_service or get_embedding_service()
+        self.examples = examples or INTENT_EXAMPLES
+        self.centroids_path = Path(centroids_path or settings.SEMANTIC_ROUTER_CENTROIDS_PATH)
+        self.threshold = settings.SEMANTIC_ROUTER_THRESHOLD if threshold is None else threshold
+
+        self.labels: List[str] = []
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self._load_or_build()
+
+    def _fingerprint(self) -> str:
+        """Hash of the model name and examples that identifies a centroid file."""
+        data = json.dumps(
+            {"model": self.embedding_service.model_name, "examples": self.examples},
+            sort_keys=True
+        )
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _load_or_build(self):
+        """Load persisted centroids, re-encoding the examples only if they are stale."""
+        fingerprint = self._fingerprint()
+
+        try:
+            with np.load(self.centroids_path, allow_pickle=False) as data:
+                if str(data["fingerprint"]) == fingerprint:
+                    self.labels = [str(label) for label in data["labels"]]
+                    self.centroids = np.ascontiguousarray(data["centroids"], dtype=np.float32)
+                    logger.info("Loaded intent centroids", path=str(self.centroids_path), intents=len(self.labels))
+                    return
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to load intent centroids: {str(e)}. Rebuilding.")
+
+        self._build()
+
+        try:
+            self.centroids_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.centroids_path.with_suffix(".tmp.npz")
+            np.savez(tmp_path, labels=np.array(self.labels), centroids=self.centroids, fingerprint=np.array(fingerprint))
+            os.replace(tmp_path, self.centroids_path)
+            logger.info("Saved intent centroids", path=str(self.centroids_path), intents=len(self.labels))
+        except OSError as e:
+            logger.warning(f"Failed to persist intent centroids: {str(e)}")
+
+    def _build(self):
+        """Encode the labelled examples and compute one normalized centroid per intent."""
+        self.labels = list(self.examples)
+        texts = [text for label in self.labels for text in self.examples[label]]
+
+        embeddings = self._normalize(np.asarray(self.embedding_service.encode(texts), dtype=np.float32))
+
+        centroids = []
+        offset = 0
+        for label in self.labels:
+            count = len(self.examples[label])
+            centroids.append(embeddings[offset:offset + count].mean(axis=0))
+            offset += count
+
+        self.centroids = np.ascontiguousarray(self._normalize(np.stack(centroids)))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize vectors along the last axis."""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def similarities(self, query_embedding: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of a query embedding against every intent centroid.
+
+        Args:
+            query_embedding: Query embedding vector
+
+        Returns:
+            Similarity per intent, aligned with self.labels
+        """
+        return self.centroids @ self._normalize(np.asarray(query_embedding, dtype=np.float32))
+
+    def classify(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Pick the closest intent for a query.
+
+        Encodes on the calling thread; use classify_async from the event loop.
+
+        Args:
+            query: User query
+
+        Returns:
+            Routing decision, or None if no intent passes the threshold
+        """
+        return self._decide(self.similarities(self.embedding_service.encode_single(query)))
+
+    async def classify_async(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Pick the closest intent for a query without blocking the event loop.
+
+        The query is encoded off the loop (batched with concurrent encodes).
+
+        Args:
+            query: User query
+
+        Returns:
+            Routing decision, or None if no intent passes the threshold
+        """
+        return self._decide(self.similarities(await self.embedding_service.encode_single_async(query)))
+
+    def _decide(self, scores: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Routing decision for the best-scoring intent, or None below the threshold."""
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+
+        if score < self.threshold:
+            return None
+
+        return {
+            "target_agent": self.labels[best],
+            "confidence": round(min(max(score, 0.0), 1.0), 4),
+            "reasoning": f"Semantic match to '{self.labels[best]}' intent (similarity {score:.2f})"
+        }
+
+
+# Global semantic router instance
+_semantic_router = None
+
+
+def get_semantic_router() -> SemanticRouter:
+    """Get global semantic router instance."""
+    global _semantic_router
+    if _semantic_router is None:
+        _semantic_router = SemanticRouter()
+    return _semantic_router
@@ -1,88 +1,455 @@
 """
-Vector database service using Chroma.
+Vector database service using Chroma or the in-process vector index.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Any, NamedTuple, Optional, Union
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
 import chromadb
 from chromadb.config import Settings
 from app.core.config import settings
 from app.core.logger import get_logger
 from app.services.embedding_service import get_embedding_service
+from app.services.ingestion import Chunker, Document, IngestStats, chunk_id, ingest_documents
+from app.services.lexical_index import BM25Index
+from app.services.vector_index import INDEX_MODES, LocalVectorClient
 
 logger = get_logger(__name__)
 
 
+def _to_chroma(embeddings: np.ndarray) -> List[List[float]]:
+    """
+    Convert a float32 embedding matrix to the nested lists Chroma's client API
+    requires. This is the only place embeddings leave NumPy.
+    """
+    return embeddings.tolist()
+
+
+def _default_ids(
+    documents: List[str],
+    metadatas: Optional[List[Dict[str, Any]]] = None
+) -> List[str]:
+    """
+    IDs for documents added without any.
+
+    Each ID is derived from the document's metadata and text, so adding the
+    same documents again replaces them. Repeats within one call are numbered,
+    so every ID in a batch is distinct (Chroma rejects duplicate IDs).
+
+    Args:
+        documents: Document texts
+        metadatas: Optional metadata dicts, one per document
+
+    Returns:
+        One ID per document
+    """
+    ids = []
+    occurrences: Counter = Counter()
+    for i, document in enumerate(documents):
+        source = json.dumps(metadatas[i] if metadatas else {}, sort_keys=True, default=str)
+        key = chunk_id(source, document)
+        repeat = occurrences[key]
+        occurrences[key] += 1
+        ids.append(chunk_id(f"{source}\0{repeat}", document) if repeat else key)
+    return ids
+
+
+def _format_results(results: Dict[str, Any], row: int) -> Dict[str, Any]:
+    """Format one query's matches from a Chroma query response (with "embedding" when included)."""
+    formatted_results = []
+    embeddings = results.get("embeddings")
+    if results["documents"] and len(results["documents"]) > row:
+        for i in range(len(results["documents"][row])):
+            formatted_results.append({
+                "id": results["ids"][row][i],
+                "document": results["documents"][row][i],
+                "metadata": results["metadatas"][row][i] if results["metadatas"] else {},
+                "distance": results["distances"][row][i] if results["distances"] else None
+            })
+            if embeddings is not None:
+                formatted_results[-1]["embedding"] = np.asarray(embeddings[row][i], dtype=np.float32)
+
+    return {
+        "results": formatted_results,
+        "count": len(formatted_results)
+    }
+
+
+def reciprocal_rank_fusion(
+    rankings: Dict[str, List[Dict[str, Any]]],
+    weights: Dict[str, float],
+    n_results: int,
+    k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists with weighted reciprocal rank fusion.
+
+    Each result scores sum(weight / (k + rank)) over the lists it appears in,
+    so agreement between retrievers outweighs a high rank in just one. Scores
+    are scaled so that ranking first in every list scores 1.0.
+
+    Args:
+        rankings: Ranked results ({"id", ...}) by retriever name
+        weights: Weight by retriever name
+        n_results: Number of results to return
+        k: Fusion constant (larger values flatten the rank curve)
+
+    Returns:
+        Fused results with "score" and the rank in each retriever ("ranks")
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    scale = (k + 1) / (sum(weights.get(name, 1.0) for name in rankings) or 1.0)
+    for name, results in rankings.items():
+        weight = weights.get(name, 1.0) * scale
+        for rank, result in enumerate(results, start=1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = {**result, "score": 0.0, "ranks": {}}
+                fused[result["id"]] = entry
+            else:
+                for key in ("distance", "embedding"):
+                    if key in result:
+                        entry[key] = result[key]
+            entry["score"] += weight / (k + rank)
+            entry["ranks"][name] = rank
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[:n_results]
+
+
+class VectorDBEvent(NamedTuple):
+    """A completed vector database operation, passed to instrumentation hooks."""
+
+    operation: str
+    collection: str
+    latency_ms: float
+
+
 class VectorDBService:
-    """Service for vector database operations using Chroma."""
+    """Service for vector database operations using Chroma or the in-process vector index."""
+
+    def __init__(self, cache_collections: Optional[bool] = None, backend: Optional[str] = None):
+        """
+        Initialize vector database service.
 
-    def __init__(self):
-        """Initialize vector database service."""
-        logger.info("Initializing Chroma vector database")
+        Args:
+            cache_collections: Reuse collection handles instead of looking them up per call
+            backend: "chroma", "exact" or "ivf" (defaults to VECTOR_DB_BACKEND)
+        """
+        self.backend = backend or settings.VECTOR_DB_BACKEND
+        logger.info(f"Initializing vector database (backend: {self.backend})")
 
-        # Initialize Chroma client
-        self.client = chromadb.Client(Settings(
-            chroma_db_impl="duckdb+parquet",
-            persist_directory=settings.CHROMA_PERSIST_DIR
-        ))
+        if self.backend == "chroma":
+            self.client = chromadb.Client(Settings(
+                chroma_db_impl="duckdb+parquet",
+                persist_directory=settings.CHROMA_PERSIST_DIR
+            ))
+        elif self.backend in INDEX_MODES:
+            # Local collections take float32 arrays directly
+            self.client = LocalVectorClient(settings.VECTOR_INDEX_DIR, self.backend)
+        else:
+            raise ValueError(f"Unknown vector DB backend: {self.backend}")
 
         # Initialize embedding service
         self.embedding_service = get_embedding_service()
 
-        logger.info("Chroma vector database initialized")
+        # Collection handles by name
+        self.cache_collections = (
+            settings.VECTOR_DB_CACHE_COLLECTIONS if cache_collections is None else cache_collections
+        )
+        self._collections: Dict[str, Any] = {}
+        self._collections_lock = threading.Lock()
+
+        # BM25 indexes by collection name, kept alongside the vectors
+        self.lexical_enabled = settings.LEXICAL_INDEX_ENABLED
+        self._lexical: Dict[str, BM25Index] = {}
+        self._lexical_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="lexical-search")
+
+        # Document-set versions by collection name, bumped on every write and
+        # stamped on disk so other workers see them
+        self._versions: Dict[str, int] = {}
+        self._last_version = 0
+        self._stamps: Dict[str, tuple] = {}  # name -> ((inode, mtime_ns), version) of the last stamp read
+
+        # Instrumentation
+        self._hooks: List[Callable[[VectorDBEvent], None]] = []
+        self.operation_counts: Counter = Counter()
+        self.collection_cache_hits = 0
+
+        logger.info("Vector database initialized")
+
+    def _client_embeddings(self, embeddings: np.ndarray) -> Any:
+        """Embeddings in the form the client accepts (nested lists for Chroma only)."""
+        return _to_chroma(embeddings) if self.backend == "chroma" else embeddings
+
+    def add_hook(self, hook: Callable[[VectorDBEvent], None]):
+        """
+        Register an instrumentation hook called after every operation.
+
+        Args:
+            hook: Callback receiving a VectorDBEvent
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[VectorDBEvent], None]):
+        """Unregister an instrumentation hook."""
+        self._hooks.remove(hook)
+
+    @contextmanager
+    def _instrument(self, operation: str, collection_name: str) -> Iterator[None]:
+        """Count an operation and report its latency to the hooks."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.operation_counts[operation] += 1
+            event = VectorDBEvent(operation, collection_name, (time.perf_counter() - start) * 1000)
+            for hook in self._hooks:
+                try:
+                    hook(event)
+                except Exception as e:
+                    logger.warning(f"Vector DB hook failed: {str(e)}")
 
     def get_or_create_collection(self, collection_name: str) -> Any:
         """
         Get or create a collection.
 
+        Handles are cached per name (until delete_collection), so the metadata
+        lookup only happens on first use.
+
         Args:
             collection_name: Name of the collection
 
         Returns:
             Collection object
         """
-        return self.client.get_or_create_collection(name=collection_name)
+        if self.cache_collections:
+            collection = self._collections.get(collection_name)
+            if collection is not None:
+                self.collection_cache_hits += 1
+                return collection
+
+        with self._collections_lock:
+            collection = self._collections.get(collection_name) if self.cache_collections else None
+            if collection is None:
+                with self._instrument("get_or_create_collection", collection_name):
+                    collection = self.client.get_or_create_collection(name=collection_name)
+                if self.cache_collections:
+                    self._collections[collection_name] = collection
+            return collection
+
+    def get_lexical_index(self, collection_name: str) -> BM25Index:
+        """
+        Get (loading or creating) the BM25 index of a collection.
+
+        Args:
+            collection_name: Name of the collection
+
+        Returns:
+            BM25 index
+        """
+        index = self._lexical.get(collection_name)
+        if index is None:
+            with self._collections_lock:
+                index = self._lexical.get(collection_name)
+                if index is None:
+                    index = BM25Index(Path(settings.LEXICAL_INDEX_DIR) / collection_name / "records.jsonl")
+                    self._lexical[collection_name] = index
+        return index
+
+    def collection_version(self, collection_name: str) -> int:
+        """
+        Version of a collection's document set.
+
+        Changes whenever documents are added to (or ingested into) the collection
+        or it is deleted, so results derived from it can be invalidated. Each
+        write also replaces a stamp file under VECTOR_INDEX_DIR/.versions, so
+        writes by other worker processes (or before a restart) are seen too; a
+        lookup costs one stat() unless the stamp changed. Versions are
+        nanosecond timestamps, so a recreated collection never repeats an
+        earlier version.
+
+        Args:
+            collection_name: Name of the collection
+
+        Returns:
+            Current version (0 if the collection was never written)
+        """
+        version = self._versions.get(collection_name, 0)
+        path = self._version_path(collection_name)
+        try:
+            stat = path.stat()
+        except OSError:
+            return version
+        key = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._stamps.get(collection_name)
+        if cached is None or cached[0] != key:
+            try:
+                cached = (key, int(path.read_text()))
+            except (OSError, ValueError):
+                return version
+            self._stamps[collection_name] = cached
+        return max(version, cached[1])
+
+    def _version_path(self, collection_name: str) -> Path:
+        return Path(settings.VECTOR_INDEX_DIR) / ".versions" / collection_name
+
+    def _bump_version(self, collection_name: str):
+        with self._collections_lock:
+            self._set_version(collection_name)
+
+    def _set_version(self, collection_name: str):
+        """Move a collection to a new version (caller holds the collections lock)."""
+        version = max(time.time_ns(), self._last_version + 1, self.collection_version(collection_name) + 1)
+        self._last_version = self._versions[collection_name] = version
+        path = self._version_path(collection_name)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temp.write_text(str(version))
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"Could not stamp version of collection {collection_name}: {str(e)}")
+
+    def warm_up(self, collection_names: Optional[List[str]] = None):
+        """
+        Load collection handles (and BM25 indexes) ahead of the first request.
+
+        Args:
+            collection_names: Collections to load (defaults to VECTOR_DB_WARMUP_COLLECTIONS)
+        """
+        names = settings.VECTOR_DB_WARMUP_COLLECTIONS if collection_names is None else collection_names
+        for name in names:
+            self.get_or_create_collection(name)
+            if self.lexical_enabled:
+                self.get_lexical_index(name)
+        logger.info(f"Warmed up {len(names)} vector DB collections")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get vector database statistics.
+
+        Returns:
+            Cached collections and operation counters
+        """
+        return {
+            "cached_collections": sorted(self._collections),
+            "collection_cache_hits": self.collection_cache_hits,
+            "collection_versions": dict(self._versions),
+            "operations": dict(self.operation_counts)
+        }
 
     def add_documents(
         self,
         collection_name: str,
         documents: List[str],
         metadatas: Optional[List[Dict[str, Any]]] = None,
-        ids: Optional[List[str]] = None
+        ids: Optional[List[str]] = None,
+        embeddings: Optional[np.ndarray] = None
     ):
         """
         Add documents to a collection.
 
+        Embeddings stay a float32 array until each page is handed to Chroma, so
+        only one page at a time exists as Python floats (local backends never
+        convert). Documents are upserted,
+        so adding the same IDs again replaces them.
+
         Args:
             collection_name: Name of the collection
             documents: List of document texts
             metadatas: Optional list of metadata dicts
-            ids: Optional list of document IDs
+            ids: Optional list of document IDs (derived from metadata and content if omitted)
+            embeddings: Optional precomputed embeddings, one row per document
         """
         collection = self.get_or_create_collection(collection_name)
 
-        # Generate embeddings
-        embeddings = self.embedding_service.encode(documents)
+        with self._instrument("add_documents", collection_name):
+            # Generate embeddings
+            if embeddings is None:
+                embeddings = self.embedding_service.encode(documents)
 
-        # Generate IDs if not provided
-        if ids is None:
-            ids = [f"doc_{i}" for i in range(len(documents))]
+            # Generate IDs if not provided
+            if ids is None:
+                ids = _default_ids(documents, metadatas)
 
-        # Add to collection
-        collection.add(
-            embeddings=embeddings,
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+            # Add to collection page by page
+            page_size = settings.VECTOR_DB_ADD_BATCH_SIZE
+            for start in range(0, len(documents), page_size):
+                end = start + page_size
+                collection.upsert(
+                    embeddings=self._client_embeddings(embeddings[start:end]),
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end] if metadatas else None,
+                    ids=ids[start:end]
+                )
+            if self.lexical_enabled:
+                self.get_lexical_index(collection_name).upsert(ids, documents, metadatas)
+            self._bump_version(collection_name)
 
         logger.info(f"Added {len(documents)} documents to collection {collection_name}")
 
+    def ingest(
+        self,
+        collection_name: str,
+        documents: Iterable[Document],
+        page_size: Optional[int] = None,
+        chunker: Optional[Chunker] = None,
+        progress: Optional[Callable[[IngestStats], None]] = None
+    ) -> IngestStats:
+        """
+        Stream documents into a collection.
+
+        Documents are chunked, encoded and upserted page by page, with each
+        page's upsert (vectors and BM25) overlapping the next page's encoding. Chunk IDs are derived
+        from the source document and chunk text, so re-ingesting is idempotent.
+
+        Args:
+            collection_name: Name of the collection
+            documents: Iterable of texts or {"content", "id", "metadata"} dicts
+            page_size: Chunks per encode/upsert page
+            chunker: Function splitting document text into chunks
+            progress: Optional callback invoked with the stats after each page
+
+        Returns:
+            Ingestion stats
+        """
+        collection = self.get_or_create_collection(collection_name)
+        lexical = self.get_lexical_index(collection_name) if self.lexical_enabled else None
+
+        def upsert(ids, texts, metadatas, embeddings):
+            collection.upsert(
+                ids=ids,
+                embeddings=self._client_embeddings(embeddings),
+                documents=texts,
+                metadatas=metadatas
+            )
+            if lexical is not None:
+                lexical.upsert(ids, texts, metadatas)
+            self._bump_version(collection_name)
+
+        with self._instrument("ingest", collection_name):
+            stats = ingest_documents(
+                documents, self.embedding_service.encode, upsert,
+                page_size=page_size, chunker=chunker, progress=progress
+            )
+        logger.info(f"Ingested into collection {collection_name}: {stats.to_dict()}")
+        return stats
+
     def search(
         self,
         collection_name: str,
         query: str,
         n_results: int = 5,
-        where: Optional[Dict[str, Any]] = None
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
     ) -> Dict[str, Any]:
         """
         Search for similar documents.
@@ -92,41 +459,290 @@ class VectorDBService:
             query: Query text
             n_results: Number of results to return
             where: Optional filter conditions
+            include_embeddings: Return each result's stored vector as "embedding"
 
         Returns:
             Search results
         """
-        collection = self.get_or_create_collection(collection_name)
+        with self._instrument("search", collection_name):
+            # Generate query embedding
+            query_embedding = self.embedding_service.encode_single(query)
+
+            return self._query(collection_name, query_embedding, n_results, where, include_embeddings)
 
-        # Generate query embedding
-        query_embedding = self.embedding_service.encode_single(query)
+    def _query(
+        self,
+        collection_name: str,
+        query_embedding: np.ndarray,
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        include_embeddings: bool = False
+    ) -> Dict[str, Any]:
+        """Run a nearest-neighbour query and format the results."""
+        collection = self.get_or_create_collection(collection_name)
+        extra = {"include": ["documents", "metadatas", "distances", "embeddings"]} if include_embeddings else {}
 
         # Search
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where
-        )
+        with self._instrument("query", collection_name):
+            results = collection.query(
+                query_embeddings=self._client_embeddings(query_embedding[np.newaxis]),
+                n_results=n_results,
+                where=where,
+                **extra
+            )
 
-        # Format results
-        formatted_results = []
-        if results["documents"] and len(results["documents"]) > 0:
-            for i in range(len(results["documents"][0])):
-                formatted_results.append({
-                    "id": results["ids"][0][i],
-                    "document": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "distance": results["distances"][0][i] if results["distances"] else None
-                })
+        return _format_results(results, 0)
 
-        return {
-            "results": formatted_results,
-            "count": len(formatted_results)
+    def _add_embeddings(self, collection_name: str, results: List[Dict[str, Any]]):
+        """Fetch the stored vectors of results that have none (BM25-only hybrid matches)."""
+        missing = [result for result in results if result.get("embedding") is None]
+        if not missing:
+            return
+        with self._instrument("get", collection_name):
+            stored = self.get_or_create_collection(collection_name).get(
+                ids=[result["id"] for result in missing], include=["embeddings"]
+            )
+        vectors = dict(zip(stored["ids"], stored["embeddings"]))
+        for result in missing:
+            if result["id"] in vectors:
+                result["embedding"] = np.asarray(vectors[result["id"]], dtype=np.float32)
+
+    def lexical_search(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Search a collection's BM25 index.
+
+        Args:
+            collection_name: Name of the collection
+            query: Query text
+            n_results: Number of results to return
+            where: Optional filter conditions
+
+        Returns:
+            Search results (with BM25 "score" instead of "distance")
+        """
+        with self._instrument("lexical_search", collection_name):
+            results = self.get_lexical_index(collection_name).search(query, n_results, where)
+        return {"results": results, "count": len(results)}
+
+    def hybrid_search(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        vector_weight: Optional[float] = None,
+        lexical_weight: Optional[float] = None,
+        include_embeddings: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Search with the vector and BM25 indexes concurrently and fuse the rankings.
+
+        Each retriever returns HYBRID_CANDIDATES results; the BM25 search runs on
+        a worker thread while the query is encoded and the vector index searched.
+
+        Args:
+            collection_name: Name of the collection
+            query: Query text
+            n_results: Number of results to return
+            where: Optional filter conditions
+            vector_weight: Vector ranking weight (defaults to HYBRID_VECTOR_WEIGHT)
+            lexical_weight: BM25 ranking weight (defaults to HYBRID_LEXICAL_WEIGHT)
+            include_embeddings: Return each result's stored vector as "embedding"
+
+        Returns:
+            Search results with fused "score" and per-retriever "ranks"
+        """
+        if not self.lexical_enabled:
+            # Rank the vector results alone, so they are scored like fused ones
+            dense = self.search(collection_name, query, n_results, where, include_embeddings)
+            return self._fuse(dense, None, n_results, vector_weight, lexical_weight)
+
+        depth = max(settings.HYBRID_CANDIDATES, n_results)
+        with self._instrument("hybrid_search", collection_name):
+            lexical = self._lexical_executor.submit(self.lexical_search, collection_name, query, depth, where)
+            dense = self.search(collection_name, query, depth, where, include_embeddings)
+            fused = self._fuse(dense, lexical.result(), n_results, vector_weight, lexical_weight)
+            if include_embeddings:
+                self._add_embeddings(collection_name, fused["results"])
+            return fused
+
+    async def hybrid_search_async(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        vector_weight: Optional[float] = None,
+        lexical_weight: Optional[float] = None,
+        include_embeddings: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Hybrid search without blocking the event loop.
+
+        Args:
+            collection_name: Name of the collection
+            query: Query text
+            n_results: Number of results to return
+            where: Optional filter conditions
+            vector_weight: Vector ranking weight (defaults to HYBRID_VECTOR_WEIGHT)
+            lexical_weight: BM25 ranking weight (defaults to HYBRID_LEXICAL_WEIGHT)
+            include_embeddings: Return each result's stored vector as "embedding"
+
+        Returns:
+            Search results with fused "score" and per-retriever "ranks"
+        """
+        if not self.lexical_enabled:
+            dense = await self.search_async(collection_name, query, n_results, where, include_embeddings)
+            return self._fuse(dense, None, n_results, vector_weight, lexical_weight)
+
+        depth = max(settings.HYBRID_CANDIDATES, n_results)
+        with self._instrument("hybrid_search", collection_name):
+            dense, lexical = await asyncio.gather(
+                self.search_async(collection_name, query, depth, where, include_embeddings),
+                asyncio.to_thread(self.lexical_search, collection_name, query, depth, where)
+            )
+            fused = self._fuse(dense, lexical, n_results, vector_weight, lexical_weight)
+            if include_embeddings:
+                await asyncio.to_thread(self._add_embeddings, collection_name, fused["results"])
+            return fused
+
+    @staticmethod
+    def _fuse(
+        dense: Dict[str, Any],
+        lexical: Optional[Dict[str, Any]],
+        n_results: int,
+        vector_weight: Optional[float],
+        lexical_weight: Optional[float]
+    ) -> Dict[str, Any]:
+        """Fuse vector and BM25 results (vector results alone without a lexical index)."""
+        weights = {
+            "vector": settings.HYBRID_VECTOR_WEIGHT if vector_weight is None else vector_weight,
+            "lexical": settings.HYBRID_LEXICAL_WEIGHT if lexical_weight is None else lexical_weight
         }
+        rankings = {"vector": dense["results"]}
+        if lexical is not None:
+            # BM25 scores are not comparable with the fused score
+            rankings["lexical"] = [{key: value for key, value in result.items() if key != "score"} for result in lexical["results"]]
+        results = reciprocal_rank_fusion(rankings, weights, n_results, settings.HYBRID_RRF_K)
+        return {"results": results, "count": len(results)}
+
+    def search_many(
+        self,
+        collection_name: str,
+        queries: List[str],
+        n_results: int = 5,
+        where: Optional[Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for several queries at once.
+
+        All queries are encoded in one batched forward pass. Queries sharing a
+        filter go to Chroma as a single multi-embedding query, so the filter is
+        evaluated once per distinct filter rather than once per query.
+
+        Args:
+            collection_name: Name of the collection
+            queries: Query texts
+            n_results: Number of results to return per query
+            where: One filter for all queries, or one (optional) filter per query
+
+        Returns:
+            Search results per query, in query order
+        """
+        if not queries:
+            return []
+        if where is None or isinstance(where, dict):
+            where = [where] * len(queries)
+        if len(where) != len(queries):
+            raise ValueError("where must be a single filter or one filter per query")
+
+        with self._instrument("search_many", collection_name):
+            query_embeddings = self.embedding_service.encode(queries)
+
+            groups: Dict[str, List[int]] = {}
+            for i, condition in enumerate(where):
+                groups.setdefault(json.dumps(condition, sort_keys=True), []).append(i)
+
+            collection = self.get_or_create_collection(collection_name)
+            formatted: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+            for rows in groups.values():
+                with self._instrument("query", collection_name):
+                    results = collection.query(
+                        query_embeddings=self._client_embeddings(query_embeddings[rows]),
+                        n_results=n_results,
+                        where=where[rows[0]]
+                    )
+                for row, i in enumerate(rows):
+                    formatted[i] = _format_results(results, row)
+
+            return formatted
+
+    async def search_many_async(
+        self,
+        collection_name: str,
+        queries: List[str],
+        n_results: int = 5,
+        where: Optional[Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for several queries without blocking the event loop.
+
+        Args:
+            collection_name: Name of the collection
+            queries: Query texts
+            n_results: Number of results to return per query
+            where: One filter for all queries, or one (optional) filter per query
+
+        Returns:
+            Search results per query, in query order
+        """
+        return await asyncio.to_thread(self.search_many, collection_name, queries, n_results, where)
+
+    async def search_async(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Search for similar documents without blocking the event loop.
+
+        The query embedding goes through the embedding micro-batcher, so concurrent
+        searches share forward passes.
+
+        Args:
+            collection_name: Name of the collection
+            query: Query text
+            n_results: Number of results to return
+            where: Optional filter conditions
+            include_embeddings: Return each result's stored vector as "embedding"
+
+        Returns:
+            Search results
+        """
+        with self._instrument("search", collection_name):
+            query_embedding = await self.embedding_service.encode_single_async(query)
+            return await asyncio.to_thread(
+                self._query, collection_name, query_embedding, n_results, where, include_embeddings
+            )
 
     def delete_collection(self, collection_name: str):
-        """Delete a collection."""
-        self.client.delete_collection(name=collection_name)
+        """Delete a collection (and its BM25 index) and drop its cached handle."""
+        with self._collections_lock:
+            self._collections.pop(collection_name, None)
+            self._lexical.pop(collection_name, None)
+            self._set_version(collection_name)
+            with self._instrument("delete_collection", collection_name):
+                self.client.delete_collection(name=collection_name)
+            shutil.rmtree(Path(settings.LEXICAL_INDEX_DIR) / collection_name, ignore_errors=True)
         logger.info(f"Deleted collection {collection_name}")
 
 
@@ -0,0 +1,740 @@
+"""
+In-process vector index: an alternative to Chroma for VectorDBService.
+
+Each collection keeps its unit-normalized float32 vectors in a memory-mapped matrix.
+Search is either exact (one matmul plus argpartition) or approximate with an
+inverted-file (IVF) index whose `nprobe` setting trades recall for latency.
+Metadata filters are resolved to candidate rows through an inverted metadata
+index before any vector is scored. Distances are cosine distances
+(1 - cosine similarity).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from pathlib import Path
+import json
+import math
+import os
+import re
+import threading
+import operator
+import numpy as np
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_MODES = ("exact", "ivf")
+_COMPARISONS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _compare(op: str, value: Any, operand: Any) -> bool:
+    """Range comparison; missing and incomparable values never match."""
+    try:
+        return value is not None and _COMPARISONS[op](value, operand)
+    except TypeError:
+        return False
+
+
+def _matches(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Evaluate a Chroma-style metadata filter against one record."""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        else:
+            value = metadata.get(key)
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, operand in condition.items():
+                if op == "$eq":
+                    ok = value == operand
+                elif op == "$ne":
+                    ok = value != operand
+                elif op == "$in":
+                    ok = value in operand
+                elif op == "$nin":
+                    ok = value not in operand
+                elif op in _COMPARISONS:
+                    ok = _compare(op, value, operand)
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                if not ok:
+                    return False
+    return True
+
+
+class MetadataIndex:
+    """
+    Inverted index from metadata values to the rows that hold them.
+
+    Every (key, value) pair has a posting list of row numbers, materialized as a
+    sorted array on first use and extended as rows are appended. A filter is
+    resolved on these arrays (intersections for $and, unions for $or, $in and
+    ranges, complements for $ne and $nin), so only matching rows are scored.
+
+    A row whose metadata is replaced stays in its old posting lists and is
+    marked stale; stale rows are re-checked against the filter at query time, so
+    updates never rewrite a posting list.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.postings: Dict[str, Dict[Any, List[int]]] = {}
+        self._arrays: Dict[Tuple[str, Any], np.ndarray] = {}
+        self.stale: Set[int] = set()
+
+    def add(self, row: int, metadata: Dict[str, Any]):
+        """Index a row's metadata (unhashable values are skipped)."""
+        for key, value in metadata.items():
+            try:
+                self.postings.setdefault(key, {}).setdefault(value, []).append(row)
+            except TypeError:
+                continue
+
+    def _posting(self, key: str, value: Any) -> np.ndarray:
+        """Sorted rows holding `value` under `key`."""
+        try:
+            rows = self.postings.get(key, {}).get(value)
+        except TypeError:
+            rows = None
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        cached = self._arrays.get((key, value))
+        if cached is None or len(cached) != len(rows):
+            done = 0 if cached is None else len(cached)
+            tail = np.asarray(rows[done:], dtype=np.int64)
+            if cached is not None and (len(cached) == 0 or tail.min() > cached[-1]) and np.all(np.diff(tail) > 0):
+                cached = np.concatenate([cached, tail])
+            else:
+                cached = np.unique(np.asarray(rows, dtype=np.int64))
+                if len(cached) != len(rows):
+                    # Drop duplicate entries left by rewrites
+                    rows[:] = cached.tolist()
+            self._arrays[(key, value)] = cached
+        return cached
+
+    def rows(self, where: Dict[str, Any], alive: np.ndarray, metadatas: List[Optional[Dict[str, Any]]]) -> np.ndarray:
+        """
+        Resolve a filter to candidate rows.
+
+        Args:
+            where: Chroma-style metadata filter
+            alive: Mask of live rows
+            metadatas: Metadata by row (used to re-check stale rows)
+
+        Returns:
+            Sorted live rows matching the filter
+        """
+        rows = self._resolve(where, alive)
+        rows = rows[alive[rows]]
+        if self.stale:
+            stale = np.fromiter((row for row in self.stale if row < len(alive) and alive[row]), dtype=np.int64)
+            if len(stale):
+                keep = np.fromiter((_matches(metadatas[row], where) for row in stale), dtype=bool, count=len(stale))
+                rows = np.union1d(np.setdiff1d(rows, stale, assume_unique=True), stale[keep])
+        return rows
+
+    def _resolve(self, where: Dict[str, Any], alive: np.ndarray) -> np.ndarray:
+        parts = []
+        for key, condition in where.items():
+            if key == "$and":
+                parts.extend(self._resolve(clause, alive) for clause in condition)
+            elif key == "$or":
+                parts.append(_union([self._resolve(clause, alive) for clause in condition], len(alive)))
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                parts.extend(self._field(key, op, operand, alive) for op, operand in condition.items())
+        return _intersection(parts) if parts else np.flatnonzero(alive)
+
+    def _field(self, key: str, op: str, operand: Any, alive: np.ndarray) -> np.ndarray:
+        """Rows matching one operator on one key."""
+        if op == "$eq":
+            return self._posting(key, operand)
+        if op == "$in":
+            return _union([self._posting(key, value) for value in operand], len(alive))
+        if op in ("$ne", "$nin"):
+            excluded = self._posting(key, operand) if op == "$ne" else _union([self._posting(key, v) for v in operand], len(alive))
+            mask = alive.copy()
+            mask[excluded[excluded < len(mask)]] = False
+            return np.flatnonzero(mask)
+        if op in _COMPARISONS:
+            values = self.postings.get(key, {})
+            return _union([self._posting(key, value) for value in values if _compare(op, value, operand)], len(alive))
+        raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _union(parts: List[np.ndarray], size: int) -> np.ndarray:
+    """Sorted union of row arrays (through a mask once the parts are large)."""
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    if len(parts) == 1:
+        return parts[0]
+    if sum(len(part) for part in parts) < size // 64:
+        return np.unique(np.concatenate(parts))
+    mask = np.zeros(size, dtype=bool)
+    for part in parts:
+        mask[part] = True
+    return np.flatnonzero(mask)
+
+
+def _intersection(parts: Iterable[np.ndarray]) -> np.ndarray:
+    """Intersection of sorted row arrays, probing the smallest into the others."""
+    parts = sorted(parts, key=len)
+    rows = parts[0]
+    for part in parts[1:]:
+        if not len(rows):
+            break
+        found = np.minimum(np.searchsorted(part, rows), len(part) - 1)
+        rows = rows[part[found] == rows] if len(part) else rows[:0]
+    return rows
+
+
+class IVFIndex:
+    """
+    Inverted-file index over a vector matrix.
+
+    Spherical k-means splits the vectors into `nlist` cells. A query scores only
+    the rows of its `nprobe` nearest cells.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray):
+        """
+        Initialize from trained centroids.
+
+        Args:
+            centroids: (nlist, dimension) unit vectors
+            assignments: Cell of each indexed row
+        """
+        self.centroids = centroids
+        self.trained_rows = len(assignments)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        self.lists: List[np.ndarray] = [
+            order[bounds[i]:bounds[i + 1]].astype(np.int64) for i in range(len(centroids))
+        ]
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        """
+        Train centroids on a sample of the vectors and assign every row.
+
+        Args:
+            vectors: (n, dimension) unit vectors
+            nlist: Number of cells
+            iterations: k-means iterations
+            seed: Random seed for sampling and initialization
+
+        Returns:
+            Trained index
+        """
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), nlist * 32)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        return cls(centroids, cls.assign(centroids, vectors))
+
+    @staticmethod
+    def assign(centroids: np.ndarray, vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+        """Nearest cell of each vector (in blocks to bound memory)."""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            labels[start:start + block] = np.argmax(vectors[start:start + block] @ centroids.T, axis=1)
+        return labels
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Add newly written rows to their cells."""
+        labels = self.assign(self.centroids, vectors)
+        for cell in np.unique(labels):
+            self.lists[cell] = np.concatenate([self.lists[cell], rows[labels == cell]])
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the `nprobe` cells nearest to a query (may contain duplicates after rewrites)."""
+        cells = _top_k(self.centroids @ query, min(nprobe, len(self.centroids)))
+        return np.concatenate([self.lists[cell] for cell in cells])
+
+
+class LocalCollection:
+    """
+    A collection stored in a directory:
+
+    - meta.json: dimension and generation
+    - vectors.f32: memory-mapped (capacity, dimension) matrix, grown by doubling
+    - records.jsonl: append-only log of {row, id, document, metadata} and deletions
+
+    Upserting an existing ID rewrites its row in place, and only logs a record if
+    its document or metadata changed. The metadata index is rebuilt from the
+    records on load. Once most of the log is superseded or deleted records, the
+    collection is compacted into a new generation of both files (live rows only,
+    renumbered), which replacing meta.json switches to atomically.
+    """
+
+    INITIAL_CAPACITY = 1024
+    COMPACT_MIN_RECORDS = 4096
+
+    def __init__(self, name: str, directory: Path, mode: str = "exact", nprobe: Optional[int] = None):
+        """
+        Open (or create) a collection.
+
+        Args:
+            name: Collection name
+            directory: Collection directory
+            mode: "exact" or "ivf"
+            nprobe: IVF cells searched per query
+        """
+        if mode not in INDEX_MODES:
+            raise ValueError(f"Unknown vector index mode: {mode}")
+        self.name = name
+        self.directory = directory
+        self.mode = mode
+        self.nprobe = nprobe or settings.VECTOR_INDEX_IVF_NPROBE
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._meta_path = directory / "meta.json"
+        self.dimension: Optional[int] = None
+        self.generation = 0
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+            self.dimension = meta["dimension"]
+            self.generation = meta.get("generation", 0)
+        self._vectors_path, self._records_path = self._paths(self.generation)
+        self._log_records = 0
+
+        self.ids: List[Optional[str]] = []
+        self.documents: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict[str, Any]]] = []
+        self.rows: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.memmap] = None
+        self._ivf: Optional[IVFIndex] = None
+        self._index: Optional[MetadataIndex] = None
+        self._load()
+        self._rebuild_index()
+
+    def _paths(self, generation: int) -> Tuple[Path, Path]:
+        """Vector and record files of a generation."""
+        if generation == 0:
+            return self.directory / "vectors.f32", self.directory / "records.jsonl"
+        return self.directory / f"vectors.{generation}.f32", self.directory / f"records.{generation}.jsonl"
+
+    def _write_meta(self):
+        """Atomically replace meta.json (this is what switches to a new generation)."""
+        temporary = self._meta_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"dimension": self.dimension, "generation": self.generation}))
+        os.replace(temporary, self._meta_path)
+
+    def _load(self):
+        """Replay the record log and map the vectors."""
+        # Files of other generations are left over from an interrupted compaction
+        current = {self._vectors_path, self._records_path}
+        for path in [*self.directory.glob("vectors*.f32"), *self.directory.glob("records*.jsonl")]:
+            if path not in current:
+                path.unlink(missing_ok=True)
+
+        if self._records_path.exists():
+            with open(self._records_path, encoding="utf-8") as records:
+                for line in records:
+                    if not line.endswith("\n"):
+                        break  # torn final record
+                    self._log_records += 1
+                    record = json.loads(line)
+                    row = record["row"]
+                    self._ensure_rows(row + 1)
+                    if record.get("deleted"):
+                        self._drop_row(row)
+                    else:
+                        self._set_row(row, record["id"], record["document"], record["metadata"])
+        if self.dimension is not None:
+            stored = self._vectors_path.stat().st_size // (self.dimension * 4) if self._vectors_path.exists() else 0
+            self._open_vectors(max(self.INITIAL_CAPACITY, stored, len(self.ids)))
+            if self.mode == "ivf" and len(self.ids) >= settings.VECTOR_INDEX_IVF_MIN_ROWS:
+                self._ivf = self.build_ivf()
+
+    def _ensure_rows(self, count: int):
+        """Grow the per-row lists to `count` rows."""
+        missing = count - len(self.ids)
+        if missing > 0:
+            self.ids.extend([None] * missing)
+            self.documents.extend([None] * missing)
+            self.metadatas.extend([None] * missing)
+            self._alive = np.concatenate([self._alive, np.zeros(missing, dtype=bool)])
+
+    def _set_row(self, row: int, record_id: str, document: Optional[str], metadata: Optional[Dict[str, Any]]):
+        metadata = metadata or {}
+        if self._index is not None:
+            previous = self.metadatas[row] if self._alive[row] else None
+            if previous is None:
+                self._index.add(row, metadata)
+            elif previous != metadata:
+                self._index.stale.add(row)
+                self._index.add(row, metadata)
+        self.ids[row] = record_id
+        self.documents[row] = document
+        self.metadatas[row] = metadata
+        self.rows[record_id] = row
+        self._alive[row] = True
+
+    def _drop_row(self, row: int):
+        if self.ids[row] is not None:
+            self.rows.pop(self.ids[row], None)
+        self.ids[row] = self.documents[row] = self.metadatas[row] = None
+        self._alive[row] = False
+
+    def _rebuild_index(self):
+        """Index the metadata of all live rows (drops stale postings)."""
+        index = MetadataIndex()
+        for row in np.flatnonzero(self._alive):
+            index.add(int(row), self.metadatas[row])
+        self._index = index
+
+    def _open_vectors(self, capacity: int):
+        """Map the vector file with room for at least `capacity` rows."""
+        if self._vectors is not None:
+            self._vectors.flush()
+        size = capacity * self.dimension * 4
+        with open(self._vectors_path, "ab") as vectors_file:
+            if vectors_file.tell() < size:
+                vectors_file.truncate(size)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def count(self) -> int:
+        """Number of stored records."""
+        return len(self.rows)
+
+    def add(self, ids: List[str], embeddings: Any, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict[str, Any]]] = None):
+        """Add records (same as upsert)."""
+        self.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def upsert(self, ids: List[str], embeddings: Any, documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict[str, Any]]] = None):
+        """
+        Insert or replace records.
+
+        Args:
+            ids: Record IDs
+            embeddings: (len(ids), dimension) float32 array (or nested lists)
+            documents: Optional document texts
+            metadatas: Optional metadata dicts
+        """
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self._write_meta()
+                self._open_vectors(self.INITIAL_CAPACITY)
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(f"Expected {self.dimension}-dimensional embeddings, got {vectors.shape[1]}")
+
+            rows = np.empty(len(ids), dtype=np.int64)
+            next_row = len(self.ids)
+            for i, record_id in enumerate(ids):
+                row = self.rows.get(record_id)
+                if row is None:
+                    row = next_row
+                    next_row += 1
+                    self.rows[record_id] = row
+                rows[i] = row
+
+            if next_row > self._vectors.shape[0]:
+                capacity = self._vectors.shape[0]
+                while capacity < next_row:
+                    capacity *= 2
+                self._open_vectors(capacity)
+
+            self._vectors[rows] = vectors
+            self._vectors.flush()
+            self._ensure_rows(next_row)
+
+            with open(self._records_path, "a", encoding="utf-8") as records:
+                for row, record_id, document, metadata in zip(rows, ids, documents, metadatas):
+                    row = int(row)
+                    if self._alive[row] and self.documents[row] == document and self.metadatas[row] == (metadata or {}):
+                        continue  # unchanged (e.g. re-ingested); only the vector was rewritten
+                    records.write(json.dumps({
+                        "row": row, "id": record_id, "document": document, "metadata": metadata
+                    }) + "\n")
+                    self._log_records += 1
+                    self._set_row(row, record_id, document, metadata)
+
+            if len(self._index.stale) > max(1024, len(self.rows) // 8):
+                self._rebuild_index()
+            if self.mode == "ivf":
+                self._update_ivf(rows, vectors)
+            self._maybe_compact()
+
+    def delete(self, ids: Sequence[str]):
+        """Delete records by ID."""
+        with self._lock:
+            with open(self._records_path, "a", encoding="utf-8") as records:
+                for record_id in ids:
+                    row = self.rows.get(record_id)
+                    if row is not None:
+                        records.write(json.dumps({"row": row, "deleted": True}) + "\n")
+                        self._log_records += 1
+                        self._drop_row(row)
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        """Compact once most logged records are dead (caller holds the lock)."""
+        if self._log_records >= max(self.COMPACT_MIN_RECORDS, 2 * len(self.rows)):
+            self._compact()
+
+    def _compact(self):
+        """
+        Write the live rows, renumbered, as a new generation and switch to it (caller holds the lock).
+
+        The new files are synced before meta.json names them, so a crash leaves
+        either the old generation or the new one intact.
+        """
+        live = np.flatnonzero(self._alive)
+        generation = self.generation + 1
+        vectors_path, records_path = self._paths(generation)
+
+        with open(vectors_path, "wb") as vectors_file:
+            vectors_file.write(np.ascontiguousarray(self._vectors[live]).tobytes())
+            vectors_file.flush()
+            os.fsync(vectors_file.fileno())
+        with open(records_path, "w", encoding="utf-8") as records:
+            for new_row, row in enumerate(live):
+                records.write(json.dumps({
+                    "row": new_row, "id": self.ids[row], "document": self.documents[row], "metadata": self.metadatas[row]
+                }) + "\n")
+            records.flush()
+            os.fsync(records.fileno())
+
+        old_paths = (self._vectors_path, self._records_path)
+        self.generation = generation
+        self._write_meta()
+        self._vectors_path, self._records_path = vectors_path, records_path
+        for path in old_paths:
+            path.unlink(missing_ok=True)
+
+        # New lists rather than in-place edits, so queries reading the old rows stay consistent
+        self.ids = [self.ids[row] for row in live]
+        self.documents = [self.documents[row] for row in live]
+        self.metadatas = [self.metadatas[row] for row in live]
+        self.rows = {record_id: row for row, record_id in enumerate(self.ids)}
+        self._alive = np.ones(len(live), dtype=bool)
+        self._log_records = len(live)
+        self._vectors = None
+        self._open_vectors(max(self.INITIAL_CAPACITY, len(live)))
+        self._rebuild_index()
+        if self.mode == "ivf":
+            self._ivf = self.build_ivf() if len(live) >= settings.VECTOR_INDEX_IVF_MIN_ROWS else None
+        logger.info(f"Compacted vector collection {self.name}: {len(live)} live rows (generation {generation})")
+
+    def _update_ivf(self, rows: np.ndarray, vectors: np.ndarray):
+        """Train the IVF index once there are enough rows, and retrain as it doubles (caller holds the lock)."""
+        total = len(self.ids)
+        if total < settings.VECTOR_INDEX_IVF_MIN_ROWS:
+            return
+        if self._ivf is None or total >= 2 * self._ivf.trained_rows:
+            self._ivf = self.build_ivf()
+        else:
+            self._ivf.add(rows, vectors)
+
+    def build_ivf(self, nlist: Optional[int] = None) -> IVFIndex:
+        """
+        Train an IVF index over all rows.
+
+        Args:
+            nlist: Number of cells (defaults to VECTOR_INDEX_IVF_NLIST, or about sqrt(rows))
+
+        Returns:
+            Trained index
+        """
+        total = len(self.ids)
+        nlist = nlist or settings.VECTOR_INDEX_IVF_NLIST or max(1, int(math.sqrt(total)))
+        index = IVFIndex.train(self._vectors[:total], min(nlist, total))
+        logger.info(f"Trained IVF index for {self.name}: {total} rows, {len(index.centroids)} cells")
+        return index
+
+    def _prefilter_limit(self, total: int, ivf: Optional[IVFIndex]) -> int:
+        """Largest candidate set scored directly rather than through the full scan or IVF."""
+        if ivf is None:
+            # Gathering rows costs several times more per row than the full matmul
+            return total // 8
+        return self.nprobe * total // len(ivf.centroids)
+
+    def query(self, query_embeddings: Any, n_results: int = 10, where: Optional[Dict[str, Any]] = None,
+              include: Optional[List[str]] = None, **kwargs) -> Dict[str, List[List[Any]]]:
+        """
+        Nearest-neighbour search, returning a Chroma-shaped response.
+
+        With a filter, the metadata index yields the candidate rows first. When
+        the filter is selective, only those rows are scored (exactly, in both
+        modes); otherwise they mask the full scan or the IVF candidates.
+
+        Args:
+            query_embeddings: (m, dimension) array (or nested lists)
+            n_results: Results per query
+            where: Optional metadata filter
+            include: Optional fields to return; "embeddings" adds the stored vectors
+
+        Returns:
+            Dict of ids, documents, metadatas and distances (and embeddings), one list per query
+        """
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimension or 1))
+        response: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with_embeddings = include is not None and "embeddings" in include
+        if with_embeddings:
+            response["embeddings"] = []
+
+        with self._lock:
+            total = len(self.ids)
+            if self.dimension is None or total == 0:
+                for key in response:
+                    response[key] = [[] for _ in queries]
+                return response
+            matrix = self._vectors[:total]
+            alive = self._alive[:total].copy()
+            ids, documents, metadatas = self.ids, self.documents, self.metadatas
+            candidates = self._index.rows(where, alive, self.metadatas) if where else None
+            ivf = self._ivf if self.mode == "ivf" else None
+
+        if candidates is not None and len(candidates) <= self._prefilter_limit(total, ivf):
+            # Selective filter: score only the candidate rows
+            scores = matrix[candidates] @ queries.T
+            hits = [
+                [(int(candidates[i]), float(scores[i, q])) for i in _top_k(scores[:, q], min(n_results, len(candidates)))]
+                for q in range(len(queries))
+            ]
+        else:
+            mask = alive
+            if candidates is not None:
+                mask = np.zeros(total, dtype=bool)
+                mask[candidates] = True
+            if ivf is None:
+                # Exact: one matmul for all queries
+                scores = matrix @ queries.T
+                scores[~mask] = -np.inf
+                hits = [self._hits(scores[:, i], n_results) for i in range(len(queries))]
+            else:
+                hits = []
+                for query in queries:
+                    rows = np.unique(ivf.candidates(query, self.nprobe))
+                    rows = rows[mask[rows]]
+                    scores = matrix[rows] @ query
+                    top = _top_k(scores, min(n_results, len(rows)))
+                    hits.append([(int(rows[i]), float(scores[i])) for i in top])
+
+        for row_hits in hits:
+            response["ids"].append([ids[row] for row, _ in row_hits])
+            response["documents"].append([documents[row] for row, _ in row_hits])
+            response["metadatas"].append([metadatas[row] for row, _ in row_hits])
+            response["distances"].append([1.0 - score for _, score in row_hits])
+            if with_embeddings:
+                response["embeddings"].append(np.array(matrix[[row for row, _ in row_hits]]))
+        return response
+
+    def get(self, ids: Sequence[str], include: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Fetch records by ID, returning a Chroma-shaped response (unknown IDs are skipped).
+
+        Args:
+            ids: Record IDs
+            include: Optional fields to return; "embeddings" adds the stored vectors
+
+        Returns:
+            Dict of ids, documents and metadatas (and embeddings), one entry per found record
+        """
+        with self._lock:
+            rows = [self.rows[record_id] for record_id in ids if record_id in self.rows]
+            response: Dict[str, Any] = {
+                "ids": [self.ids[row] for row in rows],
+                "documents": [self.documents[row] for row in rows],
+                "metadatas": [self.metadatas[row] for row in rows]
+            }
+            if include is not None and "embeddings" in include:
+                response["embeddings"] = (
+                    np.array(self._vectors[rows]) if rows else np.empty((0, self.dimension or 0), dtype=np.float32)
+                )
+        return response
+
+    @staticmethod
+    def _hits(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Top-k (row, score) pairs, skipping filtered-out rows."""
+        return [(int(row), float(scores[row])) for row in _top_k(scores, k) if np.isfinite(scores[row])]
+
+    def close(self):
+        """Flush the vector map."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+
+class LocalVectorClient:
+    """Chroma-compatible client over LocalCollection directories."""
+
+    def __init__(self, directory: Optional[str] = None, mode: Optional[str] = None):
+        """
+        Initialize the client.
+
+        Args:
+            directory: Root directory holding one subdirectory per collection
+            mode: "exact" or "ivf"
+        """
+        self.directory = Path(directory or settings.VECTOR_INDEX_DIR)
+        self.mode = mode or settings.VECTOR_DB_BACKEND
+        if self.mode not in INDEX_MODES:
+            raise ValueError(f"Unknown vector index mode: {self.mode}")
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name: str) -> Path:
+        if not _SAFE_NAME.match(name):
+            raise ValueError(f"Invalid collection name: {name!r}")
+        return self.directory / name
+
+    def get_or_create_collection(self, name: str, **kwargs) -> LocalCollection:
+        """Open a collection, creating it if needed."""
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = LocalCollection(name, self._path(name), self.mode)
+                self._collections[name] = collection
+            return collection
+
+    def delete_collection(self, name: str):
+        """Delete a collection and its files."""
+        with self._lock:
+            collection = self._collections.pop(name, None)
+            if collection is not None:
+                collection.close()
+            path = self._path(name)
+            if path.exists():
+                for child in path.iterdir():
+                    child.unlink()
+                path.rmdir()
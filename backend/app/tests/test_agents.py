@@ -2,14 +2,96 @@
 Tests for agent implementations.
 """
 
+import asyncio
+import numpy as np
 import pytest
 from app.agents import (
+    BaseAgent,
     RoutingAgent,
     RAGAgent,
     SQLAgent,
     PrescriptionAgent,
-    GuardrailAgent
+    GuardrailAgent,
+    ChatPipeline,
+    PipelineTimeoutError
 )
+from app.agents.routing_agent import RuleRouter
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.chunker import WordTokenizer
+from app.services.context_packer import ContextPacker
+
+
+class StubSemanticRouter:
+    """Semantic router that matches nothing, so unmatched queries fall back to RAG."""
+
+    def classify(self, query):
+        return None
+
+    async def classify_async(self, query):
+        return None
+
+
+class StubEmbeddingService:
+    """Embeds texts as fixed random vectors (one per distinct text)."""
+
+    model_name = "test-stub"
+
+    def encode(self, texts):
+        return np.stack([np.random.default_rng(abs(hash(text)) % 2**32).random(16) for text in texts])
+
+    def encode_single(self, text):
+        return self.encode([text])[0]
+
+    async def encode_single_async(self, text):
+        return self.encode_single(text)
+
+
+class StubDocumentClient:
+    """Document search returning fixed results, with a document-set version."""
+
+    async def search_documents(self, query, filters=None, top_k=5, include_embeddings=False):
+        return [
+            {"id": "doc-1", "title": "Diabetes overview", "content": "Symptoms include thirst.", "score": 0.8},
+            {"id": "doc-2", "title": "Diabetes care", "content": "Check HbA1c every three months.", "score": 0.6},
+        ][:top_k]
+
+    def document_set_version(self):
+        return 1
+
+
+class StubDatabaseClient:
+    """Database client returning no rows."""
+
+    async def execute_query(self, query, params=None, read_only=True):
+        return {"rows": [], "row_count": 0}
+
+
+class SideEffectAgent(BaseAgent):
+    """Agent with side effects that records its runs."""
+
+    def __init__(self):
+        super().__init__("side_effect_agent")
+        self.runs = 0
+
+    async def execute(self, task):
+        self.runs += 1
+        return self.create_success_result(task_id=task.task_id, response={"booked": True}, confidence=0.9)
+
+
+def stub_pipeline(**agents):
+    """Chat pipeline over stub routing, retrieval and database clients (no models or MCP servers)."""
+    embedder = StubEmbeddingService()
+    rag_agent = RAGAgent(
+        document_client=StubDocumentClient(),
+        context_packer=ContextPacker(tokenizer=WordTokenizer(), embed=embedder.encode),
+        answer_cache=SemanticAnswerCache(),
+        embedding_service=embedder
+    )
+    return ChatPipeline(
+        routing_agent=RoutingAgent(semantic_router=StubSemanticRouter()),
+        guardrail_agent=GuardrailAgent(),
+        agents={"rag": rag_agent, "sql": SQLAgent(db_client=StubDatabaseClient()), **agents}
+    )
 
 
 @pytest.mark.asyncio
@@ -79,6 +161,31 @@ async def test_guardrail_agent():
     assert "[REDACTED_" in result.response["redacted_content"]
 
 
+@pytest.mark.asyncio
+async def test_guardrail_verdict_cache():
+    """Test guardrail verdicts are memoized and dropped when policies change."""
+    from app.agents.guardrail_agent import verdict_cache
+
+    agent = GuardrailAgent()
+    task = {
+        "query": "validate content",
+        "context": {"content": "Take ibuprofen for the pain. Call 555-123-4567 for treatment."},
+        "session_id": "test_session"
+    }
+
+    first = await agent.run(task)
+    hits = verdict_cache.hits
+    second = await agent.run(task)
+    assert verdict_cache.hits == hits + 1
+    assert second.response == first.response
+
+    # Disabling a policy invalidates cached verdicts
+    agent.policies["medical_advice_disclaimer"]["enabled"] = False
+    third = await agent.run(task)
+    assert verdict_cache.hits == hits + 1
+    assert "Disclaimer" not in third.response["redacted_content"]
+
+
 @pytest.mark.asyncio
 async def test_sql_agent_safety():
     """Test SQL agent safety checks."""
@@ -116,3 +223,106 @@ def test_routing_agent_patterns():
         matches = agent._rule_based_classification(query.lower())
         assert len(matches) > 0
         assert matches[0]["agent"] == expected_agent
+
+
+@pytest.mark.asyncio
+async def test_chat_pipeline_speculation():
+    """Test chat pipeline starts side-effect-free agents early with unchanged results."""
+    appointment = SideEffectAgent()
+    pipeline = stub_pipeline(appointment=appointment)
+    predictions = []
+    predict = pipeline.routing_agent.predict_async
+
+    async def counted_predict(query):
+        predictions.append(query)
+        return await predict(query)
+
+    pipeline.routing_agent.predict_async = counted_predict
+
+    result = await pipeline.run("find documents about diabetes", {}, "test_session", 1)
+    assert len(predictions) == 1  # shared by speculation and the routing agent
+    assert result.target_agent_name == "rag"
+    assert result.speculative
+    assert result.result.success
+    assert result.guardrail_result.success
+    assert result.routing_result.response["target_agent"] == "rag"
+
+    # Agents with side effects are never started early
+    result = await pipeline.run("book an appointment", {}, "test_session", 1)
+    assert result.target_agent_name == "appointment"
+    assert not result.speculative
+    assert appointment.runs == 1
+
+    # Predictions below the threshold are not started early
+    pipeline.speculation_threshold = 0.95
+    result = await pipeline.run("count patients by clinic", {}, "test_session", 1)
+    assert result.target_agent_name == "sql"
+    assert not result.speculative
+
+
+@pytest.mark.asyncio
+async def test_chat_pipeline_deadline():
+    """Test chat pipeline enforces the step deadline."""
+    class SlowAgent(RAGAgent):
+        async def execute(self, task):
+            await asyncio.sleep(1)
+
+    pipeline = ChatPipeline(
+        routing_agent=RoutingAgent(),
+        guardrail_agent=GuardrailAgent(),
+        agents={"rag": SlowAgent()},
+        timeout_seconds=0.05
+    )
+
+    with pytest.raises(PipelineTimeoutError):
+        await pipeline.run("find documents about diabetes", {}, "test_session", 1)
+
+
+def test_rule_router_single_scan():
+    """Test compiled rule router returns every matching agent in rule-table order."""
+    agent = RoutingAgent()
+
+    matches = agent._rule_based_classification("please reschedule and send the invoice for my rash")
+    assert [m["agent"] for m in matches] == ["appointment", "image_analysis", "payment"]
+
+    router = RuleRouter({"first": ["a|b"], "second": ["ab?c"], "third": [r"\d+"]})
+    assert [m["agent"] for m in router.match("B")] == ["first"]
+    assert [m["agent"] for m in router.match("ac 42")] == ["first", "second", "third"]
+
+
+def test_stream_guard_redacts_across_chunks():
+    """Test PHI split across streamed chunks is still redacted as a whole."""
+    from app.core.security import redact_phi
+
+    text = "Your results are in. Call the clinic at 555-123-4567 or email care@example.org today. " * 3
+    guard = GuardrailAgent().stream_guard()
+
+    released = [guard.feed(text[i:i + 7]) for i in range(0, len(text), 7)]
+    released.append(guard.finish())
+
+    assert "".join(released) == redact_phi(text)
+    assert any(released[:-1])  # text was released before the end
+    assert guard.redactions == 6
+
+    # Unsafe content stops the stream
+    guard = GuardrailAgent().stream_guard()
+    guard.feed("This is about self")
+    guard.feed(" harm and the illegal drug market")
+    assert guard.blocked
+    assert guard.finish() == ""
+
+
+@pytest.mark.asyncio
+async def test_chat_pipeline_stream():
+    """Test streamed pipeline events arrive in order with the verdict last."""
+    pipeline = stub_pipeline()
+
+    events = [e async for e in pipeline.stream("find documents about diabetes", {}, "test_session", 1)]
+    names = [e["event"] for e in events]
+
+    assert names[0] == "routing"
+    assert events[0]["data"]["target_agent"] == "rag"
+    assert names[-1] == "guardrail"
+    assert names.index("sources") < names.index("chunk")
+    answer = "".join(e["data"]["text"] for e in events if e["event"] == "chunk")
+    assert answer.startswith("Based on 2 relevant documents")
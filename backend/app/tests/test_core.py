@@ -0,0 +1,258 @@
+"""
+Tests for core utilities.
+"""
+
+import json
+import threading
+import time
+from app.core.audit_writer import AuditWriter, FileAuditSink
+from app.core.content_cache import ContentCache, content_key
+from app.core.security import PHI_PATTERNS, phi_redactor, redact_phi_dict
+
+
+def read_entries(path):
+    with open(path) as audit_file:
+        return [json.loads(line) for line in audit_file]
+
+
+def test_phi_redactor_single_pass():
+    """Test the combined redaction engine matches per-pattern redaction and reports spans."""
+    text = "SSN 123-45-6789, call 555.123.4567 or mail jane@example.org; card 4111 1111 1111 1111, MRN: 42"
+
+    legacy = text
+    for name, pattern in PHI_PATTERNS.items():
+        for match in pattern.findall(legacy):
+            legacy = legacy.replace(match, f"[REDACTED_{name.upper()}]")
+
+    redacted, matches = phi_redactor.redact(text)
+    assert redacted == legacy
+    assert [m.phi_type for m in matches] == ["ssn", "phone", "email", "credit_card", "mrn"]
+    assert text[matches[0].start:matches[0].end] == "123-45-6789"
+    assert phi_redactor.scan(text) == matches
+    # A repeat is served from the cache
+    hits = phi_redactor.cache.hits
+    assert phi_redactor.redact(text) == (redacted, matches)
+    assert phi_redactor.cache.hits > hits
+
+    nested = redact_phi_dict({"a": ["SSN 123-45-6789", {"b": "jane@example.org"}], "n": 1})
+    assert nested == {"a": ["SSN [REDACTED_SSN]", {"b": "[REDACTED_EMAIL]"}], "n": 1}
+
+
+def test_content_cache_lru_and_invalidation():
+    """Test content cache bounds, LRU order and version invalidation."""
+    cache = ContentCache("test_cache", max_bytes=10_000, max_entries=3)
+    keys = [content_key(f"SSN 123-45-678{i}") for i in range(4)]
+    assert all(isinstance(key, bytes) and len(key) == 16 for key in keys)
+
+    for i, key in enumerate(keys[:3]):
+        cache.put(key, i, size=10, version="v1")
+    assert cache.get(keys[0], "v1") == 0  # keys[0] is now most recently used
+    cache.put(keys[3], 3, size=10, version="v1")
+    assert cache.get(keys[1], "v1") is None
+    assert cache.stats()["evictions"] == 1
+
+    # Memory cap evicts old entries; oversized values are not cached
+    cache.put(content_key("big"), "x", size=9_700, version="v1")
+    assert cache.stats()["entries"] == 1
+    cache.put(content_key("huge"), "x", size=20_000, version="v1")
+    assert cache.get(content_key("huge"), "v1") is None
+
+    # A new version drops everything cached under the old one
+    assert cache.get(content_key("big"), "v2") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_audit_writer_batches_and_redacts(tmp_path):
+    """Test queued audit entries are redacted and durably written."""
+    path = tmp_path / "audit.log"
+    writer = AuditWriter(
+        sinks=[FileAuditSink(str(path))],
+        batch_size=16,
+        flush_interval_ms=10,
+        spill_path=str(tmp_path / "spill.log")
+    )
+
+    for i in range(100):
+        writer.submit({"event_type": "agent_action", "seq": i, "input": {"query": "SSN 123-45-6789"}})
+
+    assert writer.flush(timeout=5)
+    entries = read_entries(path)
+    assert [e["seq"] for e in entries] == list(range(100))
+    assert entries[0]["input"]["query"] == "SSN [REDACTED_SSN]"
+    assert writer.stats()["acknowledged"] == 100
+    writer.shutdown()
+
+
+def test_audit_writer_overflow_policies(tmp_path):
+    """Test drop and spill overflow policies."""
+    spill_path = tmp_path / "spill.log"
+    sink = FileAuditSink(str(tmp_path / "audit.log"))
+
+    writer = AuditWriter(sinks=[sink], queue_size=1, overflow_policy="drop", spill_path=str(spill_path))
+    writer.start = lambda: None  # keep the queue full
+    writer.submit({"seq": 0})
+    assert writer.submit({"seq": 1}) is False
+    assert writer.stats()["dropped"] == 1
+
+    writer = AuditWriter(sinks=[sink], queue_size=1, overflow_policy="spill", spill_path=str(spill_path))
+    writer.start = lambda: None
+    writer.submit({"seq": 0})
+    assert writer.submit({"seq": 1, "prompt": "call 555-123-4567"}) is True
+    assert not spill_path.exists()  # the caller never writes; the writer thread spills
+    # With the handoff full as well, the submitter spills the entry itself
+    assert writer.submit({"seq": 2}) is True
+    assert writer.stats()["spill_backlog"] == 1
+    assert read_entries(spill_path) == [{"seq": 2}]
+    writer._spill_overflow()
+    assert read_entries(spill_path) == [{"seq": 2}, {"seq": 1, "prompt": "call [REDACTED_PHONE]"}]
+    assert writer.stats()["spilled"] == 2
+
+    # Spilled entries are moved into the sinks when a writer starts
+    recovered = AuditWriter(sinks=[sink], flush_interval_ms=10, spill_path=str(spill_path))
+    recovered.start()
+    assert not spill_path.exists()
+    assert read_entries(tmp_path / "audit.log") == [{"seq": 2}, {"seq": 1, "prompt": "call [REDACTED_PHONE]"}]
+    recovered.shutdown()
+
+
+def test_audit_writer_keeps_entries_sinks_fail_on(tmp_path):
+    """Test batches a sink rejects are spilled, not acknowledged as written, and entries failing redaction are kept."""
+    class FailingSink(FileAuditSink):
+        fail_writes = True
+        fail_syncs = False
+
+        def write(self, entries):
+            if self.fail_writes:
+                raise OSError("disk full")
+            super().write(entries)
+
+        def sync(self):
+            if self.fail_syncs:
+                raise OSError("sync failed")
+            super().sync()
+
+    def redact(entry):
+        if entry.get("seq") == 1:
+            raise ValueError("unredactable")
+        return entry
+
+    spill_path = tmp_path / "spill.log"
+    sink = FailingSink(str(tmp_path / "audit.log"))
+    writer = AuditWriter(
+        sinks=[sink], batch_size=8, flush_interval_ms=10, spill_path=str(spill_path), redact=redact
+    )
+    writer._recover_spill = lambda: None  # keep spilled entries in the spill file
+    for i in range(5):
+        writer.submit({"seq": i, "input": {"query": "SSN 123-45-6789"}})
+    assert writer.flush(timeout=5)
+
+    stats = writer.stats()
+    assert stats["written"] == 0 and stats["spilled"] == 5 and stats["acknowledged"] == 5
+    spilled = read_entries(spill_path)
+    assert [e["seq"] for e in spilled] == [0, 1, 2, 3, 4]
+    assert spilled[1] == {"seq": 1, "redaction_failed": True}
+
+    # A failed sync spills the written entries instead of acknowledging them; the thread survives
+    sink.fail_writes, sink.fail_syncs = False, True
+    writer.submit({"seq": 5})
+    assert writer.flush(timeout=5)
+    assert writer.running
+    assert [e["seq"] for e in read_entries(spill_path)][-1] == 5
+    assert writer.stats()["acknowledged"] == 6
+    sink.fail_syncs = False
+    writer.shutdown()
+
+
+def test_audit_writer_block_policy_bounds_the_queue(tmp_path):
+    """Test the block policy caps the queue, waiting in submit and off the event loop in submit_async."""
+    import asyncio
+
+    release = threading.Event()
+
+    class GatedSink(FileAuditSink):
+        def write(self, entries):
+            release.wait(5)
+            super().write(entries)
+
+    path = tmp_path / "audit.log"
+    writer = AuditWriter(
+        sinks=[GatedSink(str(path))], queue_size=2, batch_size=1, flush_interval_ms=10,
+        overflow_policy="block", spill_path=str(tmp_path / "spill.log")
+    )
+    writer.submit({"seq": 0})
+    while writer.stats()["queue_depth"]:  # the writer is stuck on the first entry
+        time.sleep(0.001)
+    assert writer.submit({"seq": 1}) and writer.submit({"seq": 2})
+
+    blocked = threading.Thread(target=writer.submit, args=({"seq": 3},))
+    blocked.start()
+    blocked.join(0.05)
+    assert blocked.is_alive()  # submit waits for room
+    assert writer.stats()["queue_depth"] == 2
+
+    async def submit_when_room():
+        waiting = asyncio.create_task(writer.submit_async({"seq": 4}))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()  # waits for room while the loop keeps running
+        release.set()
+        return await asyncio.wait_for(waiting, 5)
+
+    assert asyncio.run(submit_when_room()) is True
+    blocked.join(5)
+    assert writer.flush(timeout=5)
+    assert sorted(e["seq"] for e in read_entries(path)) == [0, 1, 2, 3, 4]
+    writer.shutdown()
+
+
+def test_database_audit_sink_bulk_insert_and_query(tmp_path):
+    """Test audit batches land in audit_logs and the audit agent reads them back."""
+    import asyncio
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.agents.audit_agent import AuditAgent
+    from app.agents.base_agent import AgentTask
+    from app.db.audit_sink import DatabaseAuditSink
+    from app.models.audit import AuditLog
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    AuditLog.__table__.create(engine)
+
+    writer = AuditWriter(
+        sinks=[DatabaseAuditSink(engine)],
+        batch_size=64,
+        flush_interval_ms=10,
+        spill_path=str(tmp_path / "spill.log")
+    )
+    for i in range(200):
+        writer.submit({
+            "timestamp": f"2024-01-01T00:00:{i % 60:02d}",
+            "event_type": "agent_action",
+            "event_id": f"evt_{i}",
+            "agent_name": "rag_agent" if i % 2 else "sql_agent",
+            "action": "execute",
+            "user_id": "7" if i < 50 else "system",
+            "session_id": "s1",
+            "input": {"query": "SSN 123-45-6789"},
+            "output": {"success": True},
+            "metadata": {}
+        })
+    assert writer.flush(timeout=5)
+
+    # Replayed events are skipped instead of failing the batch
+    DatabaseAuditSink(engine).write([{"event_type": "agent_action", "event_id": "evt_0"}])
+    writer.shutdown()
+
+    agent = AuditAgent(session_factory=sessionmaker(bind=engine))
+    task = AgentTask(
+        task_id="t1",
+        query="",
+        context={"action": "query", "user_id": "7", "agent_name": "rag_agent", "limit": 10},
+        session_id="s1"
+    )
+    result = asyncio.run(agent.execute(task))
+
+    assert result.success
+    assert result.response["total_count"] == 25
+    assert len(result.response["entries"]) == 10
+    assert result.response["entries"][0]["input"]["query"] == "SSN [REDACTED_SSN]"
@@ -0,0 +1,47 @@
+"""
+Tests for MCP client infrastructure.
+"""
+
+import pytest
+from app.mcp_clients import MCPConnectionPool, MCPClientRegistry, SharedToolClient
+from app.mcp_clients.mcp_base import MockMCPClient
+
+
+@pytest.mark.asyncio
+async def test_connection_pool_lifecycle():
+    """Test pooled transport opens once and reports stats."""
+    pool = MCPConnectionPool(max_connections=4, max_keepalive_connections=2, http2=False)
+
+    stats = pool.stats()
+    assert stats["open"] is False
+    assert stats["reuse_ratio"] == 0.0
+
+    client = await pool.open()
+    assert pool.is_open
+    assert await pool.open() is client
+
+    stats = pool.stats()
+    assert stats["max_connections"] == 4
+    assert stats["in_use_connections"] == 0
+    assert stats["waiters"] == 0
+
+    await pool.close()
+    assert not pool.is_open
+
+
+@pytest.mark.asyncio
+async def test_registry_shares_tool_client():
+    """Test all domain clients resolve to one shared, instrumented tool client."""
+    registry = MCPClientRegistry(client=SharedToolClient(MockMCPClient(), tool_limits={}))
+
+    assert registry.document.client is registry.client
+    assert registry.payment.client is registry.client
+    assert registry.document is registry.document
+
+    await registry.document.search_documents("diabetes symptoms")
+    await registry.document.search_documents("hypertension")
+
+    metrics = registry.metrics()
+    assert metrics["tools"]["search_documents"]["calls"] == 2
+    assert metrics["tools"]["search_documents"]["errors"] == 0
+    assert metrics["in_flight"] == 0
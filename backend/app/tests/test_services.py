@@ -0,0 +1,751 @@
+"""
+Tests for service-layer components.
+"""
+
+import asyncio
+import re
+import threading
+import time
+import zlib
+import numpy as np
+import pytest
+from app.services.answer_cache import SemanticAnswerCache, cache_scope
+from app.services.chunker import DocumentChunker, WordTokenizer
+from app.services.context_packer import ContextPacker
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_service import EmbeddingBatcher
+from app.services.ingestion import ingest_documents
+from app.services.lexical_index import BM25Index, tokenize
+from app.services.reranker import Reranker
+from app.services.semantic_router import SemanticRouter
+from app.services.vector_index import LocalVectorClient
+
+
+class HashingEmbeddingService:
+    """Deterministic bag-of-words embedder standing in for the sentence model."""
+
+    model_name = "test-hashing"
+
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.encode_calls = 0
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[zlib.crc32(word.encode()) % self.dimension] += 1.0
+        return vector
+
+    def encode(self, texts):
+        self.encode_calls += 1
+        return np.stack([self._embed(text) for text in texts])
+
+    def encode_single(self, text):
+        return self._embed(text)
+
+    async def encode_single_async(self, text):
+        return self._embed(text)
+
+
+EXAMPLES = {
+    "appointment": ["move my visit to friday", "change my visit time"],
+    "payment": ["pay my bill online", "what is my bill balance"],
+}
+
+
+def test_semantic_router_classifies_and_persists(tmp_path):
+    """Test centroid routing and reuse of persisted centroids."""
+    path = tmp_path / "centroids.npz"
+    service = HashingEmbeddingService()
+
+    router = SemanticRouter(service, EXAMPLES, centroids_path=str(path), threshold=0.3)
+    assert router.centroids.shape == (2, 64)
+    assert router.centroids.dtype == np.float32
+    assert router.classify("can I move my visit")["target_agent"] == "appointment"
+    assert router.classify("question about my bill")["target_agent"] == "payment"
+    assert router.classify("zebra quantum") is None
+
+    # Second router loads centroids from disk without re-encoding
+    reloaded = SemanticRouter(service, EXAMPLES, centroids_path=str(path), threshold=0.3)
+    assert service.encode_calls == 1
+    assert np.allclose(reloaded.centroids, router.centroids)
+
+    # Changed examples invalidate the persisted centroids
+    SemanticRouter(service, {**EXAMPLES, "rag": ["symptoms of diabetes"]}, centroids_path=str(path))
+    assert service.encode_calls == 2
+
+    # Agents route through the async path, which never encodes on the event loop
+    from app.agents import RoutingAgent
+    service.encode_single = None
+    assert asyncio.run(router.classify_async("question about my bill"))["target_agent"] == "payment"
+    routed = asyncio.run(RoutingAgent(semantic_router=router).run({"query": "can I move my visit"}))
+    assert routed.response["target_agent"] == "appointment"
+
+
+def test_embedding_batcher_gathers_concurrent_requests():
+    """Test concurrent encodes share forward passes and get their own rows."""
+    service = HashingEmbeddingService()
+    batcher = EmbeddingBatcher(service.encode, max_batch_size=16, max_wait_ms=50)
+    texts = [f"query number {i % 10}" for i in range(40)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.encode(text) for text in texts))
+
+    embeddings = asyncio.run(run())
+    batcher.shutdown()
+
+    for text, embedding in zip(texts, embeddings):
+        assert np.array_equal(embedding, service.encode_single(text))
+
+    stats = batcher.stats()
+    assert stats["items"] == 40
+    assert stats["batches"] == service.encode_calls < 40
+    # Duplicates within a batch are encoded once
+    assert max(stats["batch_size_histogram"]) <= 10
+
+
+def test_embedding_cache_memory_and_disk_tiers(tmp_path):
+    """Test cached embeddings are found in memory and survive a restart on disk."""
+    service = HashingEmbeddingService()
+    texts = ["chest pain on exertion", "fasting glucose 126 mg/dL"]
+    vectors = np.asarray(service.encode(texts), dtype=np.float64)
+
+    cache = EmbeddingCache("test-model", vectors.shape[1], directory=str(tmp_path))
+    assert cache.get_many(texts) == [None, None]
+    cache.put_many(texts, vectors)
+
+    # Whitespace differences map to the same entry; float32 is returned
+    hit = cache.get_many(["chest  pain on\nexertion"])[0]
+    assert hit.dtype == np.float32 and np.allclose(hit, vectors[0])
+    # Modifying a returned vector leaves the cached one intact
+    hit *= 0
+    assert np.allclose(cache.get_many([texts[0]])[0], vectors[0])
+    cache.close()
+
+    reopened = EmbeddingCache("test-model", vectors.shape[1], directory=str(tmp_path))
+    assert all(np.allclose(a, b) for a, b in zip(reopened.get_many(texts), vectors))
+    stats = reopened.stats()
+    assert stats["disk_hits"] == 2 and stats["disk_entries"] == 2
+    reopened.close()
+
+    # A different model never sees the old vectors
+    other = EmbeddingCache("other-model", vectors.shape[1], directory=str(tmp_path))
+    assert other.get_many(texts) == [None, None]
+    other.close()
+
+
+def test_ingest_documents_streams_pages_with_stable_ids():
+    """Test ingestion pulls documents lazily, pages encodes and is idempotent."""
+    service = HashingEmbeddingService()
+    store = {}
+    pulled = []
+
+    def documents():
+        for i in range(30):
+            pulled.append(i)
+            yield {"id": f"report-{i}", "content": f"Glucose {i} mg/dL. " * 40, "metadata": {"type": "lab"}}
+
+    def upsert(ids, texts, metadatas, embeddings):
+        assert len(ids) == len(texts) == len(metadatas) == embeddings.shape[0] <= 16
+        store.update(zip(ids, metadatas))
+
+    progress = []
+    chunker = DocumentChunker(chunk_size=48, overlap=8, tokenizer=WordTokenizer()).chunks
+    stats = ingest_documents(
+        documents(), service.encode, upsert, page_size=16, chunker=chunker, progress=progress.append
+    )
+
+    assert stats.documents == len(pulled) == 30
+    assert stats.chunks == len(store) and stats.pages == len(progress) == service.encode_calls
+    assert all(meta["type"] == "lab" and meta["document_id"].startswith("report-") for meta in store.values())
+
+    # Re-ingesting produces the same IDs
+    ids = set(store)
+    ingest_documents(documents(), service.encode, upsert, page_size=16, chunker=chunker)
+    assert set(store) == ids
+
+
+LAB_REPORT = """
+PATIENT INFORMATION
+-------------------
+Name: Jane Roe
+MRN: PAT-000042
+
+COMPREHENSIVE METABOLIC PANEL
+-----------------------------
+Glucose, Fasting           126         70-100 mg/dL        HIGH
+BUN                        18          7-20 mg/dL
+Creatinine                 1.0         0.7-1.3 mg/dL
+Sodium                     140         136-145 mEq/L
+
+INTERPRETATION
+==============
+Fasting glucose is elevated. Dr. Smith recommends a repeat test in three months. Renal function is normal.
+"""
+
+
+def test_document_chunker_splits_on_sections_rows_and_sentences():
+    """Test chunks respect headings, table rows, sentences and the token budget."""
+    chunker = DocumentChunker(chunk_size=40, overlap=16, tokenizer=WordTokenizer())
+    chunks = list(chunker.chunks(LAB_REPORT))
+
+    assert [chunk.section for chunk in chunks][0] == "PATIENT INFORMATION"
+    assert {"COMPREHENSIVE METABOLIC PANEL", "INTERPRETATION"} <= {chunk.section for chunk in chunks}
+    for chunk in chunks:
+        assert chunk.text.startswith(chunk.section)
+        assert chunk.tokens <= 40
+        assert "-----" not in chunk.text
+
+    # Table rows are never cut, and consecutive chunks of a section overlap
+    panel = [chunk.text.splitlines()[1:] for chunk in chunks if chunk.section == "COMPREHENSIVE METABOLIC PANEL"]
+    assert len(panel) > 1 and panel[0][-1] == panel[1][0]
+    assert all(row.split()[0] in LAB_REPORT for rows in panel for row in rows)
+
+    # Sentences are split without breaking on "Dr."
+    interpretation = " ".join(chunk.text for chunk in chunks if chunk.section == "INTERPRETATION")
+    assert "Dr. Smith recommends" in interpretation
+
+    # Page iterables give the same result as the whole text
+    pages = [LAB_REPORT[:LAB_REPORT.index("INTERPRETATION")], LAB_REPORT[LAB_REPORT.index("INTERPRETATION"):]]
+    assert [chunk.text for chunk in chunker.chunks(pages)] == [chunk.text for chunk in chunks]
+
+
+class FakeCollection:
+    """Chroma collection stand-in returning one match per query embedding."""
+
+    def __init__(self):
+        self.queries = []
+
+    def query(self, query_embeddings, n_results, where=None):
+        self.queries.append((len(query_embeddings), where))
+        rows = range(len(query_embeddings))
+        return {
+            "ids": [[f"match-{row}"] for row in rows],
+            "documents": [[f"{where}:{row}"] for row in rows],
+            "metadatas": [[{}] for _ in rows],
+            "distances": [[0.0] for _ in rows]
+        }
+
+
+class FakeChromaClient:
+    """Chroma client stand-in counting metadata lookups."""
+
+    def __init__(self, *args, **kwargs):
+        self.lookups = 0
+
+    def get_or_create_collection(self, name):
+        self.lookups += 1
+        self.collection = FakeCollection()
+        return self.collection
+
+    def delete_collection(self, name):
+        pass
+
+
+@pytest.fixture
+def vector_db_module(monkeypatch, tmp_path):
+    """vector_db with the Chroma client and embedding model replaced by stand-ins."""
+    pytest.importorskip("chromadb")
+    from app.core.config import settings
+    from app.services import vector_db
+
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_DIR", str(tmp_path / "lexical"))
+    monkeypatch.setattr(settings, "VECTOR_INDEX_DIR", str(tmp_path / "vectors"))
+
+    monkeypatch.setattr(vector_db.chromadb, "Client", FakeChromaClient)
+    monkeypatch.setattr(vector_db, "Settings", lambda **kwargs: kwargs)
+    monkeypatch.setattr(vector_db, "get_embedding_service", HashingEmbeddingService)
+    return vector_db
+
+
+def test_vector_db_caches_collection_handles(vector_db_module):
+    """Test collection handles are looked up once, reported to hooks and dropped on delete."""
+    service = vector_db_module.VectorDBService(cache_collections=True)
+    events = []
+    service.add_hook(events.append)
+
+    service.warm_up(["clinical_docs"])
+    for _ in range(5):
+        service.search("clinical_docs", "fasting glucose")
+    assert service.client.lookups == 1
+    assert service.stats()["collection_cache_hits"] == 5
+
+    service.delete_collection("clinical_docs")
+    service.search("clinical_docs", "fasting glucose")
+    assert service.client.lookups == 2
+
+    operations = [event.operation for event in events]
+    assert operations.count("search") == operations.count("query") == 6
+    assert operations.count("get_or_create_collection") == 2
+    assert all(event.latency_ms >= 0 for event in events)
+
+
+def test_vector_db_search_many_batches_queries_by_filter(vector_db_module):
+    """Test search_many encodes once and issues one query per distinct filter."""
+    service = vector_db_module.VectorDBService()
+    queries = ["fasting glucose", "ldl cholesterol", "hba1c trend"]
+    lab = {"type": "lab"}
+
+    results = service.search_many("clinical_docs", queries, n_results=1, where=[lab, None, {"type": "lab"}])
+
+    assert service.embedding_service.encode_calls == 1
+    assert service.client.collection.queries == [(2, lab), (1, None)]
+    assert [result["results"][0]["document"] for result in results] == [f"{lab}:0", "None:0", f"{lab}:1"]
+    assert service.search_many("clinical_docs", []) == []
+
+
+def test_vector_index_exact_and_ivf_search(tmp_path, monkeypatch):
+    """Test the local index: exact top-k, filters, upsert/delete, reload, and IVF recall."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "VECTOR_INDEX_IVF_MIN_ROWS", 256)
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(16, 32)).astype(np.float32)
+    vectors = centers[np.arange(2000) % 16] + 0.1 * rng.normal(size=(2000, 32)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(2000)]
+    metadatas = [{"cluster": i % 16, "page": i} for i in range(2000)]
+    queries = vectors[:20] + 0.05 * rng.normal(size=(20, 32)).astype(np.float32)
+
+    exact = LocalVectorClient(str(tmp_path / "exact"), "exact").get_or_create_collection("docs")
+    exact.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=metadatas)
+    results = exact.query(queries, n_results=10)
+    assert results["ids"][0][0] == "doc-0"
+    assert results["distances"][0] == sorted(results["distances"][0])
+
+    filtered = exact.query(queries[:1], n_results=5, where={"$and": [{"cluster": 0}, {"page": {"$gte": 1000}}]})
+    assert len(filtered["ids"][0]) == 5
+    assert all(m["cluster"] == 0 and m["page"] >= 1000 for m in filtered["metadatas"][0])
+
+    exact.upsert(ids=["doc-0"], embeddings=-vectors[:1], documents=["moved"])
+    exact.delete(["doc-16"])
+    assert exact.count() == 1999
+    reopened = LocalVectorClient(str(tmp_path / "exact"), "exact").get_or_create_collection("docs")
+    top = reopened.query(queries[:1], n_results=10)["ids"][0]
+    assert "doc-0" not in top and "doc-16" not in top
+
+    ivf_client = LocalVectorClient(str(tmp_path / "ivf"), "ivf")
+    ivf = ivf_client.get_or_create_collection("docs")
+    ivf.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=metadatas)
+    ivf.nprobe = 4
+    approximate = ivf.query(queries, n_results=10)["ids"]
+    recall = np.mean([len(set(a) & set(e)) / 10 for a, e in zip(approximate, results["ids"])])
+    assert recall >= 0.9
+    selective = {"page": {"$in": [5, 21, 1500]}}
+    assert ivf.query(queries[:1], n_results=3, where=selective)["ids"] == exact.query(queries[:1], n_results=3, where=selective)["ids"]
+
+    ivf_client.delete_collection("docs")
+    assert not (tmp_path / "ivf" / "docs").exists()
+
+
+def test_vector_index_metadata_prefilter_matches_row_scan(tmp_path):
+    """Test filters resolved through the metadata index agree with evaluating every row."""
+    from app.services.vector_index import _matches
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(600, 16)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(600)]
+    metadatas = [
+        {"patient_id": f"P{i % 50:03d}", "type": ["lab", "note", "imaging"][i % 3], "date": f"2024-{i % 12 + 1:02d}-01"}
+        for i in range(600)
+    ]
+    collection = LocalVectorClient(str(tmp_path), "exact").get_or_create_collection("docs")
+    collection.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=metadatas)
+
+    # Rewrite one record's metadata and delete another
+    metadatas[7] = {"patient_id": "P999", "type": "lab", "date": "2025-01-01"}
+    collection.upsert(ids=["doc-7"], embeddings=vectors[7:8], documents=["doc-7"], metadatas=[metadatas[7]])
+    collection.delete(["doc-57"])
+
+    filters = [
+        {"patient_id": "P007"},
+        {"patient_id": "P999"},
+        {"$and": [{"type": "lab"}, {"date": {"$gte": "2024-06-01"}}]},
+        {"$or": [{"patient_id": {"$in": ["P001", "P002"]}}, {"type": {"$ne": "note"}}]},
+        {"type": {"$nin": ["lab", "note"]}, "date": {"$lt": "2024-03-01"}},
+        {"patient_id": "missing"},
+    ]
+    query = rng.normal(size=(1, 16)).astype(np.float32)
+    for where in filters:
+        expected = {ids[i] for i in range(600) if i != 57 and _matches(metadatas[i], where)}
+        found = collection.query(query, n_results=600, where=where)["ids"][0]
+        assert set(found) == expected, where
+
+    # Selective filters only score the patient's rows
+    candidates = collection._index.rows({"patient_id": "P007"}, collection._alive, collection.metadatas)
+    assert [collection.ids[row] for row in candidates] == [f"doc-{i}" for i in range(107, 600, 50)]
+
+
+def test_vector_index_skips_unchanged_records_and_compacts(tmp_path):
+    """Test re-upserting unchanged records adds nothing to the log, and a mostly-dead log is compacted."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(300)]
+    metadatas = [{"page": i} for i in range(300)]
+    collection = LocalVectorClient(str(tmp_path), "exact").get_or_create_collection("docs")
+    collection.COMPACT_MIN_RECORDS = 500
+
+    collection.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=metadatas)
+    log_size = collection._records_path.stat().st_size
+    collection.upsert(ids=ids, embeddings=vectors, documents=ids, metadatas=metadatas)
+    assert collection._records_path.stat().st_size == log_size
+
+    # Deleting most rows makes the log mostly dead: live rows are rewritten and renumbered
+    collection.delete(ids[:250])
+    assert collection.generation == 1
+    assert collection.ids == ids[250:] and collection.count() == 50
+    assert sorted(path.name for path in (tmp_path / "docs").iterdir()) == ["meta.json", "records.1.jsonl", "vectors.1.f32"]
+    expected = collection.query(vectors[260:261], n_results=3)
+
+    reopened = LocalVectorClient(str(tmp_path), "exact").get_or_create_collection("docs")
+    assert reopened.generation == 1 and reopened.count() == 50
+    assert reopened.query(vectors[260:261], n_results=3) == expected
+    assert expected["ids"][0][0] == "doc-260"
+    assert reopened.query(vectors[:1], n_results=50, where={"page": {"$lt": 260}})["ids"][0] == \
+        reopened.query(vectors[:1], n_results=50, where={"page": {"$in": list(range(250, 260))}})["ids"][0]
+
+
+def test_bm25_index_matches_codes_and_updates_incrementally(tmp_path):
+    """Test BM25 ranks exact codes, follows upserts/deletes and reloads from its log."""
+    path = tmp_path / "records.jsonl"
+    index = BM25Index(path)
+    index.upsert(
+        ["dx", "rx", "note"],
+        [
+            "Diagnosis: type 2 diabetes mellitus without complications (E11.9).",
+            "Started lisinopril 10 mg daily for hypertension (I10).",
+            "Patient reports fatigue and increased thirst; diabetes education provided."
+        ],
+        [{"type": "diagnosis"}, {"type": "prescription"}, {"type": "note"}]
+    )
+    assert "e11.9" in tokenize("E11.9") and "e11" in tokenize("E11.9")
+
+    assert [hit["id"] for hit in index.search("E11.9")] == ["dx"]
+    assert [hit["id"] for hit in index.search("lisinopril dose")] == ["rx"]
+    assert [hit["id"] for hit in index.search("diabetes", where={"type": "note"})] == ["note"]
+
+    index.upsert(["rx"], ["Switched to losartan 50 mg for hypertension (I10)."])
+    index.delete(["note"])
+    assert index.search("lisinopril") == []
+    assert [hit["id"] for hit in index.search("diabetes")] == ["dx"]
+
+    reloaded = BM25Index(path)
+    assert reloaded.count() == 2
+    assert [hit["id"] for hit in reloaded.search("losartan")] == ["rx"]
+    assert reloaded.search("E11")[0]["score"] == pytest.approx(index.search("E11")[0]["score"])
+
+
+def test_vector_db_hybrid_search_fuses_rankings(vector_db_module):
+    """Test hybrid search indexes BM25 on add and fuses both rankings with weights."""
+    service = vector_db_module.VectorDBService(backend="exact")
+    documents = [
+        "HbA1c 6.8 percent, diabetic range, code E11.9",
+        "LDL cholesterol 98 mg/dL at goal",
+        "Creatinine within normal limits",
+    ]
+    service.add_documents("clinical_docs", documents, metadatas=[{"type": "lab"}] * 3)
+
+    results = service.hybrid_search("clinical_docs", "E11.9 hba1c", n_results=2)["results"]
+    assert results[0]["document"] == documents[0]
+    assert results[0]["ranks"] == {"vector": 1, "lexical": 1}
+    assert results[0]["score"] == pytest.approx(1.0)
+
+    # With the vector ranking switched off, only BM25 matches remain
+    lexical_only = service.hybrid_search("clinical_docs", "cholesterol", n_results=3, vector_weight=0.0)["results"]
+    assert lexical_only[0]["document"] == documents[1]
+    assert lexical_only[0]["score"] > lexical_only[1]["score"] == 0.0
+
+    async_results = asyncio.run(service.hybrid_search_async("clinical_docs", "E11.9 hba1c", n_results=2))
+    assert [r["id"] for r in async_results["results"]] == [r["id"] for r in results]
+    assert service.operation_counts["lexical_search"] == 3
+
+    # Stored vectors come back with the results, BM25-only matches included
+    with_vectors = service.hybrid_search("clinical_docs", "cholesterol", n_results=3, include_embeddings=True)["results"]
+    stored = service.embedding_service.encode([r["document"] for r in with_vectors])
+    for result, vector in zip(with_vectors, stored):
+        assert np.allclose(result["embedding"], vector / np.linalg.norm(vector), atol=1e-6)
+    assert "embedding" not in results[0]
+
+    # Every write moves the document-set version forward
+    version = service.collection_version("clinical_docs")
+    service.add_documents("clinical_docs", ["Potassium 4.1 mmol/L"])
+    assert service.collection_version("clinical_docs") > version > 0
+    # ...and is shared through the stamp file with other workers
+    other = vector_db_module.VectorDBService(backend="exact")
+    assert other.collection_version("clinical_docs") == service.collection_version("clinical_docs")
+
+    # Default IDs stay distinct for repeated texts, and adding them again replaces them
+    notes = ["Follow up in 3 months"] * 3
+    repeated = [{"patient": "a"}, {"patient": "a"}, {"patient": "b"}]
+    collection = service.get_or_create_collection("notes")
+    for _ in range(2):
+        service.add_documents("notes", notes, metadatas=repeated)
+        assert collection.count() == 3
+
+
+def test_local_document_search_without_lexical_index(vector_db_module, monkeypatch):
+    """Test local document search scores vector results like fused ones when BM25 is disabled."""
+    from app.core.config import settings
+    from app.mcp_clients import DocumentMCPClient
+
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_ENABLED", False)
+    monkeypatch.setattr(settings, "DOCUMENT_SEARCH_LOCAL", True)
+    service = vector_db_module.VectorDBService(backend="exact")
+    monkeypatch.setattr(vector_db_module, "_vector_db_service", service)
+    service.add_documents(settings.DOCUMENT_SEARCH_COLLECTION, ["HbA1c 6.8 percent", "LDL cholesterol at goal"])
+
+    found = service.hybrid_search(settings.DOCUMENT_SEARCH_COLLECTION, "hba1c", n_results=2)["results"]
+    assert found[0]["ranks"] == {"vector": 1}
+    assert found[0]["score"] == pytest.approx(1.0) and found[1]["score"] < 1.0
+
+    documents = asyncio.run(DocumentMCPClient(client=object()).search_documents("hba1c", top_k=2))
+    assert [doc["content"] for doc in documents] == [r["document"] for r in found]
+    assert documents[0]["score"] == pytest.approx(1.0)
+    assert service.operation_counts.get("lexical_search", 0) == 0
+
+
+def test_context_packer_drops_duplicates_and_cuts_at_sentences():
+    """Test packing drops near-duplicates, fills the budget and cuts on a sentence boundary."""
+    embedder = HashingEmbeddingService()
+    documents = [
+        {"title": "Lab", "score": 0.9, "content": "Fasting glucose 126 mg/dL is high. HbA1c is 6.8 percent."},
+        {"title": "Lab copy", "score": 0.88, "content": "Fasting glucose 126 mg/dL is high. HbA1c is 6.8 percent."},
+        {"title": "Plan", "score": 0.7, "content": " ".join(f"Sentence {i} about diet and exercise." for i in range(20))},
+        {"title": "Renal", "score": 0.6, "content": "Creatinine 0.9 mg/dL is normal."},
+    ]
+    packer = ContextPacker(max_tokens=60, min_cut_tokens=8, tokenizer=WordTokenizer(), embed=embedder.encode)
+
+    packed = packer.pack(documents)
+
+    assert packed.duplicates == 1
+    assert packed.truncated == 1
+    assert [doc["title"] for doc in packed.documents] == ["Lab", "Plan", "Renal"]
+    assert packed.tokens <= 60
+    assert len(WordTokenizer().spans([packed.text])[0]) <= 60
+    plan = packed.documents[1]["content"]
+    assert plan.endswith("exercise.") and len(plan) < len(documents[2]["content"])
+    assert "Lab copy" not in packed.text
+
+    # Vectors returned by retrieval are used instead of encoding the documents
+    stored = embedder.encode([doc["content"] for doc in documents])
+    with_vectors = [{**doc, "embedding": vector} for doc, vector in zip(documents, stored)]
+    calls = embedder.encode_calls
+    repacked = packer.pack(with_vectors, query_embedding=stored[0])
+    assert repacked.duplicates == 1 and {doc["title"] for doc in repacked.documents} == {"Lab", "Plan", "Renal"}
+    assert embedder.encode_calls == calls
+
+    # Everything fits: no cut, and a single document needs no embeddings
+    assert ContextPacker(max_tokens=10000, tokenizer=WordTokenizer(), embed=None).pack(documents[:1]).truncated == 0
+
+
+class CountingDocumentClient:
+    """Document client returning fixed results, with a settable document-set version."""
+
+    def __init__(self):
+        self.searches = 0
+        self.version = 1
+
+    async def search_documents(self, query, filters=None, top_k=5, include_embeddings=False):
+        self.searches += 1
+        return [{"id": "doc-1", "title": "Diabetes overview", "content": "Symptoms include thirst.", "score": 0.8}]
+
+    def document_set_version(self):
+        return self.version
+
+
+def test_answer_cache_hits_similar_queries_until_documents_change():
+    """Test cached RAG answers are reused for similar queries and dropped on ingest, expiry and eviction."""
+    from app.agents import RAGAgent
+
+    embedder = HashingEmbeddingService()
+    client = CountingDocumentClient()
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60, max_entries=2)
+    agent = RAGAgent(
+        document_client=client,
+        context_packer=ContextPacker(tokenizer=WordTokenizer(), embed=embedder.encode),
+        answer_cache=cache,
+        embedding_service=embedder
+    )
+
+    def ask(query, **context):
+        return asyncio.run(agent.run({"query": query, "context": context}))
+
+    first = ask("What are the symptoms of diabetes?")
+    second = ask("what are the symptoms of diabetes")
+    assert client.searches == 1
+    assert second.response == first.response
+    assert second.metadata["cache"]["similarity"] > 0.9
+
+    # Different filters, or a different identifier in an otherwise identical query, miss
+    ask("What are the symptoms of diabetes?", filters={"patient_id": "P1"})
+    ask("symptoms of diabetes for patient 1042")
+    ask("symptoms of diabetes for patient 1043")
+    assert client.searches == 4
+    assert cache.stats()["evictions"] == 2
+
+    # New documents invalidate every cached answer
+    client.version = 2
+    ask("symptoms of diabetes for patient 1043")
+    assert client.searches == 5
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["invalidations"] == 1 and stats["saved_ms"] > 0
+
+    # Entries expire after the TTL
+    cache.ttl_seconds = 0.01
+    embedding = embedder.encode_single("renal panel")
+    cache.put(embedding, "renal panel", cache_scope(None, 5), "answer", cost_ms=5.0, version=2)
+    assert cache.get(embedding, "renal panel", cache_scope(None, 5), version=2).value == "answer"
+    time.sleep(0.02)
+    assert cache.get(embedding, "renal panel", cache_scope(None, 5), version=2) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_answer_cache_is_skipped_for_remote_document_search(monkeypatch):
+    """Test answers from the MCP search tool are never cached, since ingestion there cannot invalidate them."""
+    from app.agents import RAGAgent
+    from app.core.config import settings
+    from app.mcp_clients import DocumentMCPClient
+
+    class SearchTool:
+        calls = 0
+
+        async def call_tool(self, name, payload):
+            SearchTool.calls += 1
+            return {"results": [{"id": "doc-1", "title": "Overview", "content": "Symptoms include thirst.", "score": 0.8}]}
+
+    monkeypatch.setattr(settings, "DOCUMENT_SEARCH_LOCAL", False)
+    monkeypatch.setattr(settings, "RAG_ANSWER_CACHE_ENABLED", True)
+    embedder = HashingEmbeddingService()
+    agent = RAGAgent(
+        document_client=DocumentMCPClient(client=SearchTool()),
+        context_packer=ContextPacker(tokenizer=WordTokenizer(), embed=embedder.encode)
+    )
+
+    for _ in range(2):
+        result = asyncio.run(agent.run({"query": "What are the symptoms of diabetes?", "context": {}}))
+        assert result.success and not result.metadata
+    assert SearchTool.calls == 2
+    # The global cache and its embedding model are not even loaded
+    assert agent.answer_cache is None and agent.embedding_service is None
+
+def test_reranker_reorders_within_budget_and_falls_back():
+    """Test reranking reorders and truncates candidates, and keeps retrieval order when over budget."""
+    def overlap(pairs):
+        return np.array([len(set(q.split()) & set(d.split())) / 10 for q, d in pairs], dtype=np.float32)
+
+    documents = [
+        {"id": "a", "content": "appointment reminders and billing", "score": 0.9},
+        {"id": "b", "content": "metformin dose for type 2 diabetes", "score": 0.8},
+        {"id": "c", "content": "diabetes diet", "score": 0.7},
+    ]
+    reranker = Reranker(score=overlap, batch_size=2, budget_ms=1000)
+
+    reranked = reranker.rerank("metformin dose diabetes", documents, top_k=2)
+    assert [doc["id"] for doc in reranked] == ["b", "c"]
+    assert reranked[0]["rerank_score"] == pytest.approx(0.3)
+
+    def slow(pairs):
+        time.sleep(0.05)
+        return overlap(pairs)
+
+    slow_reranker = Reranker(score=slow, batch_size=1, budget_ms=20)
+    assert slow_reranker.rerank("metformin dose diabetes", documents, top_k=2) == documents[:2]
+    async_result = asyncio.run(slow_reranker.rerank_async("metformin dose diabetes", documents, top_k=2))
+    assert async_result == documents[:2]
+    assert slow_reranker.stats()["fallbacks"] == 2
+    assert reranker.stats()["fallbacks"] == 0 and reranker.stats()["requests"] == 1
+
+
+def test_onnx_batcher_coalesces_requests_and_pads_fixed_batches():
+    """Test concurrent inference requests are batched, answered per request and histogrammed."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("PIL")
+    from app.services.onnx_inference import InferenceBatcher, InferenceQueueFull
+
+    batch_sizes = []
+
+    def run_batch(inputs):
+        batch_sizes.append(len(inputs))
+        return inputs.reshape(len(inputs), -1).sum(axis=1, keepdims=True)
+
+    batcher = InferenceBatcher(run_batch, max_batch_size=8, max_wait_ms=50, workers=2)
+    images = [np.full((3, 4, 4), i, dtype=np.float32) for i in range(40)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.infer(image) for image in images))
+
+    outputs = asyncio.run(run())
+    batcher.shutdown()
+
+    assert [float(output[0]) for output in outputs] == [48.0 * i for i in range(40)]
+    stats = batcher.stats()
+    assert stats["items"] == 40 and stats["batches"] == len(batch_sizes) < 40
+    assert max(batch_sizes) <= 8
+    assert sum(stats["queue_depth_histogram"].values()) == sum(stats["inference_ms_histogram"].values()) == stats["batches"]
+    assert sum(stats["queue_wait_ms_histogram"].values()) == 40
+
+    # Models with a fixed batch dimension get padded batches
+    padded = InferenceBatcher(run_batch, max_wait_ms=0, workers=1, pad_to=4)
+    assert float(padded.submit(images[2]).result(timeout=5)[0]) == 96.0
+    assert batch_sizes[-1] == 4
+    padded.shutdown()
+
+    # An input of the wrong shape fails alone, and the worker keeps running
+    gate = threading.Event()
+
+    def gated(inputs):
+        gate.wait(5)
+        return run_batch(inputs)
+
+    strict = InferenceBatcher(gated, max_wait_ms=0, workers=1)
+    first = strict.submit(images[1])
+    good, bad = strict.submit(images[2]), strict.submit(np.zeros((3, 2, 2), dtype=np.float32))
+    gate.set()
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert float(first.result(timeout=5)[0]) == 48.0 and float(good.result(timeout=5)[0]) == 96.0
+    assert strict.running
+    strict.shutdown()
+
+    # A full queue rejects instead of growing without bound
+    stalled = InferenceBatcher(run_batch, workers=1, max_queue=1)
+    stalled._threads = [type("Alive", (), {"is_alive": lambda self: True, "join": lambda self, t: None})()]
+    stalled.submit(images[0])
+    with pytest.raises(InferenceQueueFull):
+        stalled.submit(images[1])
+    assert stalled.stats()["rejected"] == 1
+
+
+def test_image_preprocessing_fills_nchw_buffers_from_bytes_or_base64():
+    """Test preprocessing writes normalized CHW pixels into single and batch buffers."""
+    pytest.importorskip("onnxruntime")
+    Image = pytest.importorskip("PIL.Image")
+    import base64
+    import io
+    from app.services.onnx_inference import ONNXInferenceService
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+    encoded = {}
+    for fmt in ("PNG", "JPEG"):
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format=fmt)
+        encoded[fmt] = buffer.getvalue()
+    service = ONNXInferenceService.__new__(ONNXInferenceService)
+
+    # Same size PNG: exact pixels, scaled and transposed
+    array = service.preprocess_image(encoded["PNG"], target_size=(48, 64))
+    assert array.shape == (1, 3, 48, 64) and array.dtype == np.float32
+    np.testing.assert_allclose(array[0], pixels.transpose(2, 0, 1) / 255.0, atol=1e-6)
+
+    # Base64 and raw bytes agree; a given buffer is filled in place
+    out = np.empty((1, 3, 16, 24), dtype=np.float32)
+    assert service.preprocess_image(base64.b64encode(encoded["JPEG"]).decode(), (16, 24), out=out) is out
+    np.testing.assert_array_equal(out, service.preprocess_image(encoded["JPEG"], (16, 24)))
+
+    # JPEG draft decoding stays close to a full decode and resize
+    reference = np.asarray(Image.open(io.BytesIO(encoded["JPEG"])).convert("RGB").resize((24, 16), Image.BICUBIC))
+    assert np.abs(out[0] - reference.transpose(2, 0, 1) / 255.0).mean() < 0.05
+
+    batch = service.preprocess_batch([encoded["PNG"], encoded["JPEG"]], (16, 24))
+    assert batch.shape == (2, 3, 16, 24)
+    np.testing.assert_array_equal(batch[1], out[0])
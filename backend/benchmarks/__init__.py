@@ -0,0 +1,5 @@
+"""
+Microbenchmarks for MediSense-AI hot paths.
+
+Run from the backend directory, e.g. ``python -m benchmarks.bench_routing``.
+"""
@@ -0,0 +1,148 @@
+"""
+RAG answer cache benchmark: replays a skewed stream of clinician questions
+through RAGAgent (local hybrid search over the testset contexts) with and
+without the semantic answer cache, and reports the hit rate, hit vs miss
+latency and time saved.
+
+Questions are drawn Zipf-style from the testset questions plus templated ones,
+about half of them reworded (case, punctuation, filler). Halfway through, a
+document is ingested, which invalidates the cache.
+
+Hit rates only mean something with a trained embedding model, so the model is
+checked first: how many rewordings clear the threshold (wanted) and how many
+pairs of different questions do (wrong answers).
+
+Usage:
+    python -m benchmarks.bench_answer_cache [--queries 1000] [--zipf 1.1]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from app.core.config import settings
+
+TESTSET = Path(__file__).resolve().parents[2] / "ragas" / "testset.jsonl"
+COLLECTION = "bench_answer_cache"
+
+CONDITIONS = ["hypertension", "type 2 diabetes", "asthma", "hyperlipidemia", "migraine", "hypothyroidism"]
+DRUGS = ["metformin", "atorvastatin", "levothyroxine", "albuterol", "sumatriptan", "omeprazole", "sertraline"]
+
+
+def question_pool() -> List[str]:
+    """Distinct questions, most popular first."""
+    testset = [json.loads(line) for line in TESTSET.read_text().splitlines() if line.strip()]
+    questions = [row["question"] for row in testset]
+    questions += [f"What are the symptoms of {condition}?" for condition in CONDITIONS]
+    questions += [f"What is the usual dose of {drug}?" for drug in DRUGS]
+    questions += [f"What are the side effects of {drug}?" for drug in DRUGS]
+    questions += [f"How is {condition} diagnosed?" for condition in CONDITIONS]
+    return list(dict.fromkeys(questions))
+
+
+def reword(question: str, rng: random.Random) -> str:
+    """A trivially different phrasing of the question."""
+    variants = [
+        question.lower().rstrip("?"),
+        f"{question} ",
+        f"Quick question: {question[0].lower()}{question[1:]}",
+        question.replace("What are", "What're"),
+    ]
+    return rng.choice(variants)
+
+
+def stream(count: int, zipf: float, seed: int = 0) -> List[str]:
+    """Questions in arrival order."""
+    rng = random.Random(seed)
+    pool = question_pool()
+    weights = [1 / (rank + 1) ** zipf for rank in range(len(pool))]
+    questions = rng.choices(pool, weights, k=count)
+    return [reword(q, rng) if rng.random() < 0.5 else q for q in questions]
+
+
+def check_model(embed, threshold: float) -> None:
+    """Print how the threshold separates rewordings from different questions."""
+    import numpy as np
+    from app.services.answer_cache import specific_terms
+
+    rng = random.Random(1)
+    pool = question_pool()
+    vectors = embed(pool + [reword(q, rng) for q in pool])
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    originals, rewordings = vectors[:len(pool)], vectors[len(pool):]
+    reworded_hits = int(((originals * rewordings).sum(axis=1) >= threshold).sum())
+    similarity = originals @ originals.T
+    colliding = sum(
+        similarity[i, j] >= threshold and specific_terms(pool[i]) == specific_terms(pool[j])
+        for i in range(len(pool)) for j in range(i + 1, len(pool))
+    )
+    pairs = len(pool) * (len(pool) - 1) // 2
+    print(f"model: {reworded_hits}/{len(pool)} rewordings hit, {colliding}/{pairs} pairs of different questions collide")
+
+
+async def replay(agent, questions: List[str], ingest) -> List[tuple]:
+    """Run the questions one by one; returns (latency_ms, cached) per question."""
+    timings = []
+    for i, question in enumerate(questions):
+        if i == len(questions) // 2:
+            ingest()
+        start = time.perf_counter()
+        result = await agent.run({"query": question, "context": {}})
+        timings.append(((time.perf_counter() - start) * 1000, bool(result.metadata and "cache" in result.metadata)))
+    return timings
+
+
+def bench(count: int, zipf: float) -> None:
+    """Replay the stream with and without the cache and print the comparison."""
+    settings.VECTOR_DB_BACKEND = "exact"
+    settings.VECTOR_INDEX_DIR = tempfile.mkdtemp(prefix="bench_vectors_")
+    settings.LEXICAL_INDEX_DIR = tempfile.mkdtemp(prefix="bench_lexical_")
+    settings.DOCUMENT_SEARCH_LOCAL = True
+    settings.DOCUMENT_SEARCH_COLLECTION = COLLECTION
+    settings.RAG_ANSWER_CACHE_ENABLED = False  # only the agent given a cache uses one
+    from app.agents import RAGAgent
+    from app.mcp_clients import DocumentMCPClient
+    from app.services.answer_cache import SemanticAnswerCache
+    from app.services.vector_db import get_vector_db_service
+
+    service = get_vector_db_service()
+    contexts = [json.loads(line)["contexts"][0] for line in TESTSET.read_text().splitlines() if line.strip()]
+    service.add_documents(COLLECTION, contexts, metadatas=[{"title": f"Context {i}"} for i in range(len(contexts))])
+    ingest = lambda: service.add_documents(COLLECTION, ["Sertraline is started at 50 mg once daily."])  # noqa: E731
+
+    questions = stream(count, zipf)
+    client = DocumentMCPClient(client=object())
+    cache = SemanticAnswerCache()
+    runs = {
+        "no cache": RAGAgent(document_client=client),
+        "cache": RAGAgent(document_client=client, answer_cache=cache),
+    }
+    print(f"{len(questions)} questions, {len(set(questions))} distinct strings, threshold {cache.threshold}")
+    check_model(service.embedding_service.encode, cache.threshold)
+
+    print(f"{'run':<9} {'total_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'hit_rate':>9} {'hit_p50':>8} {'miss_p50':>9}")
+    for name, agent in runs.items():
+        timings = asyncio.run(replay(agent, questions, ingest))
+        latencies = sorted(latency for latency, _ in timings)
+        hits = [latency for latency, cached in timings if cached]
+        misses = [latency for latency, cached in timings if not cached]
+        print(
+            f"{name:<9} {sum(latencies) / 1000:>8.2f} {statistics.median(latencies):>8.2f} "
+            f"{latencies[int(0.99 * (len(latencies) - 1))]:>8.2f} {len(hits) / len(timings):>9.2%} "
+            f"{statistics.median(hits) if hits else 0:>8.2f} {statistics.median(misses):>9.2f}"
+        )
+    print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    args = parser.parse_args()
+    bench(args.queries, args.zipf)
@@ -0,0 +1,82 @@
+"""
+Chunking throughput: in-process DocumentChunker vs the chunk_document MCP round trip
+(mock mode, so only the client, payload and logging overhead is measured; the mock
+returns no chunks).
+
+Usage:
+    python -m benchmarks.bench_chunking [--rounds 50] [--word-tokenizer]
+"""
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from app.core.config import settings
+from app.mcp_clients.mcp_base import MockMCPClient
+from app.mcp_clients.mcp_document import DocumentMCPClient
+from app.services.chunker import DocumentChunker, WordTokenizer, load_tokenizer
+
+SAMPLE_REPORT = Path(__file__).resolve().parents[2] / "sample_data" / "documents" / "sample_lab_report.txt"
+
+
+def build_inputs() -> Dict[str, List[str]]:
+    """Documents as lists of pages: one lab report and a 200-page report bundle."""
+    report = SAMPLE_REPORT.read_text()
+    return {
+        "lab_report": [report],
+        "report_bundle_200p": [report] * 200,
+    }
+
+
+async def mcp_round_trip(client: DocumentMCPClient, pages: List[str]) -> None:
+    """Previous path: upload the whole document to the chunk_document tool."""
+    await client.chunk_document("\n".join(pages))
+
+
+def bench(rounds: int, word_tokenizer: bool) -> None:
+    """Run the benchmark and print throughput for both paths."""
+    tokenizer = WordTokenizer() if word_tokenizer else load_tokenizer()
+    chunker = DocumentChunker(tokenizer=tokenizer)
+    client = DocumentMCPClient(MockMCPClient())
+    print(f"tokenizer: {type(tokenizer).__name__}, chunk_size={chunker.chunk_size}, overlap={chunker.overlap}")
+
+    print(f"{'input':<20} {'KB':>6} {'chunks':>7} {'local_chunks/s':>15} {'local_MBps':>11} {'local_ms':>9} {'mcp_mock_ms':>12}")
+    for name, pages in build_inputs().items():
+        size_mb = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+        count = sum(1 for _ in chunker.chunks(pages))
+        n = max(rounds // len(pages), 3)
+
+        start = time.perf_counter()
+        for _ in range(n):
+            for _ in chunker.chunks(pages):
+                pass
+        local = (time.perf_counter() - start) / n
+
+        settings.CHUNKING_LOCAL = False
+        try:
+            start = time.perf_counter()
+            for _ in range(n):
+                asyncio.run(mcp_round_trip(client, pages))
+            remote = (time.perf_counter() - start) / n
+        finally:
+            settings.CHUNKING_LOCAL = True
+
+        print(
+            f"{name:<20} {size_mb * 1000:>6.0f} {count:>7} {count / local:>15.0f} {size_mb / local:>11.1f} "
+            f"{local * 1000:>9.2f} {remote * 1000:>12.2f}"
+        )
+
+    print(
+        "mcp_mock_ms is a floor for the remote path: the mock returns no chunks, and a real "
+        "server adds the upload, the chunking itself and the download."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--word-tokenizer", action="store_true", help="Skip loading the model tokenizer")
+    args = parser.parse_args()
+    bench(args.rounds, args.word_tokenizer)
@@ -0,0 +1,78 @@
+"""
+Context packing latency: ContextPacker.pack() for typical top-k sizes, with the
+document embeddings already in the embedding cache (as after retrieval). cold_us
+is the first pack of a set (token offsets not yet cached).
+
+Retrieved documents are the sample lab report chunks plus synthetic result
+chunks, a quarter of them repeated as near-duplicates.
+
+Usage:
+    python -m benchmarks.bench_context_packing [--rounds 200] [--word-tokenizer] [--no-dedup]
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.services.chunker import WordTokenizer, get_document_chunker
+from app.services.context_packer import ContextPacker
+
+SAMPLE_REPORT = Path(__file__).resolve().parents[2] / "sample_data" / "documents" / "sample_lab_report.txt"
+TOP_KS = (5, 10, 20, 50)
+
+
+def retrieved(k: int) -> List[Dict[str, Any]]:
+    """k retrieved documents, best first, with every fourth one a near-copy of its predecessor."""
+    chunks = [chunk.text for chunk in get_document_chunker().chunks(SAMPLE_REPORT.read_text())]
+    documents = []
+    for i in range(k):
+        if i % 4 == 3:
+            content = documents[-1]["content"] + " "
+        elif i < len(chunks):
+            content = chunks[i]
+        else:
+            content = " ".join(f"Result {i}.{j}: value within the reference range on repeat testing." for j in range(12))
+        documents.append({"id": f"doc-{i}", "title": f"Chunk {i}", "content": content, "score": 1.0 - i / (2 * k)})
+    return documents
+
+
+def bench(rounds: int, word_tokenizer: bool, dedup: bool) -> None:
+    """Pack each top-k set repeatedly and print latency percentiles."""
+    from app.services.embedding_service import EmbeddingService
+
+    service = EmbeddingService(batching_enabled=False)
+    tokenizer = WordTokenizer() if word_tokenizer else get_document_chunker().tokenizer
+    threshold = None if dedup else 1.01
+    make_packer = lambda: ContextPacker(tokenizer=tokenizer, embed=service.encode, duplicate_threshold=threshold)  # noqa: E731
+    print(f"tokenizer: {type(tokenizer).__name__}, budget: {settings.RAG_CONTEXT_MAX_TOKENS} tokens")
+
+    print(f"{'top_k':>5} {'tokens':>7} {'docs':>5} {'dups':>5} {'cut':>4} {'cold_us':>8} {'p50_us':>8} {'p99_us':>8}")
+    for k in TOP_KS:
+        documents = retrieved(k)
+        service.encode([doc["content"] for doc in documents])  # as after retrieval
+        packer = make_packer()
+        start = time.perf_counter()
+        packed = packer.pack(documents)
+        cold = (time.perf_counter() - start) * 1e6
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            packer.pack(documents)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        print(
+            f"{k:>5} {packed.tokens:>7} {len(packed.documents):>5} {packed.duplicates:>5} {packed.truncated:>4} "
+            f"{cold:>8.0f} {statistics.median(timings):>8.0f} {timings[int(0.99 * (len(timings) - 1))]:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--word-tokenizer", action="store_true", help="Skip loading the model tokenizer")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep near-duplicates (packs the most documents)")
+    args = parser.parse_args()
+    bench(args.rounds, args.word_tokenizer, not args.no_dedup)
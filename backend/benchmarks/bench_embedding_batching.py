@@ -0,0 +1,72 @@
+"""
+Embedding micro-batching benchmark: 50 concurrent RAG-style query encodes with and
+without the EmbeddingBatcher.
+
+Usage:
+    python -m benchmarks.bench_embedding_batching [--concurrency 50] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.embedding_service import EmbeddingService
+
+QUERIES = [
+    "what are the symptoms of type 2 diabetes",
+    "first line treatment for hypertension in adults",
+    "recommended screening age for colorectal cancer",
+    "how is community acquired pneumonia diagnosed",
+    "side effects of long term metformin use",
+    "asthma management in children guidelines",
+    "what causes elevated liver enzymes",
+    "normal range for hba1c",
+]
+
+
+async def run_round(encode, concurrency: int) -> None:
+    """Issue `concurrency` query encodes at once and wait for all of them."""
+    await asyncio.gather(*(encode(f"{QUERIES[i % len(QUERIES)]} ({i})") for i in range(concurrency)))
+
+
+async def bench(concurrency: int, rounds: int) -> None:
+    """Run the benchmark and print throughput for both paths."""
+    service = EmbeddingService(batching_enabled=True, cache_enabled=False)
+    model = service.model
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def unbatched(text):
+        # Previous behaviour: one batch-of-1 forward pass per request
+        return await loop.run_in_executor(pool, lambda: model.encode([text], convert_to_numpy=True)[0])
+
+    async def batched(text):
+        return await service.encode_single_async(text)
+
+    # Warm up
+    await run_round(unbatched, concurrency)
+    await run_round(batched, concurrency)
+    service.batcher.batch_size_histogram.clear()
+
+    results = {}
+    for name, encode in (("batch_of_1", unbatched), ("micro_batched", batched)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await run_round(encode, concurrency)
+        elapsed = time.perf_counter() - start
+        results[name] = concurrency * rounds / elapsed
+        print(f"{name:<14} {results[name]:>8.1f} queries/s  ({elapsed / rounds * 1000:.1f} ms per {concurrency} queries)")
+
+    print(f"speedup: {results['micro_batched'] / results['batch_of_1']:.1f}x")
+    print(f"batch sizes: {service.batcher.stats()['batch_size_histogram']}")
+    service.batcher.shutdown()
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(bench(args.concurrency, args.rounds))
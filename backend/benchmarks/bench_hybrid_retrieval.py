@@ -0,0 +1,123 @@
+"""
+Hybrid retrieval evaluation on ragas/testset.jsonl: recall@k, MRR and latency of
+vector-only, BM25-only and fused (reciprocal rank fusion) search.
+
+The corpus is the testset contexts plus the sample lab report chunks and
+--distractors synthetic clinical sentences. Two query sets are scored against the
+context each question was written for:
+- questions: the testset questions as asked
+- terms: the two rarest terms of each context (drug names, codes), the kind of
+  exact-term lookup dense similarity tends to miss
+
+Usage:
+    python -m benchmarks.bench_hybrid_retrieval [--distractors 2000] [--rounds 5]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from app.core.config import settings
+
+ROOT = Path(__file__).resolve().parents[2]
+TESTSET = ROOT / "ragas" / "testset.jsonl"
+SAMPLE_REPORT = ROOT / "sample_data" / "documents" / "sample_lab_report.txt"
+KS = (1, 3, 5)
+
+CONDITIONS = ["hypertension", "type 2 diabetes", "asthma", "hyperlipidemia", "migraine", "hypothyroidism"]
+DRUGS = ["metformin", "atorvastatin", "levothyroxine", "albuterol", "sumatriptan", "omeprazole", "sertraline"]
+FINDINGS = ["fatigue", "dizziness", "nausea", "headache", "shortness of breath", "joint pain", "insomnia"]
+
+
+def distractors(count: int) -> List[str]:
+    """Clinical-sounding sentences sharing vocabulary with the testset."""
+    return [
+        f"Follow-up visit {i}: patient with {CONDITIONS[i % len(CONDITIONS)]} reports "
+        f"{FINDINGS[i % len(FINDINGS)]}; continue {DRUGS[i % len(DRUGS)]} and schedule review "
+        f"with the care team in {i % 11 + 2} weeks."
+        for i in range(count)
+    ]
+
+
+def build_queries(testset: List[Dict]) -> Dict[str, List[Tuple[str, str]]]:
+    """(query, relevant context) pairs for each query set."""
+    from app.services.lexical_index import tokenize
+
+    contexts = [row["contexts"][0] for row in testset]
+    frequency = Counter(term for context in contexts for term in set(tokenize(context)))
+    terms = []
+    for context in contexts:
+        rarest = sorted(set(tokenize(context)), key=lambda term: (frequency[term], -len(term)))[:2]
+        terms.append((" ".join(rarest), context))
+    return {
+        "questions": [(row["question"], row["contexts"][0]) for row in testset],
+        "terms": terms,
+    }
+
+
+def evaluate(search: Callable[[str], List[str]], queries: List[Tuple[str, str]], rounds: int) -> Dict[str, float]:
+    """Recall@k, MRR and median latency of a search function."""
+    hits = {k: 0 for k in KS}
+    reciprocal_ranks = []
+    latencies = []
+    for query, relevant in queries:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            found = search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        rank = found.index(relevant) + 1 if relevant in found else None
+        for k in KS:
+            hits[k] += rank is not None and rank <= k
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    metrics = {f"recall@{k}": hits[k] / len(queries) for k in KS}
+    metrics["mrr"] = statistics.mean(reciprocal_ranks)
+    metrics["p50_ms"] = statistics.median(latencies)
+    return metrics
+
+
+def bench(distractor_count: int, rounds: int) -> None:
+    """Index the corpus and evaluate the three retrievers on both query sets."""
+    settings.VECTOR_DB_BACKEND = "exact"
+    settings.VECTOR_INDEX_DIR = tempfile.mkdtemp(prefix="bench_vectors_")
+    settings.LEXICAL_INDEX_DIR = tempfile.mkdtemp(prefix="bench_lexical_")
+    from app.services.chunker import get_document_chunker
+    from app.services.vector_db import VectorDBService
+
+    testset = [json.loads(line) for line in TESTSET.read_text().splitlines() if line.strip()]
+    corpus = [row["contexts"][0] for row in testset]
+    corpus += [chunk.text for chunk in get_document_chunker().chunks(SAMPLE_REPORT.read_text())]
+    corpus += distractors(distractor_count)
+
+    service = VectorDBService()
+    start = time.perf_counter()
+    service.add_documents("bench_hybrid", corpus)
+    print(f"indexed {len(corpus)} chunks in {time.perf_counter() - start:.1f}s (model: {settings.EMBEDDING_MODEL})")
+
+    depth = max(KS)
+    retrievers = {
+        "vector": lambda q: service.search("bench_hybrid", q, depth)["results"],
+        "bm25": lambda q: service.lexical_search("bench_hybrid", q, depth)["results"],
+        "hybrid": lambda q: service.hybrid_search("bench_hybrid", q, depth)["results"],
+    }
+    for query_set, queries in build_queries(testset).items():
+        print(f"\n{query_set} ({len(queries)} queries)")
+        print(f"{'retriever':<10} " + " ".join(f"{'recall@' + str(k):>9}" for k in KS) + f" {'mrr':>6} {'p50_ms':>8}")
+        for name, retrieve in retrievers.items():
+            metrics = evaluate(lambda q: [r["document"] for r in retrieve(q)], queries, rounds)
+            print(
+                f"{name:<10} " + " ".join(f"{metrics['recall@' + str(k)]:>9.2f}" for k in KS)
+                + f" {metrics['mrr']:>6.2f} {metrics['p50_ms']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--distractors", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    bench(args.distractors, args.rounds)
@@ -0,0 +1,135 @@
+"""
+Ingestion memory benchmark: peak RSS and time to embed and store 100k chunks, with
+embeddings held as Python lists (previous path) vs float32 arrays converted one page
+at a time at the Chroma boundary.
+
+Each mode runs in a fresh process so peak RSS is not shared between them.
+--synthetic replaces the model with random vectors to isolate the storage path
+(the forward passes are identical in both modes).
+
+Usage:
+    python -m benchmarks.bench_ingest_memory [--chunks 100000] [--chunk-chars 400] [--synthetic]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from typing import List
+
+SAMPLE_DOCUMENTS = Path(__file__).resolve().parents[2] / "sample_data" / "documents"
+
+
+def build_chunks(count: int, chunk_chars: int) -> List[str]:
+    """Unique lab-report-like chunks (numbered, so nothing is served from a cache)."""
+    text = " ".join(path.read_text() for path in sorted(SAMPLE_DOCUMENTS.glob("*.txt")))
+    text = " ".join(text.split()) or "Glucose 126 mg/dL HIGH. Hemoglobin A1c 6.8 % HIGH."
+    text = text * (chunk_chars // len(text) + 2)
+    return [f"[{i}] {text[(i * 97) % len(text):][:chunk_chars]}" for i in range(count)]
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB."""
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SyntheticEmbeddings:
+    """Random unit vectors standing in for the model."""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.rng = np.random.default_rng(0)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        vectors = self.rng.standard_normal((len(texts), self.dimension), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run(mode: str, chunks: int, chunk_chars: int, synthetic: bool, persist_dir: str, results) -> None:
+    """Ingest `chunks` documents in one mode and report time and memory."""
+    from app.core.config import settings
+    settings.CHROMA_PERSIST_DIR = persist_dir
+
+    from app.services import embedding_service
+    from app.services.vector_db import VectorDBService
+
+    if synthetic:
+        service = SyntheticEmbeddings(settings.EMBEDDING_DIMENSION)
+        encode_lists = lambda texts: service.encode(texts).tolist()  # noqa: E731
+    else:
+        service = embedding_service.EmbeddingService(batching_enabled=False, cache_enabled=False)
+        encode_lists = lambda texts: service.model.encode(texts, convert_to_numpy=True).tolist()  # noqa: E731
+    embedding_service._embedding_service = service
+    db = VectorDBService()
+    documents = build_chunks(chunks, chunk_chars)
+    ids = [f"chunk_{i}" for i in range(chunks)]
+
+    # Warm up the model so its buffers count towards the baseline
+    service.encode(documents[:256])
+    baseline = rss_mb()
+    start = time.perf_counter()
+
+    if mode == "lists":
+        # Previous path: the whole corpus as nested Python floats before insertion
+        embeddings = encode_lists(documents)
+        collection = db.get_or_create_collection(f"bench_{mode}")
+        page_size = settings.VECTOR_DB_ADD_BATCH_SIZE
+        for offset in range(0, chunks, page_size):
+            collection.add(
+                embeddings=embeddings[offset:offset + page_size],
+                documents=documents[offset:offset + page_size],
+                ids=ids[offset:offset + page_size]
+            )
+    else:
+        embeddings = service.encode(documents)
+        db.add_documents(f"bench_{mode}", documents, ids=ids, embeddings=embeddings)
+
+    results[mode] = {
+        "seconds": time.perf_counter() - start,
+        "baseline_mb": baseline,
+        "peak_mb": peak_rss_mb(),
+        # A boxed float is 24 bytes plus an 8-byte list slot
+        "embedding_mb": chunks * service.dimension * (32 if mode == "lists" else 4) / 2 ** 20
+    }
+
+
+def bench(chunks: int, chunk_chars: int, synthetic: bool) -> None:
+    """Run both modes in separate processes and print a comparison."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Manager().dict()
+
+    for mode in ("lists", "float32"):
+        with tempfile.TemporaryDirectory() as persist_dir:
+            process = context.Process(target=run, args=(mode, chunks, chunk_chars, synthetic, persist_dir, results))
+            process.start()
+            process.join()
+            if process.exitcode:
+                raise SystemExit(f"{mode} run failed with exit code {process.exitcode}")
+
+    print(f"{chunks} chunks of ~{chunk_chars} chars{' (synthetic embeddings)' if synthetic else ''}")
+    print(f"{'mode':<8} {'seconds':>8} {'chunks/s':>9} {'peak_MB':>8} {'ingest_MB':>10} {'vectors_MB':>11}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<8} {result['seconds']:>8.1f} {chunks / result['seconds']:>9.0f} {result['peak_mb']:>8.0f} "
+            f"{result['peak_mb'] - result['baseline_mb']:>10.0f} {result['embedding_mb']:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--chunk-chars", type=int, default=400)
+    parser.add_argument("--synthetic", action="store_true", help="Use random vectors instead of the model")
+    args = parser.parse_args()
+    bench(args.chunks, args.chunk_chars, args.synthetic)
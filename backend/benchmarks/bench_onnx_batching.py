@@ -0,0 +1,119 @@
+"""
+ONNX inference throughput: concurrent classify_async requests with one
+session.run per request (in worker threads) vs micro-batched runs, at several
+concurrency levels.
+
+Without --model, a small image classifier (a few conv layers, dynamic batch
+axis) is exported with torch.onnx. With --inference-only, requests carry
+preprocessed arrays, so image decoding does not mask the inference cost.
+
+Usage:
+    python -m benchmarks.bench_onnx_batching [--model PATH] [--requests 256] [--concurrency 1 8 32] [--inference-only]
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+
+
+def export_classifier(path: Path) -> None:
+    """Export a small conv classifier with a dynamic batch axis."""
+    import torch
+    from torch import nn
+
+    model = nn.Sequential(
+        nn.Conv2d(3, 32, 3, stride=2, padding=1), nn.ReLU(),
+        nn.Conv2d(32, 64, 3, stride=2, padding=1), nn.ReLU(),
+        nn.Conv2d(64, 128, 3, stride=2, padding=1), nn.ReLU(),
+        nn.Conv2d(128, 128, 3, stride=2, padding=1), nn.ReLU(),
+        nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(128, 6), nn.Softmax(dim=1),
+    ).eval()
+    torch.onnx.export(
+        model, torch.zeros(1, 3, 224, 224), str(path), input_names=["image"], output_names=["probabilities"],
+        dynamic_axes={"image": {0: "batch"}, "probabilities": {0: "batch"}}, opset_version=17, dynamo=False
+    )
+
+
+def sample_images(count: int) -> List[str]:
+    """Base64-encoded JPEG photos-sized noise images."""
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)).save(buffer, format="JPEG")
+        images.append(base64.b64encode(buffer.getvalue()).decode())
+    return images
+
+
+async def run(service, images: List, concurrency: int) -> List[float]:
+    """Classify every image with at most `concurrency` requests in flight; returns latencies in ms."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(image):
+        async with semaphore:
+            start = time.perf_counter()
+            if isinstance(image, str):
+                await service.classify_async(image)
+            else:
+                await service._infer_async(image)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(image) for image in images))
+    return latencies
+
+
+def bench(model: str, requests: int, levels: List[int], inference_only: bool) -> None:
+    """Compare unbatched and batched inference at each concurrency level."""
+    from app.services.onnx_inference import ONNXInferenceService
+
+    if not model:
+        model = str(Path(tempfile.mkdtemp(prefix="bench_onnx_")) / "classifier.onnx")
+        export_classifier(Path(model))
+    services = {
+        "per-request": ONNXInferenceService(model, batching_enabled=False),
+        "batched": ONNXInferenceService(model, batching_enabled=True),
+    }
+    images = sample_images(min(requests, 32))
+    if inference_only:
+        images = [services["batched"].preprocess_image(image) for image in images]
+    images = [images[i % len(images)] for i in range(requests)]
+    print(f"model: {model}, {requests} requests, ONNX_THREADS={settings.ONNX_THREADS}, workers={settings.ONNX_WORKERS}")
+    print(f"{'mode':<12} {'concurrency':>11} {'req/s':>8} {'p50_ms':>8} {'p99_ms':>8} {'mean_batch':>10}")
+    for concurrency in levels:
+        for name, service in services.items():
+            asyncio.run(run(service, images[:8], concurrency))  # warm-up
+            if service.batcher is not None:
+                service.batcher.batches = service.batcher.items = 0
+            start = time.perf_counter()
+            latencies = sorted(asyncio.run(run(service, images, concurrency)))
+            elapsed = time.perf_counter() - start
+            batch = service.batcher.stats()["mean_batch_size"] if service.batcher is not None else 1.0
+            print(
+                f"{name:<12} {concurrency:>11} {requests / elapsed:>8.1f} {statistics.median(latencies):>8.1f} "
+                f"{latencies[int(0.99 * (len(latencies) - 1))]:>8.1f} {batch:>10.2f}"
+            )
+    stats = services["batched"].stats()["batching"]
+    for key in ("batch_size_histogram", "queue_depth_histogram", "inference_ms_histogram", "queue_wait_ms_histogram"):
+        print(f"{key}: {stats[key]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="")
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--inference-only", action="store_true", help="Send preprocessed arrays")
+    args = parser.parse_args()
+    bench(args.model, args.requests, args.concurrency, args.inference_only)
@@ -0,0 +1,66 @@
+"""
+PHI redaction throughput: single-pass PHIRedactor vs per-pattern findall/replace loop.
+
+Usage:
+    python -m benchmarks.bench_redaction
+"""
+
+import timeit
+from pathlib import Path
+from typing import Dict
+
+from app.core.security import PHI_PATTERNS, PHIRedactor, phi_redactor
+
+SAMPLE_REPORT = Path(__file__).resolve().parents[2] / "sample_data" / "documents" / "sample_lab_report.txt"
+
+PHI_LINES = (
+    "Patient SSN 123-45-6789, phone 555-123-4567, email john.doe@example.com\n"
+    "Card on file 4111-1111-1111-1111, DOB 05/14/1990, MRN: 00012345\n"
+)
+
+
+def legacy_redact(text: str) -> str:
+    """Original implementation: findall per pattern, then str.replace per match."""
+    for pattern_name, pattern in PHI_PATTERNS.items():
+        for match in pattern.findall(text):
+            text = text.replace(match, f"[REDACTED_{pattern_name.upper()}]")
+    return text
+
+
+def build_inputs() -> Dict[str, str]:
+    """Lab-report-sized inputs with little, moderate and dense PHI."""
+    report = SAMPLE_REPORT.read_text() if SAMPLE_REPORT.exists() else "Glucose 126 mg/dL HIGH\n" * 200
+    dense = "".join(report[i:i + 512] + PHI_LINES for i in range(0, len(report), 512))
+
+    return {
+        "lab_report_4kb": report,
+        "lab_report_dense_phi": dense,
+        "lab_report_64kb": (report * (65536 // len(report) + 1))[:65536],
+        "dense_phi_64kb": (dense * (65536 // len(dense) + 1))[:65536],
+    }
+
+
+def bench(number: int = 200) -> None:
+    """Run the benchmark and print throughput in MB/s."""
+    uncached = PHIRedactor(PHI_PATTERNS)
+
+    print(
+        f"{'input':<22} {'bytes':>7} {'matches':>8} {'legacy_MBps':>12} {'engine_MBps':>12} "
+        f"{'speedup':>8} {'cached_MBps':>12}"
+    )
+    for name, text in build_inputs().items():
+        redacted, matches = uncached.redact(text)
+        assert redacted == legacy_redact(text)
+
+        size_mb = len(text.encode("utf-8")) / 1e6
+        legacy = timeit.timeit(lambda: legacy_redact(text), number=number) / number
+        engine = timeit.timeit(lambda: uncached.redact(text), number=number) / number
+        cached = timeit.timeit(lambda: phi_redactor.redact(text), number=number) / number
+        print(
+            f"{name:<22} {len(text):>7} {len(matches):>8} {size_mb / legacy:>12.1f} "
+            f"{size_mb / engine:>12.1f} {legacy / engine:>7.1f}x {size_mb / cached:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    bench()
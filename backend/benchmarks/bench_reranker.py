@@ -0,0 +1,105 @@
+"""
+Reranking evaluation on ragas/testset.jsonl: recall@k and MRR of hybrid
+retrieval order vs cross-encoder reranking of --candidates retrieved documents,
+with reranking latency and the fallback rate under the time budget.
+
+The corpus is the testset contexts plus the sample lab report chunks and
+--distractors synthetic clinical sentences (as in bench_hybrid_retrieval).
+
+Usage:
+    python -m benchmarks.bench_reranker [--candidates 20] [--budget-ms 150] [--onnx PATH]
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from benchmarks.bench_hybrid_retrieval import KS, SAMPLE_REPORT, TESTSET, distractors
+
+COLLECTION = "bench_reranker"
+
+
+def ranking_metrics(rankings: List[List[str]], relevant: List[str]) -> Dict[str, float]:
+    """Recall@k and MRR of ranked documents against the relevant one per query."""
+    ranks = [ranking.index(r) + 1 if r in ranking else None for ranking, r in zip(rankings, relevant)]
+    metrics = {f"recall@{k}": sum(rank is not None and rank <= k for rank in ranks) / len(ranks) for k in KS}
+    metrics["mrr"] = statistics.mean(1 / rank if rank else 0.0 for rank in ranks)
+    return metrics
+
+
+def bench(candidates: int, budget_ms: float, distractor_count: int, rounds: int, onnx: Optional[str]) -> None:
+    """Index the corpus, rerank each question's candidates and compare with retrieval order."""
+    settings.VECTOR_DB_BACKEND = "exact"
+    settings.VECTOR_INDEX_DIR = tempfile.mkdtemp(prefix="bench_vectors_")
+    settings.LEXICAL_INDEX_DIR = tempfile.mkdtemp(prefix="bench_lexical_")
+    from app.services.chunker import get_document_chunker
+    from app.services.reranker import Reranker
+    from app.services.vector_db import VectorDBService
+
+    testset = [json.loads(line) for line in TESTSET.read_text().splitlines() if line.strip()]
+    corpus = [row["contexts"][0] for row in testset]
+    corpus += [chunk.text for chunk in get_document_chunker().chunks(SAMPLE_REPORT.read_text())]
+    corpus += distractors(distractor_count)
+    service = VectorDBService()
+    service.add_documents(COLLECTION, corpus)
+
+    questions = [row["question"] for row in testset]
+    relevant = [row["contexts"][0] for row in testset]
+    retrieved = [
+        [{"content": r["document"], "score": r["score"]} for r in service.hybrid_search(COLLECTION, q, candidates)["results"]]
+        for q in questions
+    ]
+    print(f"{len(questions)} questions, {len(corpus)} chunks, {candidates} candidates, model: {settings.RERANKER_MODEL}")
+
+    rerankers = {
+        "torch": Reranker(onnx_path="", budget_ms=budget_ms, quantize=False),
+        "torch-int8": Reranker(onnx_path="", budget_ms=budget_ms, quantize=True),
+    }
+    if onnx:
+        rerankers["onnx"] = Reranker(onnx_path=onnx, budget_ms=budget_ms)
+
+    depth = max(KS)
+    rows = {"retrieval": (ranking_metrics([[d["content"] for d in docs[:depth]] for docs in retrieved], relevant), None)}
+    for name, reranker in rerankers.items():
+        reranker.rerank(questions[0], retrieved[0], depth, budget_ms=60_000)  # warm-up
+        latencies = []
+        for _ in range(rounds):
+            for question, documents in zip(questions, retrieved):
+                start = time.perf_counter()
+                reranker.scores(question, [d["content"] for d in documents])
+                latencies.append((time.perf_counter() - start) * 1000)
+        reranked = [reranker.rerank(q, docs, depth, budget_ms=60_000) for q, docs in zip(questions, retrieved)]
+        reranker.requests = reranker.fallbacks = 0
+        for question, documents in zip(questions, retrieved):
+            reranker.rerank(question, documents, depth)
+        latencies.sort()
+        rows[f"rerank/{name}"] = (
+            ranking_metrics([[d["content"] for d in docs] for docs in reranked], relevant),
+            (statistics.median(latencies), latencies[int(0.99 * (len(latencies) - 1))], reranker.stats()["fallback_rate"])
+        )
+
+    print(
+        f"{'order':<18} " + " ".join(f"{'recall@' + str(k):>9}" for k in KS)
+        + f" {'mrr':>6} {'p50_ms':>8} {'p99_ms':>8} {'fallback@' + str(int(budget_ms)) + 'ms':>15}"
+    )
+    for name, (metrics, timing) in rows.items():
+        timing_columns = f" {timing[0]:>8.1f} {timing[1]:>8.1f} {timing[2]:>15.0%}" if timing else ""
+        print(
+            f"{name:<18} " + " ".join(f"{metrics['recall@' + str(k)]:>9.2f}" for k in KS)
+            + f" {metrics['mrr']:>6.2f}" + timing_columns
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--candidates", type=int, default=settings.RERANKER_CANDIDATES)
+    parser.add_argument("--budget-ms", type=float, default=settings.RERANKER_BUDGET_MS)
+    parser.add_argument("--distractors", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--onnx", help="Also evaluate an exported ONNX model (see reranker.export_onnx)")
+    args = parser.parse_args()
+    bench(args.candidates, args.budget_ms, args.distractors, args.rounds, args.onnx)
@@ -0,0 +1,75 @@
+"""
+Routing microbenchmark: compiled single-scan RuleRouter vs per-pattern re.search loop.
+
+Usage:
+    python -m benchmarks.bench_routing
+"""
+
+import re
+import timeit
+from pathlib import Path
+from typing import Dict, List
+
+from app.agents.routing_agent import RoutingAgent, RuleRouter
+
+SAMPLE_REPORT = Path(__file__).resolve().parents[2] / "sample_data" / "documents" / "sample_lab_report.txt"
+
+
+def legacy_classification(rules: Dict[str, List[str]], query: str) -> List[str]:
+    """Original rule loop: one uncompiled re.search per pattern."""
+    matches = []
+    for agent_name, patterns in rules.items():
+        for pattern in patterns:
+            if re.search(pattern, query, re.IGNORECASE):
+                matches.append(agent_name)
+                break
+    return matches
+
+
+def build_queries() -> Dict[str, str]:
+    """Build short, long and 10 KB pasted-report queries."""
+    report = SAMPLE_REPORT.read_text() if SAMPLE_REPORT.exists() else "Glucose 126 mg/dL HIGH\n" * 200
+    pasted = (report * (10240 // len(report) + 1))[:10240]
+
+    return {
+        "short": "book an appointment with dr. smith",
+        "short_no_match": "hello, how are you today?",
+        "long": ("the patient mentioned some concerns during the visit " * 20) + "about billing",
+        "report_10kb": pasted.lower(),
+        "report_10kb_no_newlines": pasted.replace("\n", " ").lower(),
+    }
+
+
+def scaled_rules(rules: Dict[str, List[str]], factor: int) -> Dict[str, List[str]]:
+    """Grow the rule table with synthetic non-matching rules."""
+    scaled = {agent: list(patterns) for agent, patterns in rules.items()}
+    for i in range(factor):
+        for agent in scaled:
+            scaled[agent].append(f"zq{i}{agent[:3]}.*keyword{i}")
+    return scaled
+
+
+def bench(number: int = 200) -> None:
+    """Run the benchmark and print per-call latency in microseconds."""
+    rules = RoutingAgent().routing_rules
+    queries = build_queries()
+
+    print(f"{'rules':>6} {'query':<26} {'legacy_us':>10} {'router_us':>10} {'speedup':>8}")
+    for factor in (0, 10, 50):
+        table = scaled_rules(rules, factor)
+        router = RuleRouter(table)
+        rule_count = sum(len(p) for p in table.values())
+
+        for name, query in queries.items():
+            assert legacy_classification(table, query) == [m["agent"] for m in router.match(query)]
+
+            legacy = timeit.timeit(lambda: legacy_classification(table, query), number=number) / number
+            compiled = timeit.timeit(lambda: router.match(query), number=number) / number
+            print(
+                f"{rule_count:>6} {name:<26} {legacy * 1e6:>10.1f} {compiled * 1e6:>10.1f} "
+                f"{legacy / compiled:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    bench()
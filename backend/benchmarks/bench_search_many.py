@@ -0,0 +1,81 @@
+"""
+Batched search benchmark: queries/s for N separate search() calls vs one
+search_many() call, at batch sizes 1, 8, 32 and 128.
+
+The embedding cache is disabled so every query pays for its forward pass.
+
+Usage:
+    python -m benchmarks.bench_search_many [--corpus 500] [--rounds 3]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from app.core.config import settings
+
+SAMPLE_REPORT = Path(__file__).resolve().parents[2] / "sample_data" / "documents" / "sample_lab_report.txt"
+BATCH_SIZES = (1, 8, 32, 128)
+
+TOPICS = [
+    "fasting glucose", "hba1c", "ldl cholesterol", "hdl cholesterol", "triglycerides",
+    "creatinine", "bun", "potassium", "sodium", "alt", "ast", "bilirubin",
+]
+
+
+def build_corpus(size: int) -> List[str]:
+    """Report lines padded out with synthetic result sentences."""
+    lines = [line.strip() for line in SAMPLE_REPORT.read_text().splitlines() if len(line.strip()) > 20]
+    synthetic = [f"Patient {i}: {TOPICS[i % len(TOPICS)]} result reviewed on visit {i % 31 + 1}." for i in range(size)]
+    return (lines + synthetic)[:size]
+
+
+def build_queries(count: int, offset: int) -> List[str]:
+    """Distinct queries (offset keeps rounds from repeating texts)."""
+    return [f"what was the {TOPICS[i % len(TOPICS)]} result at visit {offset + i}" for i in range(count)]
+
+
+def bench(corpus: int, rounds: int) -> None:
+    """Run the benchmark and print throughput per batch size."""
+    settings.CHROMA_PERSIST_DIR = tempfile.mkdtemp(prefix="bench_chroma_")
+    from app.services import embedding_service
+    from app.services.vector_db import VectorDBService
+
+    embedding_service._embedding_service = embedding_service.EmbeddingService(
+        batching_enabled=False, cache_enabled=False
+    )
+    service = VectorDBService()
+    service.add_documents("bench_search", build_corpus(corpus))
+    service.search_many("bench_search", build_queries(8, -8))
+
+    print(f"{'batch':>5} {'search_qps':>11} {'search_many_qps':>16} {'speedup':>8}")
+    offset = 0
+    for batch in BATCH_SIZES:
+        timings = {"search": 0.0, "search_many": 0.0}
+        for _ in range(rounds):
+            queries = build_queries(batch, offset)
+            offset += batch
+            start = time.perf_counter()
+            for query in queries:
+                service.search("bench_search", query)
+            timings["search"] += time.perf_counter() - start
+
+            queries = build_queries(batch, offset)
+            offset += batch
+            start = time.perf_counter()
+            service.search_many("bench_search", queries)
+            timings["search_many"] += time.perf_counter() - start
+
+        single = batch * rounds / timings["search"]
+        many = batch * rounds / timings["search_many"]
+        print(f"{batch:>5} {single:>11.1f} {many:>16.1f} {many / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    bench(args.corpus, args.rounds)
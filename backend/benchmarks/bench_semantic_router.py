@@ -0,0 +1,52 @@
+"""
+Semantic router microbenchmark: per-query encode and centroid similarity cost.
+
+Usage:
+    python -m benchmarks.bench_semantic_router
+"""
+
+import time
+import numpy as np
+
+from app.services.semantic_router import SemanticRouter
+
+QUERIES = [
+    "can I come in on thursday instead",
+    "why is my bill so high this month",
+    "is it ok to take tylenol with my antibiotics",
+    "what do my potassium numbers mean",
+    "what are the early signs of a stroke",
+]
+
+
+def bench(rounds: int = 50) -> None:
+    """Run the benchmark and print per-query latency in milliseconds."""
+    start = time.perf_counter()
+    router = SemanticRouter()
+    print(f"startup (load or build centroids): {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"centroid matrix: {router.centroids.shape} {router.centroids.dtype}")
+
+    # Warm up the model
+    router.classify(QUERIES[0])
+
+    encode_ms, similarity_ms = [], []
+    for _ in range(rounds):
+        for query in QUERIES:
+            t0 = time.perf_counter()
+            embedding = router.embedding_service.encode_single(query)
+            t1 = time.perf_counter()
+            router.similarities(embedding)
+            t2 = time.perf_counter()
+            encode_ms.append((t1 - t0) * 1000)
+            similarity_ms.append((t2 - t1) * 1000)
+
+    for name, samples in (("encode", encode_ms), ("similarity", similarity_ms)):
+        samples = np.array(samples)
+        print(f"{name:<12} p50={np.percentile(samples, 50):.3f} ms  p99={np.percentile(samples, 99):.3f} ms")
+
+    for query in QUERIES:
+        print(f"{query!r} -> {router.classify(query)}")
+
+
+if __name__ == "__main__":
+    bench()
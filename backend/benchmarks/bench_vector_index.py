@@ -0,0 +1,133 @@
+"""
+In-process vector index benchmark: recall@k and single-query QPS of the IVF
+backend at several nprobe values, against the exact backend as ground truth.
+
+Two vector sets:
+- synthetic: clustered random unit vectors (default 1,000,000 x 384)
+- sample: embeddings of the sample_data texts (lab report chunks and the sample
+  document previews), each jittered into --per-sample neighbours so the set is
+  large enough for IVF to matter
+
+Usage:
+    python -m benchmarks.bench_vector_index [--vectors 1000000] [--queries 100] [--k 10]
+    python -m benchmarks.bench_vector_index --sample [--per-sample 2000]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_index import LocalCollection, _normalize
+
+SAMPLE_DATA = Path(__file__).resolve().parents[2] / "sample_data"
+NPROBES = (1, 2, 4, 8, 16, 32, 64)
+BLOCK = 65536
+
+
+def synthetic_blocks(count: int, dimension: int, clusters: int, spread: float, seed: int = 0) -> Iterator[np.ndarray]:
+    """Clustered unit vectors, generated block by block to bound memory."""
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((clusters, dimension), dtype=np.float32))
+    for start in range(0, count, BLOCK):
+        size = min(BLOCK, count - start)
+        noise = rng.standard_normal((size, dimension), dtype=np.float32) * (spread / np.sqrt(dimension))
+        yield _normalize(centers[rng.integers(clusters, size=size)] + noise)
+
+
+def sample_blocks(per_sample: int, seed: int = 0) -> Iterator[np.ndarray]:
+    """Sample-data embeddings, each with `per_sample` jittered neighbours."""
+    from app.services.chunker import get_document_chunker
+    from app.services.embedding_service import EmbeddingService
+
+    report = (SAMPLE_DATA / "documents" / "sample_lab_report.txt").read_text()
+    texts = [chunk.text for chunk in get_document_chunker().chunks(report)]
+    previews = json.loads((SAMPLE_DATA / "vectors" / "sample_embeddings.json").read_text())["documents"]
+    texts += [f"{doc['title']}. {doc['content_preview']}" for doc in previews]
+
+    seeds = EmbeddingService(batching_enabled=False, cache_enabled=False).encode(texts)
+    print(f"sample seeds: {len(seeds)} texts")
+    rng = np.random.default_rng(seed)
+    for start in range(0, len(seeds) * per_sample, BLOCK):
+        size = min(BLOCK, len(seeds) * per_sample - start)
+        noise = rng.standard_normal((size, seeds.shape[1]), dtype=np.float32) * (0.4 / np.sqrt(seeds.shape[1]))
+        yield _normalize(seeds[rng.integers(len(seeds), size=size)] + noise)
+
+
+def load(collection: LocalCollection, blocks: Iterator[np.ndarray]) -> float:
+    """Upsert all blocks; returns the seconds taken."""
+    start = time.perf_counter()
+    offset = 0
+    for block in blocks:
+        ids = [f"v{offset + i}" for i in range(len(block))]
+        collection.upsert(ids=ids, embeddings=block, metadatas=[{"block": offset // BLOCK}] * len(block))
+        offset += len(block)
+    return time.perf_counter() - start
+
+
+def timed_queries(collection: LocalCollection, queries: np.ndarray, k: int) -> Tuple[List[List[str]], float]:
+    """Run queries one at a time; returns the result IDs and queries per second."""
+    start = time.perf_counter()
+    ids = [collection.query(query[np.newaxis], n_results=k)["ids"][0] for query in queries]
+    return ids, len(queries) / (time.perf_counter() - start)
+
+
+def bench(blocks: Iterator[np.ndarray], queries: int, k: int) -> None:
+    """Load a vector set, then compare exact and IVF search."""
+    # Train once after loading instead of retraining as the collection doubles
+    settings.VECTOR_INDEX_IVF_MIN_ROWS = 1 << 62
+    collection = LocalCollection("bench", Path(tempfile.mkdtemp(prefix="bench_index_")), mode="exact")
+    seconds = load(collection, blocks)
+    total = collection.count()
+    print(f"loaded {total} x {collection.dimension} vectors in {seconds:.1f}s ({total / seconds:,.0f}/s)")
+
+    rng = np.random.default_rng(1)
+    rows = rng.choice(total, queries, replace=False)
+    query_vectors = np.asarray(collection._vectors[rows])
+    query_vectors = _normalize(
+        query_vectors + rng.standard_normal(query_vectors.shape, dtype=np.float32) * (0.3 / np.sqrt(query_vectors.shape[1]))
+    )
+
+    truth, exact_qps = timed_queries(collection, query_vectors, k)
+    start = time.perf_counter()
+    collection.query(query_vectors, n_results=k)
+    batched_qps = queries / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    collection._ivf = collection.build_ivf()
+    collection.mode = "ivf"
+    print(f"IVF: {len(collection._ivf.centroids)} cells, trained in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'mode':<12} {'recall@' + str(k):>10} {'qps':>9} {'speedup':>8}")
+    print(f"{'exact':<12} {1.0:>10.3f} {exact_qps:>9.1f} {1.0:>7.1f}x")
+    print(f"{'exact batch':<12} {1.0:>10.3f} {batched_qps:>9.1f} {batched_qps / exact_qps:>7.1f}x")
+    for nprobe in NPROBES:
+        if nprobe > len(collection._ivf.centroids):
+            break
+        collection.nprobe = nprobe
+        found, qps = timed_queries(collection, query_vectors, k)
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)])
+        print(f"{'ivf/' + str(nprobe):<12} {recall:>10.3f} {qps:>9.1f} {qps / exact_qps:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=1024)
+    parser.add_argument("--spread", type=float, default=1.0, help="Noise norm relative to the cluster centers")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sample", action="store_true", help="Use sample_data embeddings instead of synthetic vectors")
+    parser.add_argument("--per-sample", type=int, default=2000)
+    args = parser.parse_args()
+    if args.sample:
+        source = sample_blocks(args.per_sample)
+    else:
+        source = synthetic_blocks(args.vectors, args.dimension, args.clusters, args.spread)
+    bench(source, args.queries, args.k)